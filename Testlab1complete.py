@@ -1,12 +1,41 @@
 import time
 import csv
-from lab1complete import Student, CourseDB, Professor
+import os
+import shutil
+import sys
+import statistics
+import tempfile
+import threading
+import asyncio
+import io
+import json
+from contextlib import contextmanager, redirect_stdout
+from unittest import mock
+from collections import defaultdict
+from lab1complete import Student, CourseDB, Professor, LoginSystem, OffsetIndex
+from metrics import metrics
+from lab1complete import SessionTables, Catalog, Dashboard, convert_students, convert_professors, compress_tables
+from lab1complete import IntegrityChecker, check_tables, verify_password
+from lab1complete import SqliteBackend, migrate_to_sqlite, normalize_tables, table_layout
+from server import OPERATIONS, WRITE, GradeService, ServiceClient, ThreadOutput
+from reports import write_transcripts
+
+@contextmanager
+def table_copies(*names):
+    """Copies the named tables into a temporary directory, yields it, and removes it afterwards."""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for name in names:
+            shutil.copy(name, temp_dir)
+        yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir)
 
 def test_student_records():
-    student_db = Student("student.csv")
+    student_db = Student("student.csv", lazy=True)
     
     print("Checking student records...")
-    num_students = sum(len(records) for records in student_db.students.values())
+    num_students = sum(1 for _ in student_db.iter_records())
     print(f"Total student records found: {num_students}")
     
     if num_students == 1000:
@@ -25,6 +54,870 @@ def test_student_records():
     end_time = time.time()
     print(f"Sorting by email took {end_time - start_time:.4f} seconds")
 
+def test_course_stats_index():
+    with table_copies("Student.csv") as temp_dir:
+        student_db = Student(os.path.join(temp_dir, "Student.csv"))
+
+    print("Checking course statistics index...")
+    course_marks = defaultdict(list)
+    for records in student_db.students.values():
+        for record in records:
+            course_marks[record["course_id"]].append(record["marks"])
+
+    for course, marks in course_marks.items():
+        stats = student_db.course_stats[course]
+        assert stats.mean() == sum(marks) / len(marks), course
+        assert stats.median() == statistics.median(marks), course
+    print(f"Course statistics index check passed for {len(course_marks)} courses.")
+
+def test_change_journal():
+    with table_copies("Student.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+
+        print("Checking change journal...")
+        student_db = Student(csv_file)
+        original_size = os.path.getsize(csv_file)
+        student_db.update_student_record("student1@mycsu.edu", "DATA236", "C", "40")
+        student_db.delete_student("student2@mycsu.edu")
+        assert os.path.getsize(csv_file) == original_size, "CSV should not be rewritten per change"
+
+        reloaded_db = Student(csv_file)
+        assert dict(reloaded_db.students) == dict(student_db.students)
+
+        reloaded_db.save_data()
+        assert not os.path.exists(csv_file + ".journal")
+        assert dict(Student(csv_file).students) == dict(student_db.students)
+    print("Change journal check passed.")
+
+def test_batch_rollback():
+    with table_copies("Student.csv", "login.csv", "course.csv", "professor.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+
+        print("Checking batch rollback...")
+        student_db = Student(csv_file)
+        before = {email: [dict(record) for record in records] for email, records in student_db.students.items()}
+        try:
+            with student_db.batch():
+                student_db.bulk_upsert([("student1@mycsu.edu", "FirstName1", "LastName1", "DATA236", "C", "10")])
+                student_db.bulk_delete(["student2@mycsu.edu"])
+                raise RuntimeError("abort batch")
+        except RuntimeError:
+            pass
+        assert dict(student_db.students) == before
+        assert dict(Student(csv_file).students) == before
+
+        login_csv = os.path.join(temp_dir, "login.csv")
+        login_db = LoginSystem(login_csv)
+        users_before = dict(login_db.users)
+        try:
+            with redirect_stdout(io.StringIO()), login_db.batch():
+                login_db.add_user("batch@mycsu.edu", "secret", "student")
+                login_db.change_password("student1@mycsu.edu", "changed")
+                raise RuntimeError("abort batch")
+        except RuntimeError:
+            pass
+        assert login_db.users == users_before
+        assert LoginSystem(login_csv).users == users_before
+
+        # A group the server writes partly must say which tables were saved
+        working_dir = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            service = GradeService(SessionTables())
+            service.output = ThreadOutput(io.StringIO())
+            service.tables.student_db._persist = lambda *args: (_ for _ in ()).throw(OSError("disk full"))
+            with redirect_stdout(io.StringIO()):
+                replies = service.apply_group([("student.update_student_record", ["student1@mycsu.edu", "DATA236", "C", "10"]),
+                                               ("login.add_user", ["group@mycsu.edu", "secret", "student"])])
+            assert all(reply["error"].startswith("Changes to the login table(s) were saved") for reply in replies)
+            assert "group@mycsu.edu" in LoginSystem("login.csv").users
+            assert dict(service.tables.student_db.students) == before
+
+            # A bulk write failing partway through is rolled back without losing the rest of its group
+            service = GradeService(SessionTables())
+            service.output = ThreadOutput(io.StringIO())
+            bad_rows = [["bulk@mycsu.edu", "Bulk", "Student", "DATA200", "A", "90"],
+                        ["student1@mycsu.edu", "FirstName1", "LastName1", "DATA236", "C", "11"],
+                        [["not", "an", "email"], "Bad", "Row", "DATA200", "A", "90"],
+                        ["student3@mycsu.edu", "FirstName3", "LastName3", "DATA350", "C", "12"]]
+            with redirect_stdout(io.StringIO()):
+                replies = service.apply_group([("student.update_student_record", ["student2@mycsu.edu", "DATA280", "B", "55"]),
+                                               ("student.bulk_upsert", [bad_rows]),
+                                               ("course.bulk_upsert", [[{"Course_id": "DATA990", "Course_name": "Kept",
+                                                                         "Description": "Saved with the group", "Credits": "3"}]])])
+            assert [reply["ok"] for reply in replies] == [True, False, True]
+            for student_db in (service.tables.student_db, Student("Student.csv")):
+                assert "bulk@mycsu.edu" not in student_db.students
+                assert student_db.students["student1@mycsu.edu"] == before["student1@mycsu.edu"]
+                assert {"course_id": "DATA280", "grade": "B", "marks": 55}.items() <= student_db.students["student2@mycsu.edu"][0].items()
+            assert CourseDB("course.csv").get_course("DATA990") is not None
+        finally:
+            os.chdir(working_dir)
+    print("Batch rollback check passed.")
+
+def test_columnar_store():
+    print("Checking columnar student store...")
+    with table_copies("Student.csv") as temp_dir:
+        dict_db = Student(os.path.join(temp_dir, "Student.csv"))
+        columnar_db = Student(os.path.join(temp_dir, "Student.csv"), columnar=True)
+    assert list(columnar_db.students) == list(dict_db.students)
+    assert dict(columnar_db.students) == dict(dict_db.students)
+    print(f"Columnar store matches for {len(columnar_db.students)} students.")
+
+def test_offset_index():
+    with table_copies("Student.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+
+        print("Checking the Student.csv offset index...")
+        index = OffsetIndex(csv_file).ensure()
+        assert os.path.exists(csv_file + ".idx")
+        assert len(index.course_rows("DATA236")) == sum(1 for records in Student(csv_file).students.values()
+                                                         for record in records if record["course_id"] == "DATA236")
+        with open(csv_file + ".idx", "rb") as file:
+            built = file.read()
+
+        # A row appended by another program leaves the index stale; the next lookup rebuilds it
+        with open(csv_file, "a", newline="") as file:
+            file.write("outside@mycsu.edu,Out,Side,DATA236,A,99\r\n")
+        assert index.email_rows("outside@mycsu.edu") == []
+        assert index.ensure().email_rows("outside@mycsu.edu") == [("outside@mycsu.edu", "Out", "Side", "DATA236", "A", 99)]
+        with open(csv_file + ".idx", "rb") as file:
+            assert file.read() != built
+        student_db = Student(csv_file, lazy=True)
+        assert student_db.read_student("outside@mycsu.edu") == [{"first_name": "Out", "last_name": "Side", "course_id": "DATA236",
+                                                                  "grade": "A", "marks": 99}]
+        index.close()
+        student_db.backend.close()
+
+        # A truncated sidecar is rebuilt instead of being read
+        with open(csv_file + ".idx", "r+b") as file:
+            file.truncate(OffsetIndex.header.size + 5)
+        index = OffsetIndex(csv_file).ensure()
+        assert len(index.email_rows("student1@mycsu.edu")) == 4
+        index.close()
+
+        # A save removes the sidecar instead of rebuilding it; the next single-student read builds it
+        student_db = Student(csv_file)
+        student_db.save_data()
+        assert not os.path.exists(csv_file + ".idx")
+        assert student_db.read_student("student1@mycsu.edu") == student_db.students["student1@mycsu.edu"]
+        assert os.path.exists(csv_file + ".idx")
+        student_db.backend.close()
+    print("Offset index check passed.")
+
+def test_grade_analytics():
+    from grade_analytics import GradeAnalytics
+
+    print("Checking vectorized grade analytics...")
+    with table_copies("Student.csv") as temp_dir:
+        for options in ({}, {"columnar": True}, {"lazy": True}):
+            student_db = Student(os.path.join(temp_dir, "Student.csv"), **options)
+            analytics = GradeAnalytics(student_db)
+            results = analytics.recompute_all_grades()
+            assert list(results) == list(student_db.students)
+            for email, result in results.items():
+                with redirect_stdout(io.StringIO()) as output:
+                    student_db.check_my_grade(email)
+                lines = output.getvalue().splitlines()
+                expected = [(course, int(marks), grade) for course, marks, grade in
+                            (line.replace("Course ID: ", "").replace(" Marks: ", "").replace(" Assigned Grade: ", "").split(",")
+                             for line in lines[1:-1])]
+                assert result["courses"] == expected, email
+                assert lines[-1] == f"Overall Student Grade: {result['overall']}", email
+
+            course_marks = defaultdict(list)
+            for records in student_db.students.values():
+                for record in records:
+                    course_marks[record["course_id"]].append(record["marks"])
+            stats = analytics.course_stats()
+            assert set(stats) == set(course_marks)
+            for course, marks in course_marks.items():
+                assert stats[course]["count"] == len(marks), course
+                assert stats[course]["mean"] == sum(marks) / len(marks), course
+                assert stats[course]["median"] == statistics.median(marks), course
+                assert abs(stats[course]["stddev"] - statistics.pstdev(marks)) < 1e-9, course
+                assert sum(analytics.grade_distribution()[course].values()) == len(marks), course
+    print(f"Grade analytics match check_my_grade for {len(results)} students.")
+
+def test_rank_indexes():
+    with table_copies("Student.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+
+        print("Checking rank indexes...")
+        student_db = Student(csv_file)
+        course_marks = [(email, record["marks"]) for email, records in student_db.students.items()
+                        for record in records if record["course_id"] == "DATA236"]
+        expected = sorted(course_marks, key=lambda pair: (-pair[1], pair[0]))
+        assert student_db.top_n("DATA236", 5) == expected[:5]
+        assert student_db.students_in_marks_range("DATA236", 60, 80) == [pair for pair in expected if 60 <= pair[1] <= 80]
+        email, marks = expected[-1]
+        assert student_db.rank_of(email, "DATA236") == 1 + sum(1 for _, other in course_marks if other > marks)
+
+        student_db.update_student_record(email, "DATA236", "A", "101")
+        assert student_db.top_n("DATA236", 1) == [(email, 101)]
+        assert student_db.rank_of(email, "DATA236") == 1
+    print("Rank index check passed.")
+
+def test_student_search():
+    with table_copies("Student.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+        student_db = Student(csv_file)
+
+        print("Checking student search...")
+        total, page = student_db.search(course_id="DATA236", low=0, high=59, limit=5)
+        expected = sorted(email for email, records in student_db.students.items()
+                          if any(record["course_id"] == "DATA236" and record["marks"] < 60 for record in records))
+        assert total == len(expected) and page == expected[:5]
+        assert student_db.search(name="firstname10", offset=1, limit=100)[1] == sorted(
+            email for email, records in student_db.students.items() if records[0]["first_name"].lower().startswith("firstname10"))[1:]
+
+        with redirect_stdout(io.StringIO()):
+            student_db.add_new_student("smith@mycsu.edu", "Jane", "Smith", [("DATA236", "B", "42")])
+            assert student_db.search(name="smi", course_id="DATA236", grade="B", low=40, high=45) == (1, ["smith@mycsu.edu"])
+            student_db.update_student_record("smith@mycsu.edu", "DATA236", "A", "90")
+            assert student_db.search(name="jane smith", grade="B")[0] == 0
+            student_db.delete_student("smith@mycsu.edu")
+            assert student_db.search(name="smi")[0] == 0
+
+            # A rename through bulk_upsert must reach the search index before the student is deleted
+            course_id = student_db.students["student1@mycsu.edu"][0]["course_id"]
+            student_db.bulk_upsert([("student1@mycsu.edu", "Renamed", "Person", course_id, "A", "95")])
+            assert student_db.search(name="renamed person") == (1, ["student1@mycsu.edu"])
+            assert "student1@mycsu.edu" not in student_db.search(name="firstname1 lastname1", limit=1000)[1]
+            student_db.delete_student("student1@mycsu.edu")
+            assert student_db.search(name="renamed")[0] == 0
+            assert student_db.search(course_id=course_id, grade="A", limit=1000)[0] == len({
+                email for email, records in student_db.students.items()
+                for record in records if record["course_id"] == course_id and record["grade"] == "A"})
+            student_db.save_data()
+    print("Student search check passed.")
+
+def test_course_cache():
+    with table_copies("course.csv") as temp_dir:
+        course_csv = os.path.join(temp_dir, "course.csv")
+
+        print("Checking the course cache...")
+        for options in ({}, {"snapshot": True}):
+            course_db = CourseDB(course_csv, **options)
+            reads = []
+            read_rows = course_db.backend.course_rows
+            course_db.backend.course_rows = lambda: reads.append(1) or read_rows()
+            assert course_db.get_course("DATA200") is not None
+            assert course_db.get_course("DATA236") is not None and len(course_db.load_courses()) > 1
+            assert len(reads) <= 1, "An unchanged file is read once"
+            reads.clear()
+
+            # Another program appends a course: the next lookup reads the file again
+            with open(course_csv, "a", encoding="utf-8", newline="") as file:
+                file.write(f"DATA9{len(options)}0,Outside,Added by another program,3\r\n")
+            assert course_db.get_course(f"DATA9{len(options)}0")["Course_name"] == "Outside"
+            assert len(reads) == 1
+            course_db.get_course("DATA200")
+            assert len(reads) == 1
+
+            # Another CourseDB rewrites the file: same size, new modification time
+            with redirect_stdout(io.StringIO()):
+                CourseDB(course_csv).update_course_details("DATA200", new_credits="9")
+            assert course_db.get_course("DATA200")["Credits"] == "9"
+            with redirect_stdout(io.StringIO()):
+                CourseDB(course_csv).update_course_details("DATA200", new_credits="3")
+            assert course_db.get_course("DATA200")["Credits"] == "3"
+    print("Course cache check passed.")
+
+def test_catalog_lookups():
+    with table_copies("Student.csv", "professor.csv", "course.csv") as temp_dir:
+        student_csv, professor_csv, course_csv = (os.path.join(temp_dir, name) for name in ("Student.csv", "professor.csv", "course.csv"))
+
+        print("Checking catalog lookups...")
+        student_db, professor_db, course_db = Student(student_csv), Professor(professor_csv), CourseDB(course_csv)
+        catalog = Catalog(student_db, professor_db, course_db)
+
+        def lookups(catalog, course_id):
+            return (catalog.course(course_id), sorted(catalog.professors_for_course(course_id)),
+                    sorted(catalog.students_in_course(course_id)))
+
+        with redirect_stdout(io.StringIO()):
+            course_db.add_course("DATA999", "Catalog", "Added after the catalog was built", "3")
+            professor_db.add_new_professor("new@mycsu.edu", "New Professor", "Junior", ["DATA999"])
+            student_db.add_new_student("new@mycsu.edu", "New", "Student", [("DATA999", "A", "90"), ("DATA236", "B", "80")])
+        assert catalog.course("DATA999")["Course_name"] == "Catalog"
+        assert [professor_id for professor_id, _ in catalog.professors_for_course("DATA999")] == ["new@mycsu.edu"]
+        assert catalog.students_in_course("DATA999") == ["new@mycsu.edu"]
+        assert "new@mycsu.edu" in catalog.students_in_course("DATA236")
+        assert catalog.courses_for_professor("new@mycsu.edu") == ["DATA999"]
+
+        teacher = catalog.professors_for_course("DATA236")[0][0]
+        with redirect_stdout(io.StringIO()):
+            professor_db.modify_professor_details(teacher, new_courses=["DATA999"])
+            professor_db.delete_professor("new@mycsu.edu")
+            student_db.delete_student("new@mycsu.edu")
+            student_db.delete_student("student1@mycsu.edu")
+        assert [professor_id for professor_id, _ in catalog.professors_for_course("DATA999")] == [teacher]
+        assert teacher not in dict(catalog.professors_for_course("DATA236"))
+        assert catalog.courses_for_professor("new@mycsu.edu") == []
+        assert catalog.students_in_course("DATA999") == []
+        assert "student1@mycsu.edu" not in catalog.students_in_course("DATA236")
+
+        with redirect_stdout(io.StringIO()):
+            student_db.save_data()
+            professor_db.save_data()
+            course_db.remove_course("DATA200")
+        assert catalog.course("DATA200") is None
+        rebuilt = Catalog(Student(student_csv), Professor(professor_csv), CourseDB(course_csv))
+        for course_id in set(catalog.course_students) | set(catalog.course_professors) | set(rebuilt.course_students) | {"DATA200", "DATA999"}:
+            assert lookups(catalog, course_id) == lookups(rebuilt, course_id), course_id
+    print("Catalog lookup check passed.")
+
+def test_dashboard_views():
+    with table_copies("Student.csv", "course.csv", "professor.csv") as temp_dir:
+        student_db = Student(os.path.join(temp_dir, "Student.csv"))
+        professor_db = Professor(os.path.join(temp_dir, "professor.csv"))
+        course_db = CourseDB(os.path.join(temp_dir, "course.csv"))
+
+        print("Checking dashboard views...")
+        dashboard = Dashboard(student_db, professor_db, course_db)
+        before = dashboard.roster.course("DATA236")
+        assert before["enrolled"] == sum(1 for records in student_db.students.values()
+                                         for record in records if record["course_id"] == "DATA236")
+        with redirect_stdout(io.StringIO()):
+            student_db.add_new_student("view@mycsu.edu", "View", "Student", [("DATA236", "A", "100")])
+            course_db.add_course("DATA999", "Views", "Dashboard course", "3")
+            professor_db.add_new_professor("view.prof@mycsu.edu", "View Prof", "Lecturer", ["DATA236", "DATA999"])
+            dashboard.show()
+        after = dashboard.roster.course("DATA236")
+        assert after["enrolled"] == before["enrolled"] + 1
+        assert after["grades"].get("A", 0) == before["grades"].get("A", 0) + 1
+        assert dashboard.roster.course("DATA999")["course_name"] == "Views"
+        load = dashboard.teaching.professor("view.prof@mycsu.edu")
+        assert load["courses"] == ["DATA236", "DATA999"] and load["enrolled"] == after["enrolled"]
+        assert abs(load["mean_marks"] - after["mean_marks"]) < 1e-9
+
+        with redirect_stdout(io.StringIO()):
+            student_db.update_student_record("view@mycsu.edu", "DATA236", "C", "10")
+            student_db.delete_student("view@mycsu.edu")
+            professor_db.delete_professor("view.prof@mycsu.edu")
+            course_db.remove_course("DATA999")
+        assert dashboard.roster.course("DATA236") == before
+        assert dashboard.teaching.professor("view.prof@mycsu.edu")["courses"] == []
+        assert dashboard.roster.course("DATA999")["course_name"] is None
+
+        # Grades rewritten in bulk must reach the live views and the search index like any other change
+        student_db.ensure_search_index()
+        with redirect_stdout(io.StringIO()):
+            student_db.recompute_all_grades(apply=True)
+        assert dashboard.course_summary() == Dashboard(student_db, professor_db, course_db).course_summary()
+        grade_a = {email for email, records in student_db.students.items()
+                   for record in records if record["course_id"] == "DATA236" and record["grade"] == "A"}
+        assert student_db.search(course_id="DATA236", grade="A", limit=1000)[0] == len(grade_a)
+    print("Dashboard view check passed.")
+
+def test_normalized_layout():
+    print("Checking the normalized layout...")
+    with table_copies("Student.csv", "professor.csv") as temp_dir:
+        student_csv, professor_csv = (os.path.join(temp_dir, name) for name in ("Student.csv", "professor.csv"))
+        enrollments_csv, names_csv = os.path.join(temp_dir, "enrollments.csv"), os.path.join(temp_dir, "students.csv")
+        teaching_csv, professors_csv = os.path.join(temp_dir, "teaching.csv"), os.path.join(temp_dir, "professors.csv")
+
+        convert_students(student_csv, enrollments_csv, target_names=names_csv)
+        convert_professors(professor_csv, teaching_csv, target_names=professors_csv)
+        assert os.path.getsize(enrollments_csv) + os.path.getsize(names_csv) < os.path.getsize(student_csv)
+        flat_db = Student(student_csv)
+        for options in ({}, {"columnar": True}, {"lazy": True}):
+            student_db = Student(enrollments_csv, names_file=names_csv, **options)
+            assert dict(student_db.students.items()) == dict(flat_db.students.items())
+        assert dict(Professor(teaching_csv, names_file=professors_csv).professors) == dict(Professor(professor_csv).professors)
+
+        professor_db = Professor(teaching_csv, names_file=professors_csv)
+        with open(teaching_csv, "rb") as file:
+            teaching_before = file.read()
+        with open(professors_csv, encoding='utf-8-sig') as file:
+            names_before = file.read().splitlines()
+        with redirect_stdout(io.StringIO()):
+            professor_db.modify_professor_details("proof1@mycsu.edu", new_name="Renamed")
+        professor_db.save_data()
+        with open(teaching_csv, "rb") as file:
+            assert file.read() == teaching_before, "A rename leaves the teaching assignments alone"
+        with open(professors_csv, encoding='utf-8-sig') as file:
+            names_after = file.read().splitlines()
+        assert sum(before != after for before, after in zip(names_before, names_after)) == 1
+
+        with redirect_stdout(io.StringIO()):
+            student_db = Student(enrollments_csv, names_file=names_csv)
+            student_db.update_student_record("student1@mycsu.edu", "DATA236", "A", "99")
+            student_db.save_data()
+        flat_copy = os.path.join(temp_dir, "flat.csv")
+        convert_students(enrollments_csv, flat_copy, source_names=names_csv)
+        assert dict(Student(flat_copy).students) == dict(student_db.students)
+
+    # normalize retires the flat files, so every command reads the same copy of each table
+    with table_copies("Student.csv", "professor.csv", "course.csv", "login.csv") as temp_dir:
+        with redirect_stdout(io.StringIO()):
+            flat_problems = sorted(check_tables(temp_dir))
+            normalize_tables(temp_dir)
+        assert not os.path.exists(os.path.join(temp_dir, "Student.csv")) and not os.path.exists(os.path.join(temp_dir, "professor.csv"))
+        assert table_layout("Student.csv", temp_dir) == (os.path.join(temp_dir, "enrollments.csv"), os.path.join(temp_dir, "students.csv"))
+        with redirect_stdout(io.StringIO()):
+            assert sorted(check_tables(temp_dir)) == flat_problems
+            db_path = os.path.join(temp_dir, "checkmygrade.db")
+            migrate_to_sqlite(db_path, temp_dir)
+        backend = SqliteBackend(db_path)
+        assert dict(Student("Student.csv", backend=backend).students) == dict(flat_db.students)
+        backend.close()
+        working_dir = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            tables = SessionTables()
+            assert os.path.basename(tables.student_db.csv_file) == "enrollments.csv"
+            assert os.path.basename(tables.professor_db.csv_file) == "teaching.csv"
+        finally:
+            os.chdir(working_dir)
+        with redirect_stdout(io.StringIO()):
+            normalize_tables(temp_dir, flatten=True)
+        assert table_layout("Student.csv", temp_dir) == (os.path.join(temp_dir, "Student.csv"), None)
+        assert not os.path.exists(os.path.join(temp_dir, "teaching.csv"))
+        assert dict(Student(os.path.join(temp_dir, "Student.csv")).students) == dict(flat_db.students)
+    print("Normalized layout check passed.")
+
+def test_compressed_tables():
+    print("Checking compressed tables...")
+    with table_copies("Student.csv", "professor.csv", "course.csv", "login.csv") as temp_dir:
+        flat_db = Student(os.path.join(temp_dir, "Student.csv"))
+        flat_professors = dict(Professor(os.path.join(temp_dir, "professor.csv")).professors)
+        flat_courses = CourseDB(os.path.join(temp_dir, "course.csv")).load_courses()
+        flat_users = LoginSystem(os.path.join(temp_dir, "login.csv")).users
+        with redirect_stdout(io.StringIO()):
+            for compression in ("gz", "bz2", "xz"):
+                compress_tables(temp_dir, compression)
+        for compression in ("gz", "bz2", "xz"):
+            student_csv = os.path.join(temp_dir, "Student.csv." + compression)
+            assert os.path.getsize(student_csv) < os.path.getsize(os.path.join(temp_dir, "Student.csv"))
+            for options in ({}, {"columnar": True}, {"lazy": True}):
+                student_db = Student(student_csv, **options)
+                assert dict(student_db.students.items()) == dict(flat_db.students.items())
+            assert student_db.students["student1@mycsu.edu"] == flat_db.students["student1@mycsu.edu"]
+            assert list(student_db.iter_records("DATA236")) == list(flat_db.iter_records("DATA236"))
+            assert dict(Professor(os.path.join(temp_dir, "professor.csv." + compression)).professors) == flat_professors
+            assert CourseDB(os.path.join(temp_dir, "course.csv." + compression)).load_courses() == flat_courses
+            assert LoginSystem(os.path.join(temp_dir, "login.csv." + compression)).users == flat_users
+
+        # Single-student reads of a compressed table decompress it once, and again only after it changed
+        lazy_db = Student(os.path.join(temp_dir, "Student.csv.bz2"), lazy=True)
+        reads = []
+        read_rows = lazy_db.backend._read_rows
+        lazy_db.backend._read_rows = lambda table: reads.append(table) or read_rows(table)
+        for email in ("student1@mycsu.edu", "student2@mycsu.edu", "student1@mycsu.edu"):
+            assert lazy_db.read_student(email) == flat_db.students[email]
+        assert len(reads) == 1, "Reads after the first are served from memory"
+        with redirect_stdout(io.StringIO()):
+            writer_db = Student(os.path.join(temp_dir, "Student.csv.bz2"))
+            writer_db.update_student_record("student2@mycsu.edu", writer_db.students["student2@mycsu.edu"][0]["course_id"], "F", "1")
+            writer_db.save_data()
+        assert lazy_db.read_student("student2@mycsu.edu") == writer_db.students["student2@mycsu.edu"]
+        assert len(reads) == 2
+
+        student_db = Student(os.path.join(temp_dir, "Student.csv.gz"))
+        with redirect_stdout(io.StringIO()):
+            student_db.update_student_record("student1@mycsu.edu", "DATA236", "A", "99")
+            student_db.save_data()
+            compress_tables(temp_dir, "gz", decompress=True)
+        assert dict(Student(os.path.join(temp_dir, "Student.csv")).students) == dict(student_db.students)
+
+        working_dir = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            assert dict(SessionTables(compression="gz").student_db.students) == dict(student_db.students)
+        finally:
+            os.chdir(working_dir)
+
+        with redirect_stdout(io.StringIO()):
+            normalize_tables(temp_dir)
+            compress_tables(temp_dir, "xz")
+        enrollments_xz, names_xz = (os.path.join(temp_dir, name + ".xz") for name in ("enrollments.csv", "students.csv"))
+        assert dict(Student(enrollments_xz, names_file=names_xz).students) == dict(student_db.students)
+        teaching_xz, professors_xz = (os.path.join(temp_dir, name + ".xz") for name in ("teaching.csv", "professors.csv"))
+        assert dict(Professor(teaching_xz, names_file=professors_xz).professors) == flat_professors
+    print("Compressed tables check passed.")
+
+def test_referential_integrity():
+    print("Checking referential integrity...")
+    with table_copies("Student.csv", "professor.csv", "course.csv") as temp_dir:
+        student_csv, professor_csv, course_csv = (os.path.join(temp_dir, name) for name in ("Student.csv", "professor.csv", "course.csv"))
+        student_db, professor_db, course_db = Student(student_csv), Professor(professor_csv), CourseDB(course_csv)
+        course_ids = {course["Course_id"] for course in course_db.load_courses()}
+        expected = sorted(("professors", professor_id, record["course_id"]) for professor_id, records in professor_db.professors.items()
+                          for record in records if record["course_id"] not in course_ids)
+        with redirect_stdout(io.StringIO()):
+            assert sorted(check_tables(temp_dir)) == expected
+        checker = IntegrityChecker(student_db, professor_db, course_db)
+        assert sorted(checker.check()) == expected
+
+        with redirect_stdout(io.StringIO()) as output:
+            student_db.add_new_student("orphan@mycsu.edu", "Orphan", "Student", [("NOPE100", "A", "90")])
+        assert "NOPE100" in output.getvalue() and "orphan@mycsu.edu" in student_db.students
+        assert ("students", "orphan@mycsu.edu", "NOPE100") in checker.check()
+
+        checker.block = True
+        with redirect_stdout(io.StringIO()):
+            student_db.add_new_student("blocked@mycsu.edu", "Blocked", "Student", [("NOPE100", "A", "90")])
+            professor_db.add_new_professor("blocked@mycsu.edu", "Blocked", "Professor", ["NOPE100"])
+            course_db.remove_course("DATA236")
+        assert "blocked@mycsu.edu" not in student_db.students and "blocked@mycsu.edu" not in professor_db.professors
+        assert course_db.get_course("DATA236") is not None, "A course with enrollments cannot be deleted"
+        try:
+            with redirect_stdout(io.StringIO()):
+                student_db.bulk_upsert([("blocked@mycsu.edu", "Blocked", "Student", "NOPE100", "A", "90")])
+            assert False, "Rows referencing a missing course should be refused"
+        except ValueError:
+            pass
+
+        checker.block = False
+        with redirect_stdout(io.StringIO()):
+            course_db.remove_course("DATA236")
+        assert len(checker.check()) == len(expected) + 1 + checker.references["students"]["DATA236"] + checker.references["professors"]["DATA236"]
+    print("Referential integrity check passed.")
+
+def test_sqlite_backend():
+    print("Checking the SQLite backend...")
+    with table_copies("Student.csv", "professor.csv", "course.csv", "login.csv") as temp_dir:
+        student_csv, professor_csv, course_csv, login_csv = (os.path.join(temp_dir, name) for name in
+                                                             ("Student.csv", "professor.csv", "course.csv", "login.csv"))
+        db_path = os.path.join(temp_dir, "checkmygrade.db")
+        csv_db, professor_csv_db, course_csv_db = Student(student_csv), Professor(professor_csv), CourseDB(course_csv)
+        with redirect_stdout(io.StringIO()) as output:
+            migrate_to_sqlite(db_path, temp_dir)
+        enrollments = sum(len(records) for records in csv_db.students.values())
+        assert f"{enrollments} students rows" in output.getvalue()
+        assert f"{len(course_csv_db.load_courses())} courses rows" in output.getvalue()
+
+        backend = SqliteBackend(db_path)
+        try:
+            # CSV to SQLite round trip: the tables read back from the database match the CSV files
+            student_db = Student(student_csv, backend=backend)
+            assert dict(student_db.students) == dict(csv_db.students)
+            assert dict(Professor(professor_csv, backend=backend).professors) == dict(professor_csv_db.professors)
+            assert CourseDB(course_csv, backend=backend).load_courses() == course_csv_db.load_courses()
+            assert LoginSystem(login_csv, backend=backend).users == LoginSystem(login_csv).users
+
+            # Both backends answer the same calls with the same rows
+            csv_backend = csv_db.backend
+            rows = backend.rows("students", key="student1@mycsu.edu")
+            assert rows == list(csv_backend.rows("students", key="student1@mycsu.edu"))
+            assert [row[3] for row in rows] == [record["course_id"] for record in csv_db.students["student1@mycsu.edu"]]
+            assert backend.rows("students", course_id="DATA236") == list(csv_backend.rows("students", course_id="DATA236"))
+            assert backend.records("professors") == professor_csv_db.backend.records("professors")
+            assert {course: stats.sorted_marks for course, stats in student_db.course_stats.items()} == \
+                   {course: stats.sorted_marks for course, stats in csv_db.course_stats.items()}
+
+            backend.apply("students", [("put", "new@mycsu.edu", [{"first_name": "New", "last_name": "Student", "course_id": "DATA200",
+                                                                  "grade": "A", "marks": 95}]),
+                                       ("delete", "student2@mycsu.edu", None)])
+            assert backend.rows("students", key="new@mycsu.edu") == [("new@mycsu.edu", "New", "Student", "DATA200", "A", 95)]
+            assert backend.rows("students", key="student2@mycsu.edu") == []
+
+            course_db = CourseDB(course_csv, backend=backend)
+            with redirect_stdout(io.StringIO()):
+                course_db.add_course("DATA999", "SQLite", "Stored in SQLite", "3")
+                course_db.update_course_details("DATA999", "Renamed", None, None)
+            assert {"Course_id": "DATA999", "Course_name": "Renamed", "Description": "Stored in SQLite",
+                    "Credits": "3"} in backend.course_rows()
+            with redirect_stdout(io.StringIO()):
+                course_db.remove_course("DATA999")
+            assert all(course["Course_id"] != "DATA999" for course in backend.course_rows())
+
+            # Changes made through a table are in the database for the next reader
+            with redirect_stdout(io.StringIO()):
+                student_db.update_student_record("student3@mycsu.edu", "DATA350", "B", "70")
+            reloaded = Student(student_csv, backend=backend).students["student3@mycsu.edu"]
+            assert any(record["course_id"] == "DATA350" and record["marks"] == 70 for record in reloaded)
+        finally:
+            backend.close()
+    print("SQLite backend check passed.")
+
+def test_parallel_load():
+    print("Checking parallel student load...")
+    original_min_bytes = Student.parallel_min_bytes
+    Student.parallel_min_bytes = 0  # The shipped file is far below the real threshold
+    try:
+        with table_copies("Student.csv") as temp_dir:
+            csv_file = os.path.join(temp_dir, "Student.csv")
+            serial_db = Student(csv_file)
+            parallel_db = Student(csv_file, workers=2)
+            parallel_columnar_db = Student(csv_file, columnar=True, workers=2)
+    finally:
+        Student.parallel_min_bytes = original_min_bytes
+    assert list(parallel_db.students) == list(serial_db.students)
+    assert dict(parallel_db.students) == dict(serial_db.students)
+    assert dict(parallel_columnar_db.students) == dict(serial_db.students)
+    print(f"Parallel load matches for {len(parallel_db.students)} students.")
+
+def test_snapshot_cache():
+    with table_copies("Student.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+
+        print("Checking startup snapshot...")
+        parsed_db = Student(csv_file, snapshot=True)
+        assert os.path.exists(csv_file + ".snapshot")
+        assert dict(Student(csv_file, snapshot=True).students) == dict(parsed_db.students)
+
+        parsed_db.update_student_record("student1@mycsu.edu", "DATA236", "C", "40")
+        assert dict(Student(csv_file, snapshot=True).students) == dict(parsed_db.students), "Journal change must invalidate the snapshot"
+    print("Startup snapshot check passed.")
+
+def test_concurrent_writers():
+    with table_copies("Student.csv", "professor.csv", "course.csv", "login.csv") as temp_dir:
+        csv_file = os.path.join(temp_dir, "Student.csv")
+
+        print("Checking concurrent writers...")
+        # Reads take the shared lock only if a writer made the lock file, so a read-only directory still loads
+        def load_tables():
+            with redirect_stdout(io.StringIO()):
+                return (Student(csv_file), Professor(os.path.join(temp_dir, "professor.csv")),
+                        LoginSystem(os.path.join(temp_dir, "login.csv")), Student(os.path.join(temp_dir, "missing.csv"), lazy=True))
+        load_tables()
+        assert not [name for name in os.listdir(temp_dir) if name.endswith(".lock")], "Reads must not create lock files"
+        real_open = os.open
+        def read_only_open(path, flags, *args):
+            if path.endswith(".lock"):
+                raise PermissionError(13, "Permission denied", path)
+            return real_open(path, flags, *args)
+        with mock.patch("os.open", read_only_open):
+            student_db, professor_db, login_db, _ = load_tables()
+        assert "student1@mycsu.edu" in student_db.students and professor_db.professors and login_db.users
+
+        first_db = Student(csv_file)
+        second_db = Student(csv_file)  # Loaded before the first one writes, like a second grading script
+        first_db.update_student_record("student1@mycsu.edu", "DATA236", "A", "95")
+        second_db.update_student_record("student1@mycsu.edu", "DATA228", "F", "12")
+        second_db.save_data()
+        marks = {record["course_id"]: record["marks"] for record in Student(csv_file).students["student1@mycsu.edu"]}
+        assert marks["DATA236"] == 95 and marks["DATA228"] == 12, "Neither writer may lose the other's update"
+
+        first_course_db = CourseDB(os.path.join(temp_dir, "course.csv"))
+        second_course_db = CourseDB(os.path.join(temp_dir, "course.csv"))
+        first_course_db.load_courses()
+        second_course_db.load_courses()
+        first_course_db.add_course("DATA900", "First", "Added by the first writer", "3")
+        second_course_db.add_course("DATA901", "Second", "Added by the second writer", "3")
+        course_ids = {course["Course_id"] for course in CourseDB(os.path.join(temp_dir, "course.csv")).load_courses()}
+        assert {"DATA900", "DATA901"} <= course_ids
+
+        first_login_db = LoginSystem(os.path.join(temp_dir, "login.csv"))
+        second_login_db = LoginSystem(os.path.join(temp_dir, "login.csv"))
+        first_login_db.add_user("first@mycsu.edu", "one", "student")
+        second_login_db.add_user("second@mycsu.edu", "two", "student")
+        users = LoginSystem(os.path.join(temp_dir, "login.csv")).users
+        assert "first@mycsu.edu" in users and "second@mycsu.edu" in users
+    print("Concurrent writer check passed.")
+
+def test_password_hashing_and_sessions():
+    with table_copies("login.csv") as temp_dir:
+        login_csv = os.path.join(temp_dir, "login.csv")
+
+        print("Checking password hashing and sessions...")
+        login_db = LoginSystem(login_csv, session_ttl=60, max_sessions=2)
+        assert login_db.login("student1@mycsu.edu", "wrong") is None
+        token = login_db.start_session("student1@mycsu.edu", "student1")
+        assert login_db.session(token) == ("student1@mycsu.edu", "student")
+        stored = LoginSystem(login_csv).users["student1@mycsu.edu"]["password"]
+        assert stored.startswith(login_db.password_scheme + "$"), "A plaintext password is hashed after login"
+        assert LoginSystem(login_csv).login("student1@mycsu.edu", "student1") == "student"
+
+        with redirect_stdout(io.StringIO()):
+            login_db.change_password("student1@mycsu.edu", "new secret")
+        assert login_db.session(token) is None, "Changing the password ends the user's sessions"
+        assert LoginSystem(login_csv).login("student1@mycsu.edu", "new secret") == "student"
+        with open(login_csv, encoding='utf-8-sig') as file:
+            assert "new secret" not in file.read()
+
+        tokens = [login_db.start_session(f"student{number}@mycsu.edu", f"student{number}") for number in (2, 3, 4)]
+        assert login_db.session(tokens[0]) is None, "The least recently used session is evicted"
+        assert login_db.session(tokens[2]) == ("student4@mycsu.edu", "student")
+        login_db.sessions.ttl = -1  # Every new session is already past its expiry
+        assert login_db.session(login_db.sessions.create("student5@mycsu.edu", "student")) is None, "Expired sessions are refused"
+
+        # A damaged stored hash refuses the login instead of raising
+        for damaged in ("scrypt$abc", "scrypt$16384$not-hex$00", "scrypt$3$00$00", "pbkdf2_sha256$many$00$00", "scrypt$1$2$3$4"):
+            assert verify_password("student6", damaged) is False
+            login_db.users["student6@mycsu.edu"] = {"password": damaged, "role": "student"}
+            assert login_db.login("student6@mycsu.edu", "student6") is None
+    print("Password hashing and session check passed.")
+
+def test_transcript_reports():
+    print("Checking bulk transcript reports...")
+    with table_copies("Student.csv") as temp_dir:
+        student_db = Student(os.path.join(temp_dir, "Student.csv"))
+        jsonl_file = os.path.join(temp_dir, "transcripts.jsonl")
+        assert write_transcripts(student_db, jsonl_file) == len(student_db.students)
+        with open(jsonl_file, encoding='utf-8') as file:
+            reports = [json.loads(line) for line in file]
+        for report in reports[:20]:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                student_db.check_my_grade(report["email"])
+            assert f"Overall Student Grade: {report['overall_grade']}" in output.getvalue()
+            for course in report["courses"]:
+                assert f"Course ID: {course['course_id']}, Marks: {course['marks']}, Assigned Grade: {course['assigned_grade']}" in output.getvalue()
+
+        serial_file = os.path.join(temp_dir, "serial.csv")
+        parallel_file = os.path.join(temp_dir, "parallel.csv")
+        write_transcripts(student_db, serial_file, course_id="DATA236", chunk_size=10)
+        write_transcripts(student_db, parallel_file, course_id="DATA236", workers=2, chunk_size=10)
+        with open(serial_file, newline='') as serial, open(parallel_file, newline='') as parallel:
+            assert serial.read() == parallel.read()
+        with open(serial_file, newline='') as file:
+            rows = list(csv.DictReader(file))
+        enrolled = {email for email, records in student_db.students.items()
+                    if any(record["course_id"] == "DATA236" for record in records)}
+        assert {row["Email_address"] for row in rows} == enrolled
+    print(f"Transcript report check passed for {len(reports)} students.")
+
+def start_service(tables, timeout=30):
+    """Serves tables on a free port from a background thread; returns the address and a function stopping the server."""
+    service = GradeService(tables)
+    stdout = sys.stdout  # serve() swaps in a ThreadOutput
+    addresses = []
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(service.serve(port=0, ready=lambda address: (addresses.append(address), ready.set())))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except BaseException:
+            pass  # Cancelled by stop, or failed to start; a failure is raised below
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    def stop():
+        if not task.done():
+            loop.call_soon_threadsafe(task.cancel)
+        thread.join(timeout)
+        service.executor.shutdown()
+        sys.stdout = stdout
+
+    if not ready.wait(timeout):
+        stop()
+        raise AssertionError(f"The service did not start: {task.exception() if task.done() and not task.cancelled() else 'timed out'}")
+    return f"127.0.0.1:{addresses[0][1]}", stop
+
+def test_service():
+    print("Checking the multi-client service...")
+    with table_copies("Student.csv", "course.csv", "professor.csv", "login.csv") as temp_dir:
+        working_dir = os.getcwd()
+        os.chdir(temp_dir)
+        tables = SessionTables()
+        stop = None
+        try:
+            address, stop = start_service(tables)
+            student = ServiceClient(address)
+            assert student.call("student.check_my_grade", "student1@mycsu.edu") is None, "Login is required"
+            assert student.call("login.login", "student1@mycsu.edu", "student1") == "student"
+            assert student.call("student.delete_student", "student2@mycsu.edu") is None, "Students cannot write"
+
+            professor = ServiceClient(address)
+            assert professor.call("login.login", "proof1@mycsu.edu", "proof1") == "professor"
+            professor.call("student.update_student_record", "student1@mycsu.edu", "DATA236", "C", "40")
+            assert ["student1@mycsu.edu", 40] in student.call("student.students_in_marks_range", "DATA236", 40, 40)
+            assert Student("Student.csv").students["student1@mycsu.edu"][0]["marks"] == 40
+            assert OPERATIONS["login.login"][2] == OPERATIONS["login.start_session"][2] == WRITE
+            saved_users = LoginSystem("login.csv").users
+            assert saved_users["proof1@mycsu.edu"]["password"].startswith("scrypt$"), "Logins go through the write queue and save the upgraded hash"
+            assert saved_users["student1@mycsu.edu"]["password"].startswith("scrypt$")
+
+            assert professor.call("integrity.check") is not None
+            with redirect_stdout(io.StringIO()) as output:
+                assert professor.call("professor.show_course_details_by_professor") is None
+            assert "IndexError" in output.getvalue()
+            assert professor.call("course.get_course", "DATA200") is not None, "A failed request must not drop the connection"
+            assert tables.student_db.integrity is None, "A read must not start vetting writes"
+            student.close()
+            professor.close()
+        finally:
+            if stop is not None:
+                stop()
+            os.chdir(working_dir)
+    print("Multi-client service check passed.")
+
+def test_service_sqlite():
+    print("Checking the service on SQLite...")
+    with table_copies("Student.csv", "course.csv", "professor.csv", "login.csv") as temp_dir:
+        db_path = os.path.join(temp_dir, "checkmygrade.db")
+        with redirect_stdout(io.StringIO()):
+            migrate_to_sqlite(db_path, temp_dir)
+        working_dir = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            address, stop = start_service(SessionTables(db_path))
+            try:
+                professor = ServiceClient(address)
+                assert professor.call("login.login", "proof1@mycsu.edu", "proof1") == "professor"
+                with redirect_stdout(io.StringIO()):
+                    professor.call("student.update_student_record", "student1@mycsu.edu", "DATA236", "C", "40")
+                    professor.call("course.add_course", "DATA999", "SQLite", "Served from SQLite", "3")
+                assert ["student1@mycsu.edu", 40] in professor.call("student.students_in_marks_range", "DATA236", 40, 40)
+                professor.close()
+            finally:
+                stop()
+            backend = SqliteBackend(db_path)
+            assert ("student1@mycsu.edu", "FirstName1", "LastName1", "DATA236", "C", 40) in backend.rows("students", key="student1@mycsu.edu")
+            assert any(course["Course_id"] == "DATA999" for course in backend.course_rows())
+            backend.close()
+        finally:
+            os.chdir(working_dir)
+    print("SQLite service check passed.")
+
+def test_metrics():
+    print("Checking operation metrics...")
+    metrics.reset()
+    metrics.enable()
+    with table_copies("Student.csv") as temp_dir:
+        student_db = Student(os.path.join(temp_dir, "Student.csv"))
+        student_db.check_my_marks("student1@mycsu.edu")
+        student_db.check_my_marks("student2@mycsu.edu")
+    metrics.disable()
+    snapshot = metrics.snapshot()
+    assert snapshot["operations"]["student.load"]["count"] == 1
+    assert snapshot["operations"]["student.check_my_marks"]["count"] == 2
+    assert 'checkmygrade_operation_seconds_count{operation="student.check_my_marks"} 2' in metrics.to_prometheus()
+
+    # Threads recording at once lose no counts, and each thread profiles its own outermost operation
+    metrics.reset()
+    metrics.enable(profile=["test.outer"])
+    inside = threading.Barrier(8)
+
+    def profiled_call():
+        pass
+
+    def record():
+        for _ in range(2000):
+            metrics.increment("test.events")
+            with metrics.timer("test.step"):
+                pass
+        with metrics.timer("test.outer"):
+            inside.wait()  # Every thread is in its profiled operation at once
+            with metrics.timer("test.outer"):
+                profiled_call()
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.disable()
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["test.events"] == 16000
+    assert snapshot["operations"]["test.step"]["count"] == 16000
+    assert snapshot["operations"]["test.outer"]["count"] == 16
+    calls = [stat[1] for (_, _, function), stat in metrics.profiles["test.outer"].stats.items() if function == "profiled_call"]
+    assert calls == [8], "Each thread profiles its own operation"
+    metrics.enable(profile=())
+    metrics.disable()
+    metrics.reset()
+    print("Operation metrics check passed.")
+
 def test_student_operations():
     student_db = Student("student.csv")
     print("Adding a new student...")
@@ -80,6 +973,29 @@ def test_professor_operations():
 if __name__ == "__main__":
     print("Running tests...")
     test_student_records()
+    test_course_stats_index()
+    test_change_journal()
+    test_batch_rollback()
+    test_columnar_store()
+    test_offset_index()
+    test_grade_analytics()
+    test_rank_indexes()
+    test_student_search()
+    test_course_cache()
+    test_catalog_lookups()
+    test_dashboard_views()
+    test_normalized_layout()
+    test_compressed_tables()
+    test_referential_integrity()
+    test_sqlite_backend()
+    test_parallel_load()
+    test_snapshot_cache()
+    test_concurrent_writers()
+    test_password_hashing_and_sessions()
+    test_transcript_reports()
+    test_service()
+    test_service_sqlite()
+    test_metrics()
     test_student_operations()
     test_course_operations()
     test_professor_operations()
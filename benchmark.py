@@ -0,0 +1,261 @@
+"""Non-interactive benchmarks for the Check My Grade App at several dataset sizes.
+
+Example:
+    python benchmark.py --sizes 1k 100k --output bench.json
+
+Every size gets a freshly generated dataset in a temp directory. Each operation is timed
+per call and reported as throughput and latency percentiles, plus peak traced memory for
+loading, as JSON so runs can be compared across changes. --compression adds the file size
+and CPU time of loading and saving Student.csv plain and compressed with gzip, bzip2 and xz.
+"""
+
+import argparse
+import builtins
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+
+from generate_data import generate, parse_size
+from lab1complete import (COMPRESSION, NORMALIZED_FILES, CourseDB, Dashboard, IntegrityChecker, LoginSystem, Professor,
+                          Student, check_tables, convert_professors, convert_students)
+from reports import write_transcripts
+
+SIZES = ("1k", "100k", "1m", "10m")
+
+
+@contextmanager
+def scripted_input(answers):
+    """Feeds answers to input() so the interactive CourseDB methods can run unattended."""
+    answers = iter(answers)
+    original_input = builtins.input
+    builtins.input = lambda prompt='': next(answers)
+    try:
+        yield
+    finally:
+        builtins.input = original_input
+
+
+def summarize(samples_ns):
+    """Turns per-call durations into throughput and latency percentiles."""
+    samples = sorted(samples_ns)
+    total = sum(samples)
+
+    def percentile(q):
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))] / 1e6
+
+    return {
+        "calls": len(samples),
+        "total_seconds": total / 1e9,
+        "ops_per_second": len(samples) / (total / 1e9) if total else None,
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": samples[-1] / 1e6,
+    }
+
+
+def timed(func, calls):
+    """Runs func once per argument tuple and returns the durations in nanoseconds."""
+    samples = []
+    for args in calls:
+        start = time.perf_counter_ns()
+        func(*args)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def peak_memory(func):
+    """Returns the result of func and the peak memory traced while it ran."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def cpu_seconds(func, calls):
+    """Runs func calls times and returns the CPU seconds of each run."""
+    samples = []
+    for _ in range(calls):
+        start = time.process_time()
+        func()
+        samples.append(time.process_time() - start)
+    return samples
+
+
+def compression_tradeoff(student_csv, student_options):
+    """Compares Student.csv plain and compressed: file size, and wall and CPU time to load and save."""
+    results = {}
+    for extension in [""] + list(COMPRESSION):
+        path = student_csv + extension
+        if extension:
+            convert_students(student_csv, path)
+        student_db = Student(path, **student_options)
+        results[extension.lstrip(".") or "plain"] = {
+            "bytes": os.path.getsize(path),
+            "load": summarize(timed(lambda: Student(path, **student_options), [()] * 3)),
+            "load_cpu_seconds": min(cpu_seconds(lambda: Student(path, **student_options), 3)),
+            "save": summarize(timed(student_db.save_data, [()] * 3)),
+            "save_cpu_seconds": min(cpu_seconds(student_db.save_data, 3)),
+        }
+    return results
+
+
+def run_size(label, enrollments, repeat, seed, student_options, compression=False):
+    """Benchmarks every operation on one generated dataset."""
+    directory = tempfile.mkdtemp(prefix=f"checkmygrade-{label}-")
+    rng = random.Random(seed)
+    operations = {}
+    memory = {}
+    try:
+        generate_start = time.perf_counter()
+        dataset = generate(directory, enrollments, seed=seed)
+        student_total = dataset["students"]
+        generate_seconds = time.perf_counter() - generate_start
+        student_csv = os.path.join(directory, 'Student.csv')
+
+        def path(name):
+            return os.path.join(directory, name)
+
+        operations["student_load"] = summarize(timed(lambda: Student(student_csv, **student_options), [()] * 3))
+        enrollments_csv, names_csv = (path(name) for name in NORMALIZED_FILES["Student.csv"])
+        teaching_csv, professors_csv = (path(name) for name in NORMALIZED_FILES["professor.csv"])
+        convert_students(student_csv, enrollments_csv, target_names=names_csv)  # Keeps the flat files for the runs below
+        convert_professors(path('professor.csv'), teaching_csv, target_names=professors_csv)
+        operations["student_load_normalized"] = summarize(timed(
+            lambda: Student(enrollments_csv, names_file=names_csv, **student_options), [()] * 3))
+        file_bytes = {name: os.path.getsize(path(name)) for name in ["Student.csv", "professor.csv"] +
+                      [name for files in NORMALIZED_FILES.values() for name in files]}
+        student_db, memory["student_load"] = peak_memory(lambda: Student(student_csv, **student_options))
+        emails = [f"student{rng.randint(1, student_total)}@mycsu.edu" for _ in range(repeat)]
+        course_ids = dataset["course_ids"]
+
+        operations["display_records"] = summarize(timed(student_db.display_records, [(email,) for email in emails]))
+        operations["check_my_marks"] = summarize(timed(student_db.check_my_marks, [(email,) for email in emails]))
+        operations["check_my_grade"] = summarize(timed(student_db.check_my_grade, [(email,) for email in emails]))
+        operations["build_ranking"] = summarize(timed(student_db.build_ranking, [()]))
+        operations["top_n"] = summarize(timed(student_db.top_n, [(rng.choice(course_ids), 10) for _ in range(repeat)]))
+        operations["rank_of"] = summarize(timed(student_db.rank_of, [(email,) for email in emails]))
+        operations["percentile_of"] = summarize(timed(student_db.percentile_of, [(email,) for email in emails]))
+        operations["students_in_marks_range"] = summarize(timed(student_db.students_in_marks_range,
+                                                                [(rng.choice(course_ids), 90, 100) for _ in range(repeat)]))
+        operations["build_search_index"] = summarize(timed(student_db.build_search_index, [()]))
+        operations["search"] = summarize(timed(student_db.search, [(f"FirstName{rng.randint(1, 99)}", rng.choice(course_ids), None, 0, 59)
+                                                                    for _ in range(repeat)]))
+
+        new_students = [(f"bench{number}@mycsu.edu", "Bench", f"Student{number}",
+                         [(course_id, "A", str(rng.randint(0, 100))) for course_id in rng.sample(course_ids, 4)])
+                        for number in range(repeat)]
+        operations["add_new_student"] = summarize(timed(student_db.add_new_student, new_students))
+        updates = [(email, student_db.students[email][0]["course_id"], "B", str(rng.randint(0, 100)))
+                   for email in emails if email in student_db.students]
+        operations["update_student_record"] = summarize(timed(student_db.update_student_record, updates))
+        operations["delete_student"] = summarize(timed(student_db.delete_student, [(email,) for email, *_ in new_students]))
+        operations["student_save_data"] = summarize(timed(student_db.save_data, [()] * 3))
+        operations["write_transcripts"] = summarize(timed(write_transcripts,
+                                                          [(student_db, path(f'transcripts.{extension}'))
+                                                           for extension in ('csv', 'jsonl', 'txt')]))
+
+        course_db = CourseDB(path('course.csv'))
+        operations["course_load"] = summarize(timed(course_db.load_courses, [()] * repeat))
+        with scripted_input([course_ids[number % len(course_ids)] for number in range(repeat)]):
+            operations["course_display"] = summarize(timed(course_db.display_courses, [()] * repeat))
+        with scripted_input(answer for number in range(repeat) for answer in (f"BENCH{number}", "Bench", "Benchmark course", "3")):
+            operations["course_add"] = summarize(timed(course_db.add_new_course, [()] * repeat))
+        with scripted_input(answer for number in range(repeat) for answer in (f"BENCH{number}", "Renamed", "", "")):
+            operations["course_modify"] = summarize(timed(course_db.modify_course_details, [()] * repeat))
+        with scripted_input(f"BENCH{number}" for number in range(repeat)):
+            operations["course_delete"] = summarize(timed(course_db.delete_course, [()] * repeat))
+
+        operations["professor_load"] = summarize(timed(lambda: Professor(path('professor.csv')), [()] * 3))
+        professor_db = Professor(path('professor.csv'))
+        professor_ids = [rng.choice(dataset["professor_ids"]) for _ in range(repeat)]
+        operations["professor_details"] = summarize(timed(professor_db.display_professors_details,
+                                                          [(professor_id,) for professor_id in professor_ids]))
+        operations["professor_courses"] = summarize(timed(professor_db.show_course_details_by_professor,
+                                                          [(professor_id, path('course.csv')) for professor_id in professor_ids]))
+        new_professors = [(f"benchprof{number}@mycsu.edu", f"Bench Professor{number}", "Lecturer", rng.sample(course_ids, 2))
+                          for number in range(repeat)]
+        operations["add_new_professor"] = summarize(timed(professor_db.add_new_professor, new_professors))
+        operations["modify_professor_details"] = summarize(timed(professor_db.modify_professor_details,
+                                                                 [(professor_id, "Renamed", "Senior", None)
+                                                                  for professor_id, *_ in new_professors]))
+        operations["delete_professor"] = summarize(timed(professor_db.delete_professor,
+                                                         [(professor_id,) for professor_id, *_ in new_professors]))
+        operations["professor_save_data"] = summarize(timed(professor_db.save_data, [()] * 3))
+
+        operations["dashboard_build"] = summarize(timed(lambda: Dashboard(student_db, professor_db, course_db), [()]))
+        dashboard = Dashboard(student_db, professor_db, course_db)
+        operations["dashboard_courses"] = summarize(timed(dashboard.course_summary, [()] * repeat))
+        operations["dashboard_professors"] = summarize(timed(dashboard.professor_summary, [()] * repeat))
+        operations["integrity_check_files"] = summarize(timed(check_tables, [(directory,)]))
+        integrity = IntegrityChecker(student_db, professor_db, course_db)
+        operations["integrity_check"] = summarize(timed(integrity.check, [()] * 3))
+        operations["integrity_allow"] = summarize(timed(integrity.allow, [("students", email, [rng.choice(course_ids)])
+                                                                          for email in emails]))
+
+        login_db, memory["login_load"] = peak_memory(lambda: LoginSystem(path('login.csv')))
+        logins = [(email, email.split('@')[0]) for email in emails]
+        operations["login"] = summarize(timed(login_db.login, logins))
+        tokens = [(login_db.sessions.create(email, "student"),) for email in emails]
+        operations["session"] = summarize(timed(login_db.session, tokens))
+
+        result = {
+            "enrollments": enrollments,
+            "students": student_total,
+            "generate_seconds": generate_seconds,
+            "operations": operations,
+            "peak_memory_bytes": memory,
+            "file_bytes": file_bytes,
+        }
+        if compression:
+            result["compression"] = compression_tradeoff(student_csv, student_options)
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Check My Grade App")
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k"],
+                        help=f"dataset sizes in enrollments, e.g. {' '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=200, help="calls per timed operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--columnar", action="store_true", help="load students into the array-backed store")
+    parser.add_argument("--workers", type=int, help="parse Student.csv with this many processes")
+    parser.add_argument("--compression", action="store_true", help="compare plain and compressed Student.csv")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "options": {"repeat": args.repeat, "seed": args.seed, "columnar": args.columnar,
+                    "workers": args.workers, "compression": args.compression},
+        "sizes": {},
+    }
+    with open(os.devnull, mode='w') as devnull:
+        for label in args.sizes:
+            with redirect_stdout(devnull):
+                report["sizes"][label] = run_size(label, parse_size(label), args.repeat, args.seed,
+                                                  {"columnar": args.columnar, "workers": args.workers},
+                                                  args.compression)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
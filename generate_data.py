@@ -0,0 +1,157 @@
+"""Seeded, streaming generator for Student.csv, course.csv, professor.csv and login.csv.
+
+Example:
+    python generate_data.py data/ --enrollments 50m --seed 7
+
+Rows are written as they are generated, so memory use does not depend on the dataset size.
+The column layouts match the files shipped with the app, and the same seed always produces
+the same files.
+"""
+
+import argparse
+import csv
+import os
+import random
+
+STUDENT_HEADER = ["Email_address", "First_name", "Last_name", "Course.id", "grades", "Marks"]
+PROFESSOR_HEADER = ["Professor_id", "professor_Name", "Rank", "course_id"]
+LOGIN_HEADER = ['user_id', 'password', 'role']
+COURSE_HEADER = ['Course_id', 'Course_name', 'Description', 'Credits']
+
+COURSE_COUNT_WEIGHTS = {1: 5, 2: 10, 3: 20, 4: 40, 5: 15, 6: 10}  # Courses per student
+RANKS = ("senior professor", "junior professor")
+SUFFIXES = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+BUFFER_SIZE = 1 << 20
+
+
+def parse_size(text):
+    """Parses sizes such as 1000, 100k or 50m."""
+    text = str(text).strip().lower().replace("_", "")
+    if text and text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def grade_for(marks):
+    """Letter grade for marks, using the same bands as the shipped Student.csv."""
+    if marks >= 90:
+        return "A"
+    if marks >= 80:
+        return "B"
+    if marks >= 70:
+        return "C"
+    if marks >= 60:
+        return "D"
+    return "F"
+
+
+def course_ids_for(count):
+    """Course IDs DATA200, DATA201, ... for the requested number of courses."""
+    return [f"DATA{200 + number}" for number in range(count)]
+
+
+def professor_ids_for(count):
+    """Professor IDs in the shipped proofN@mycsu.edu form."""
+    return [f"proof{number}@mycsu.edu" for number in range(1, count + 1)]
+
+
+def write_courses(path, course_ids, rng):
+    """Writes course.csv and returns the mean marks of each course."""
+    course_means = {}
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(COURSE_HEADER)
+        for course_id in course_ids:
+            writer.writerow([course_id, f"Course {course_id}", f"Generated course {course_id}", rng.choice((3, 3, 3, 4))])
+            course_means[course_id] = rng.gauss(76, 6)  # Some courses are harder than others
+    return course_means
+
+
+def write_professors(path, course_ids, professor_ids, rng):
+    """Writes professor.csv, giving every course one professor and every professor at least one course."""
+    ranks = {professor_id: rng.choice(RANKS) for professor_id in professor_ids}
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(PROFESSOR_HEADER)
+        for number, course_id in enumerate(course_ids):
+            if number < len(professor_ids):
+                professor_id = professor_ids[number]
+            else:
+                professor_id = rng.choice(professor_ids)
+            writer.writerow([professor_id, professor_id.split('@')[0], ranks[professor_id], course_id])
+
+
+def student_rows(enrollments, course_ids, course_means, rng):
+    """Yields (student number, rows) per student until exactly `enrollments` rows were produced."""
+    counts = [count for count in COURSE_COUNT_WEIGHTS if count <= len(course_ids)] or [len(course_ids)]
+    weights = [COURSE_COUNT_WEIGHTS.get(count, 1) for count in counts]
+    produced = 0
+    number = 0
+    while produced < enrollments:
+        number += 1
+        email = f"student{number}@mycsu.edu"
+        first_name = f"FirstName{number}"
+        last_name = f"LastName{number}"
+        ability = rng.gauss(0, 8)  # Strong students do well in every course
+        course_count = min(rng.choices(counts, weights)[0], enrollments - produced)
+        rows = []
+        for course_id in rng.sample(course_ids, course_count):
+            marks = min(100, max(0, round(rng.gauss(course_means[course_id] + ability, 10))))
+            rows.append([email, first_name, last_name, course_id, grade_for(marks), marks])
+        produced += course_count
+        yield number, rows
+
+
+def generate(directory, enrollments, courses=24, professors=12, seed=0):
+    """Writes a consistent dataset into directory and returns a summary of what was written."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    course_ids = course_ids_for(courses)
+    professor_ids = professor_ids_for(professors)
+    course_means = write_courses(os.path.join(directory, 'course.csv'), course_ids, rng)
+    write_professors(os.path.join(directory, 'professor.csv'), course_ids, professor_ids, rng)
+
+    student_total = 0
+    with open(os.path.join(directory, 'Student.csv'), mode='w', newline='', encoding='utf-8',
+                 buffering=BUFFER_SIZE) as students, \
+            open(os.path.join(directory, 'login.csv'), mode='w', newline='', encoding='utf-8',
+                 buffering=BUFFER_SIZE) as logins:
+        student_writer = csv.writer(students)
+        login_writer = csv.writer(logins)
+        student_writer.writerow(STUDENT_HEADER)
+        login_writer.writerow(LOGIN_HEADER)
+        for number, rows in student_rows(enrollments, course_ids, course_means, rng):
+            student_writer.writerows(rows)
+            login_writer.writerow([rows[0][0], f"student{number}", "student"])
+            student_total = number
+        for professor_id in professor_ids:
+            login_writer.writerow([professor_id, professor_id.split('@')[0], "professor"])
+
+    return {
+        "directory": directory,
+        "enrollments": enrollments,
+        "students": student_total,
+        "course_ids": course_ids,
+        "professor_ids": professor_ids,
+        "seed": seed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Check My Grade App CSV files")
+    parser.add_argument("directory", help="where to write the four CSV files")
+    parser.add_argument("--enrollments", default="1k", help="Student.csv rows, e.g. 1000, 100k or 50m")
+    parser.add_argument("--courses", type=int, default=24)
+    parser.add_argument("--professors", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.courses < 1 or args.professors < 1:
+        parser.error("--courses and --professors must be at least 1")
+
+    summary = generate(args.directory, parse_size(args.enrollments), args.courses, args.professors, args.seed)
+    print(f"Wrote {summary['enrollments']} enrollments for {summary['students']} students, "
+          f"{len(summary['course_ids'])} courses and {len(summary['professor_ids'])} professors to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
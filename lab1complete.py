@@ -4,38 +4,1852 @@
 # In[ ]:
 
 
+import abc
+import argparse
+import atexit
+import bisect
+import bz2
 import csv
+import gc
 import getpass
-import time
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import lzma
+import marshal
+import mmap
+import os
+import secrets
+import sqlite3
+import struct
 import shutil
-from collections import defaultdict
+import signal
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from contextlib import contextmanager
+
+from metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows has no advisory locks, so FileLock only serializes threads of one process
+    fcntl = None
+
+
+@contextmanager
+def atomic_open(path, encoding=None, binary=False):
+    """Opens a temp file for writing and renames it over path once the block succeeds.
+
+    Text written to a path ending in .gz, .bz2 or .xz is compressed as it is written.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # Concurrent writers never share a temp file
+    compression = None if binary else compression_of(path)
+    if binary or compression is not None:
+        raw = open(temp_path, mode='wb')
+        file = raw if binary else _compressed_writer(raw, path, encoding)
+    else:
+        raw = file = open(temp_path, mode='w', newline='', encoding=encoding)
+    try:
+        yield file
+        if file is not raw:
+            file.close()  # Ends the compressed stream; raw stays open
+        raw.flush()
+        os.fsync(raw.fileno())
+        raw.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        file.close()
+        raw.close()
+        os.remove(temp_path)
+        raise
+
+
+COMPRESSION = {".gz": gzip, ".bz2": bz2, ".xz": lzma}  # File extension -> stdlib module streaming that format
+
+
+def compression_of(path):
+    """Returns the module compressing a table file, chosen by its extension, or None for plain CSV."""
+    return COMPRESSION.get(os.path.splitext(path)[1].lower())
+
+
+def open_table(path, encoding=None, newline=None):
+    """Opens a table file for reading text, decompressing it as it is read when its extension says so."""
+    compression = compression_of(path)
+    if compression is None:
+        return open(path, mode='r', encoding=encoding, newline=newline)
+    return compression.open(path, mode='rt', encoding=encoding, newline=newline)
+
+
+def _compressed_writer(raw, path, encoding):
+    """Wraps an open binary file in a text stream compressed like path's extension."""
+    compression = compression_of(path)
+    if compression is gzip:
+        # gzip.open would record the temp file's name in the header, and level 9 is several
+        # times slower than 6 for a few percent
+        stream = gzip.GzipFile(filename=os.path.basename(path)[:-3], mode='wb', compresslevel=6, fileobj=raw)
+    else:
+        stream = compression.open(raw, mode='wb')
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
 
+@contextmanager
+def paused_gc():
+    """Turns off the cyclic garbage collector while a block builds many acyclic containers."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class FileLock:
+    """Advisory lock on <path>.lock, which also holds the version stamp of the locked file.
+
+    The stamp is (version, generation): version counts every write made under the lock and
+    generation counts full rewrites, after which old journal offsets no longer apply.
+    """
+
+    stamp_format = struct.Struct("<QQ")
+
+    def __init__(self, path):
+        self.path = path + '.lock'
+        self._thread_lock = threading.RLock()
+        self._depth = 0  # Nested holds by the owning thread
+        self._fd = None
+
+    @contextmanager
+    def hold(self, shared=False):
+        """Holds the lock for the block; nested holds join the outer one and keep its mode.
+
+        Only exclusive holds create the lock file. A shared hold whose lock file is missing or
+        cannot be opened, as in a read-only directory, reads without the lock.
+        """
+        with self._thread_lock:
+            if self._depth == 0:
+                if shared:
+                    try:
+                        self._fd = os.open(self.path, os.O_RDONLY)
+                    except OSError:
+                        self._fd = None  # No writer has made the lock file, or it is not ours to open
+                else:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+                if fcntl is not None and self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._fd is not None:
+                        os.close(self._fd)  # Closing also releases the flock
+                    self._fd = None
+
+    def stamp(self):
+        """Returns the (version, generation) stamp of the locked file."""
+        with self._thread_lock:
+            if self._fd is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                data = os.read(self._fd, self.stamp_format.size)
+            else:
+                try:
+                    with open(self.path, mode='rb') as file:
+                        data = file.read(self.stamp_format.size)
+                except FileNotFoundError:
+                    data = b""
+        if len(data) < self.stamp_format.size:
+            return 0, 0
+        return self.stamp_format.unpack(data)
+
+    def bump(self, rewritten=False):
+        """Records a write made while holding the lock and returns the new stamp."""
+        version, generation = self.stamp()
+        stamp = (version + 1, generation + 1 if rewritten else generation)
+        with self._thread_lock:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, self.stamp_format.pack(*stamp))
+        return stamp
+
+
+def merge_records(base, mine, theirs, field="course_id"):
+    """Three-way merges two versions of a record list that both started from base.
+
+    Records are matched on field, so changes to different courses from both sides are kept.
+    Where both sides changed the same record, or one side deleted the whole list, mine wins.
+    """
+    if mine is None or theirs is None:
+        return mine if mine != base else theirs
+
+    def keyed(records):
+        seen = defaultdict(int)
+        keyed_records = {}
+        for record in records or []:
+            keyed_records[(record[field], seen[record[field]])] = record  # Repeated IDs are told apart by position
+            seen[record[field]] += 1
+        return keyed_records
+
+    base_records, my_records, their_records = keyed(base), keyed(mine), keyed(theirs)
+    merged = []
+    for key in list(their_records) + [key for key in my_records if key not in their_records]:
+        record = their_records.get(key) if my_records.get(key) == base_records.get(key) else my_records.get(key)
+        if record is not None:
+            merged.append(record)
+    return merged
+
+
+class ChangeJournal:
+    """Append-only log of put/delete changes kept next to a CSV file."""
 
-class Student:
     def __init__(self, csv_file):
+        self.path = csv_file + '.journal'
+        self.entries = 0
+        self.offset = 0  # End of the last change read or written
+
+    def append(self, op, key, records=None):
+        """Appends one change and forces it to disk."""
+        self.append_many([(op, key, records)])
+
+    def append_many(self, changes):
+        """Appends several (op, key, records) changes with a single write; call while holding the table lock."""
+        lines = [json.dumps({"op": op, "key": key, "records": records}) + "\n" for op, key, records in changes]
+        with open(self.path, mode='a+b') as file:
+            self._drop_torn_tail(file)
+            file.write("".join(lines).encode('utf-8'))
+            file.flush()
+            os.fsync(file.fileno())
+            self.offset = file.tell()
+        self.entries += len(lines)
+        metrics.increment("journal.entries", len(lines))
+
+    @staticmethod
+    def _drop_torn_tail(file):
+        """Cuts an incomplete last line left by a crash so the next change starts on its own line."""
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 65536)
+            file.seek(start)
+            block = file.read(position - start)
+            if position == end and block.endswith(b"\n"):
+                return
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                file.truncate(start + newline + 1)
+                return
+            position = start
+        file.truncate(0)
+
+    def replay(self, start=0):
+        """Yields (op, key, records) for every complete change in the log after byte offset start."""
+        if start == 0:
+            self.entries = 0
+        try:
+            file = open(self.path, mode='rb')
+        except FileNotFoundError:
+            self.offset = 0
+            return
+        with file:
+            file.seek(start)
+            good_offset = start
+            for line in file:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    change = json.loads(line)
+                except ValueError:
+                    break  # Torn write from a crash
+                good_offset += len(line)
+                self.entries += 1
+                yield change["op"], change["key"], change["records"]
+        self.offset = good_offset  # A torn tail is left for the next locked append to cut
+
+    def clear(self):
+        """Empties the log after its changes were folded into the CSV."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = 0
+        self.offset = 0
+
+
+class OffsetIndex:
+    """Sidecar file mapping emails and course IDs to the byte offsets of their rows in Student.csv.
+
+    Entries are (key hash, offset) pairs sorted by hash, so a lookup is a binary search on the
+    memory-mapped file and never reads the whole index.
+    """
+
+    header = struct.Struct('<qqqq')  # CSV mtime_ns, CSV size, email entries, course entries
+    entry = struct.Struct('<QQ')  # Key hash, row offset
+
+    def __init__(self, csv_file, course_column=3):
         self.csv_file = csv_file
-        self.students = defaultdict(list)  # Dictionary to store student data
-        self.load_data()
+        self.path = csv_file + '.idx'
+        self.course_column = course_column  # 3 in Student.csv, 1 in a normalized enrollments file
+        self.map = None
+        self.stamp = None  # (mtime_ns, size) of the CSV the mapped offsets belong to
+        self.email_count = 0
+        self.course_count = 0
+
+    @staticmethod
+    def key_hash(key):
+        """Returns a stable 64-bit hash of an email or course ID."""
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    def _csv_stamp(self):
+        stat = os.stat(self.csv_file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def close(self):
+        """Unmaps the sidecar file."""
+        if self.map is not None:
+            self.map.close()
+        self.map = None
+        self.stamp = None
+
+    def invalidate(self):
+        """Unmaps and removes the sidecar file, so the next ensure() builds it for the CSV as it is then."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    @metrics.timed("offset_index.build")
+    def build(self):
+        """Scans the CSV for row offsets and writes the sidecar file."""
+        self.close()
+        stamp = self._csv_stamp()
+        email_entries = []
+        course_entries = []
+        hashes = {}  # Emails repeat per course row and course IDs repeat everywhere
+        with open(self.csv_file, mode='rb') as file:
+            offset = len(file.readline())  # Skip header
+            for line in file:
+                if b'"' in line:
+                    row = next(csv.reader([line.decode('utf-8')]))
+                else:
+                    row = line.rstrip(b"\r\n").decode('utf-8').split(',')
+                if len(row) == self.course_column + 3:
+                    email, course_id = row[0], row[self.course_column]
+                    if email not in hashes:
+                        if len(hashes) > 100000:
+                            hashes.clear()
+                        hashes[email] = self.key_hash(email)
+                    if course_id not in hashes:
+                        hashes[course_id] = self.key_hash(course_id)
+                    email_entries.append((hashes[email], offset))
+                    course_entries.append((hashes[course_id], offset))
+                offset += len(line)
+        email_entries.sort()
+        course_entries.sort()
+        entries = array('Q', [value for entry in email_entries + course_entries for value in entry])
+        if sys.byteorder == 'big':
+            entries.byteswap()
+        with atomic_open(self.path, binary=True) as file:
+            file.write(self.header.pack(stamp[0], stamp[1], len(email_entries), len(course_entries)))
+            entries.tofile(file)
+
+    def _open(self, stamp):
+        """Maps the sidecar file if it belongs to the CSV as it is now."""
+        try:
+            with open(self.path, mode='rb') as file:
+                index_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError, OSError):
+            return False
+        if len(index_map) < self.header.size:
+            index_map.close()
+            return False
+        mtime_ns, size, email_count, course_count = self.header.unpack_from(index_map)
+        expected_size = self.header.size + (email_count + course_count) * self.entry.size
+        if (mtime_ns, size) != stamp or len(index_map) != expected_size:
+            index_map.close()
+            return False
+        self.map, self.stamp = index_map, stamp
+        self.email_count, self.course_count = email_count, course_count
+        return True
+
+    def ensure(self):
+        """Makes sure the offsets match the CSV, rebuilding the sidecar file when it is stale."""
+        stamp = self._csv_stamp()
+        if self.map is not None and self.stamp == stamp:
+            return self
+        self.close()
+        if not self._open(stamp):
+            self.build()
+            self._open(self._csv_stamp())
+        return self
+
+    def _lookup(self, first_entry, count, key):
+        """Binary searches one section for the offsets stored under key."""
+        key_hash = self.key_hash(key)
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry.unpack_from(self.map, self.header.size + (first_entry + middle) * self.entry.size)[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        while low < count:
+            entry_hash, offset = self.entry.unpack_from(self.map, self.header.size + (first_entry + low) * self.entry.size)
+            if entry_hash != key_hash:
+                break
+            offsets.append(offset)
+            low += 1
+        offsets.sort()
+        return offsets
+
+    def email_rows(self, email):
+        """Returns the CSV rows of one email."""
+        offsets = self._lookup(0, self.email_count, email)
+        return [row for row in self.read_rows(offsets) if row[0] == email]
+
+    def course_rows(self, course_id):
+        """Returns the CSV rows of one course."""
+        offsets = self._lookup(self.email_count, self.course_count, course_id)
+        return [row for row in self.read_rows(offsets) if row[self.course_column] == course_id]
+
+    def read_rows(self, offsets):
+        """Seeks to each offset and parses only that line."""
+        rows = []
+        with open(self.csv_file, mode='rb') as file:
+            for offset in offsets:
+                file.seek(offset)
+                line = file.readline().decode('utf-8')
+                row = next(csv.reader([line]))
+                row[-1] = int(row[-1])  # Marks end both layouts
+                rows.append(tuple(row))
+        return rows
+
+
+class SnapshotCache:
+    """Binary copy of a table's parsed records, used while its source files are unchanged.
+
+    The snapshot is one marshal dump, read with a single call. Its key records the size, mtime
+    and a hash of both ends of every source file, so a changed CSV or journal makes load()
+    return None and the caller parses the CSV instead.
+    """
+
+    version = 4
+    edge_bytes = 1 << 16  # Bytes hashed at the start and end of each source
+
+    def __init__(self, csv_file, sources=None):
+        self.path = csv_file + '.snapshot'
+        self.sources = sources or [csv_file]
+
+    def fingerprint(self, path):
+        """Returns (mtime_ns, size, hash of both ends) of a file, or None if it is missing."""
+        try:
+            with open(path, mode='rb') as file:
+                stat = os.fstat(file.fileno())
+                digest = hashlib.blake2b(file.read(self.edge_bytes), digest_size=16)
+                if stat.st_size > self.edge_bytes:
+                    file.seek(max(self.edge_bytes, stat.st_size - self.edge_bytes))
+                    digest.update(file.read())
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, digest.hexdigest()
 
-    def load_data(self):
-        """Loads data from CSV into a dictionary."""
-        with open(self.csv_file, mode='r') as file:
+    def key(self):
+        """Returns the key the current source files give a snapshot."""
+        return (self.version, marshal.version, tuple(sys.version_info[:2]),
+                tuple((path, self.fingerprint(path)) for path in self.sources))
+
+    def load(self, key):
+        """Returns the snapshot data if it was stored under key, else None."""
+        try:
+            with open(self.path, mode='rb') as file, paused_gc():
+                stored_key, data = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return data if stored_key == key else None
+
+    def store(self, key, data):
+        """Writes data under key; a snapshot that cannot be written is simply skipped."""
+        try:
+            with atomic_open(self.path, binary=True) as file:
+                marshal.dump((key, data), file)
+        except (OSError, ValueError):
+            pass
+
+
+class TableBackend(abc.ABC):
+    """Storage of the student, professor, course and login tables; the tables hand it every read and write.
+
+    Rows are (key, *fields) tuples and records are dicts of the fields, both laid out by tables.
+    CsvBackend keeps one table in a CSV file and SqliteBackend keeps all four in one database.
+    """
+
+    # Table -> (key column, record fields stored after it)
+    tables = {
+        "students": ("email", ("first_name", "last_name", "course_id", "grade", "marks")),
+        "professors": ("professor_id", ("professor_name", "rank", "course_id")),
+        "users": ("user_id", ("password", "role")),
+    }
+
+    @abc.abstractmethod
+    def reading(self):
+        """Context manager keeping the saved data steady while a table loads it."""
+
+    @abc.abstractmethod
+    def writing(self):
+        """Context manager keeping other writers out while a table merges and saves its changes."""
+
+    @abc.abstractmethod
+    def rows(self, table, key=None, course_id=None):
+        """Returns (key, *fields) rows of a table, optionally for one key or one course, in saved order."""
+
+    @abc.abstractmethod
+    def apply(self, table, changes):
+        """Saves (op, key, records) changes, replacing only the rows of each key."""
+
+    @abc.abstractmethod
+    def replace_all(self, table, rows):
+        """Replaces every row of a table with (key, *fields) rows."""
+
+    @abc.abstractmethod
+    def stale(self, table):
+        """Tells whether the saved table changed since it was last read or written here."""
+
+    @abc.abstractmethod
+    def course_rows(self):
+        """Returns every course as a dict with the course.csv columns."""
+
+    @abc.abstractmethod
+    def insert_course(self, course):
+        """Adds one course row."""
+
+    @abc.abstractmethod
+    def update_course(self, course):
+        """Updates the first course row with the course's ID."""
+
+    @abc.abstractmethod
+    def delete_course(self, course_id):
+        """Deletes every course row with an ID."""
+
+    @abc.abstractmethod
+    def replace_courses(self, courses):
+        """Replaces every course row and returns the rows saved."""
+
+    @abc.abstractmethod
+    def close(self):
+        """Releases the files or connection the backend holds."""
+
+    def records(self, table):
+        """Returns key -> records of the saved table."""
+        fields = self.tables[table][1]
+        records = defaultdict(list)
+        for key, *values in self.rows(table):
+            records[key].append(dict(zip(fields, values)))
+        return records
+
+    def cached(self, table, build):
+        """Returns build(), the loaded form of a table; backends with snapshots reuse it while the data is unchanged."""
+        return build()
+
+    def saved_changes(self, table):
+        """Returns (changes, complete) for what other writers saved since this backend synced, or None; call while writing.
+
+        changes maps keys to their saved records, or None once deleted. complete means changes
+        holds the whole saved table, and keys missing from it were deleted.
+        """
+        return None
+
+    def needs_compaction(self, count):
+        """Tells whether saving count more changes should rewrite the whole table instead."""
+        return False
+
+    def load_parallel(self, table, records, workers, columnar=False, min_bytes=0):
+        """Loads the saved table into records with worker processes; returns False when the backend cannot."""
+        return False
+
+
+class CsvBackend(TableBackend):
+    """Keeps one table in a CSV file, changes since its last rewrite in a journal next to it.
+
+    A lock file coordinates writers in other processes and records the version each one
+    saved, so a writer can merge what others saved since it last read. A normalized table
+    keeps its rows in csv_file and one row of names per student or professor in names_file.
+    Student.csv also gets an offset index, so single students and courses are read without
+    scanning the file; a compressed one is decompressed once and its rows kept in memory instead.
+    """
+
+    encodings = {"students": None, "professors": 'utf-8-sig', "users": 'utf-8-sig', "courses": 'utf-8'}
+
+    def __init__(self, csv_file, names_file=None, compact_threshold=1000, snapshot=False):
+        self.csv_file = csv_file
+        self.names_file = names_file
+        self.compact_threshold = compact_threshold  # Journal entries before the CSV is rewritten
+        self.journal = ChangeJournal(csv_file)
+        self.lock = FileLock(csv_file)
+        sources = [csv_file, self.journal.path] + ([names_file] if names_file else [])
+        self.snapshot = SnapshotCache(csv_file, sources) if snapshot else None
+        self.offset_index = OffsetIndex(csv_file, course_column=1 if names_file else 3)
+        self._names = None  # (file stamp, key -> names) last read from names_file
+        self._unpacked = None  # (file stamps, key -> rows, course_id -> rows) of a compressed csv_file
+        self._synced = (0, 0)  # Lock stamp of the saved data last read or written here
+        self._journal_offset = 0  # End of the journal changes already applied
+        self._file_stamp = None  # (mtime_ns, size) of the CSV when the courses were last read or written
+        self._saved_rows = None  # Copy of those course rows, the base for merging with other writers
+        self._merged = False  # The last course write merged rows the table has not read yet
+
+    def close(self):
+        """Unmaps the offset index."""
+        self.offset_index.close()
+
+    @contextmanager
+    def reading(self):
+        """Holds the shared lock while a table loads the saved data and notes the version it read."""
+        with self.lock.hold(shared=True):
+            self._synced = self.lock.stamp()
+            yield
+            if not self.journal.offset:
+                for _ in self.journal.replay():
+                    pass  # A lazy table read no journal yet; only counts its entries
+            self._journal_offset = self.journal.offset
+
+    def writing(self):
+        """Holds the exclusive lock while a table merges and saves its changes."""
+        return self.lock.hold()
+
+    def names(self, table):
+        """Returns key -> names from the normalized names file, re-read only when it changed."""
+        stat = os.stat(self.names_file)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if self._names is None or self._names[0] != stamp:
+            with open_table(self.names_file, encoding=self.encodings[table]) as file, paused_gc():
+                reader = csv.reader(file)
+                next(reader, None)  # Skip header
+                self._names = (stamp, {row[0]: (row[1], row[2]) for row in reader})
+        return self._names[1]
+
+    def _join_names(self, table, rows):
+        """Turns normalized rows into flat ones by putting the names after the key."""
+        names = self.names(table)
+        last_key = None
+        for row in rows:
+            if row[0] != last_key:  # A student's or professor's rows are usually together
+                joined = names.get(row[0], ("", ""))
+                last_key = row[0]
+            yield (row[0], *joined, *row[1:])
+
+    def _read_rows(self, table):
+        """Streams the (key, *fields) rows of the CSV file alone, joined with the names file when normalized."""
+        with open_table(self.csv_file, encoding=self.encodings[table]) as file:
+            if table == "users":
+                for row in csv.DictReader(file):
+                    yield row['user_id'], row['password'], row['role']
+                return
             reader = csv.reader(file)
-            next(reader)  # Skip header
-            for row in reader:
-                email, first_name, last_name, course_id, grade, marks = row
-                self.students[email].append({
+            next(reader, None)  # Skip header
+            if self.names_file is not None:
+                reader = self._join_names(table, reader)
+            if table == "students":
+                for email, first_name, last_name, course_id, grade, marks in reader:
+                    yield email, first_name, last_name, course_id, grade, int(marks)
+            else:
+                for row in reader:
+                    yield tuple(row)
+
+    def _unpacked_rows(self, table):
+        """Returns key -> rows and course_id -> rows of a compressed table, decompressed again only when it changed."""
+        stamps = tuple((stat.st_mtime_ns, stat.st_size) for stat in
+                       (os.stat(path) for path in (self.csv_file, self.names_file) if path is not None))
+        if self._unpacked is None or self._unpacked[0] != stamps:
+            course_column = self.tables[table][1].index("course_id") + 1
+            key_rows, course_rows = defaultdict(list), defaultdict(list)
+            for row in self._read_rows(table):
+                key_rows[row[0]].append(row)
+                course_rows[row[course_column]].append(row)
+            self._unpacked = (stamps, key_rows, course_rows)
+        return self._unpacked[1:]
+
+    def journal_overrides(self):
+        """Returns key -> journaled records, or None for journaled deletes."""
+        overrides = {}
+        for op, key, records in self.journal.replay():
+            overrides[key] = records if op == "put" else None
+        return overrides
+
+    def rows(self, table, key=None, course_id=None):
+        """Streams (key, *fields) rows of the saved CSV and journal, optionally for one key or one course."""
+        fields = self.tables[table][1]
+        course_column = fields.index("course_id") + 1 if course_id is not None else None
+        overrides = self.journal_overrides()  # Set to None once deleted or already yielded
+        if key is not None and key in overrides:
+            saved = []
+        elif table == "students" and (key, course_id) != (None, None) and compression_of(self.csv_file) is None:
+            # Only the indexed rows of the student or course need to be read
+            index = self.offset_index.ensure()
+            saved = index.email_rows(key) if key is not None else index.course_rows(course_id)
+            if self.names_file is not None:
+                saved = self._join_names(table, saved)
+        elif table == "students" and (key, course_id) != (None, None):
+            # Offsets cannot point into compressed data, so the rows are read once and looked up in memory
+            key_rows, course_rows = self._unpacked_rows(table)
+            saved = key_rows.get(key, []) if key is not None else course_rows.get(course_id, [])
+        else:
+            saved = self._read_rows(table)
+
+        def journaled(row_key, records):
+            for record in records or []:
+                row = (row_key, *[record[field] for field in fields])
+                if course_id is None or row[course_column] == course_id:
+                    yield row
+
+        for row in saved:
+            if row[0] in overrides:
+                records, overrides[row[0]] = overrides[row[0]], None
+                if key is None or row[0] == key:
+                    yield from journaled(row[0], records)
+                continue
+            if (key is None or row[0] == key) and (course_id is None or row[course_column] == course_id):
+                yield row
+        for row_key, records in overrides.items():
+            if key is None or row_key == key:
+                yield from journaled(row_key, records)
+
+    def cached(self, table, build):
+        """Returns build(), or what it returned before from the snapshot while the CSV and journal are unchanged."""
+        if self.snapshot is None:
+            return build()
+        snapshot_key = self.snapshot.key()
+        stored = self.snapshot.load(snapshot_key)
+        if stored is not None:
+            self.journal.entries, self.journal.offset = stored["journal_entries"], stored["journal_offset"]
+            return stored["data"]
+        data = build()
+        self.snapshot.store(snapshot_key, {"data": data, "journal_entries": self.journal.entries,
+                                           "journal_offset": self.journal.offset})
+        return data
+
+    def saved_changes(self, table):
+        """Returns (changes, complete) for what other processes saved since this backend synced, or None; call while writing.
+
+        While the CSV is the same file, the changes are the journal lines after ours; once it was
+        rewritten, they are the whole saved table.
+        """
+        stamp = self.lock.stamp()
+        if stamp == self._synced:
+            return None
+        if stamp[1] == self._synced[1]:
+            saved = ({}, False)
+            for op, key, records in self.journal.replay(self._journal_offset):
+                saved[0][key] = records if op == "put" else None
+        else:
+            saved = (self.records(table), True)
+        self._synced = stamp
+        self._journal_offset = self.journal.offset
+        return saved
+
+    def needs_compaction(self, count):
+        """Tells whether count more journal entries would make the journal too long."""
+        return self.journal.entries + count >= self.compact_threshold
+
+    def apply(self, table, changes):
+        """Appends (op, key, records) changes to the journal; call while writing, after merging saved_changes."""
+        with self.lock.hold():
+            self.journal.append_many(changes)
+            self._synced = self.lock.bump()
+            self._journal_offset = self.journal.offset
+
+    def replace_all(self, table, rows):
+        """Rewrites the CSV with (key, *fields) rows and empties the journal, which the rows include.
+
+        Returns how many rows named their student or professor differently from their first row,
+        which the normalized layout cannot keep.
+        """
+        with self.lock.hold():
+            if table == "users":
+                write_login_csv(rows, self.csv_file)
+                renamed = 0
+            elif table == "students":
+                renamed = write_student_csv(rows, self.csv_file, self.names_file)
+            else:
+                renamed = write_professor_csv(rows, self.csv_file, self.names_file)
+            self.journal.clear()
+            if table == "students":
+                self.offset_index.invalidate()  # Rebuilt by the next read of one student or course
+            self._synced = self.lock.bump(rewritten=True)
+            self._journal_offset = 0
+        return renamed
+
+    @metrics.timed("student.load_parallel")
+    def load_parallel(self, table, records, workers, columnar=False, min_bytes=0):
+        """Parses byte ranges of Student.csv into records in worker processes, then applies the journal like rows.
+
+        Returns False for other tables, compressed files and files smaller than min_bytes.
+        """
+        if table != "students" or (workers or 0) <= 1 or compression_of(self.csv_file) is not None:
+            return False
+        if os.path.getsize(self.csv_file) < min_bytes:
+            return False
+        ranges = split_csv_ranges(self.csv_file, workers * 4)
+        if ranges:
+            starts, ends = zip(*ranges)
+            names = self.names(table) if self.names_file else None
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(names,)) as pool, paused_gc():
+                for data in pool.map(parse_student_range, repeat(self.csv_file), starts, ends, repeat(columnar),
+                                     repeat(names is not None)):
+                    chunk = marshal.loads(data)
+                    if columnar:
+                        for row in chunk:
+                            records.append_row(*row)
+                        continue
+                    for email, student_records in chunk.items():
+                        if email in records:
+                            records[email].extend(student_records)  # Student split across two ranges
+                        else:
+                            records[email] = student_records
+        for email, student_records in self.journal_overrides().items():
+            if student_records is not None:
+                records[email] = student_records
+            elif email in records:
+                del records[email]
+        return True
+
+    def _stat(self):
+        stat = os.stat(self.csv_file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def stale(self, table):
+        """Tells whether the CSV changed since it was last read or written here."""
+        return self._file_stamp is None or self._merged or self._stat() != self._file_stamp
+
+    def _read_courses(self):
+        with open_table(self.csv_file, encoding=self.encodings["courses"], newline='') as file:
+            return list(csv.DictReader(file))
+
+    def course_rows(self):
+        """Reads every course, from the snapshot on the first read while it is current."""
+        stamp = self._stat()
+        self._synced = self.lock.stamp()  # Read before the rows, so a racing write can only look newer
+        if self._saved_rows is None:
+            rows = self.cached("courses", self._read_courses)
+        else:
+            rows = self._read_courses()
+        self._file_stamp = stamp
+        self._merged = False
+        self._saved_rows = [dict(row) for row in rows]
+        return rows
+
+    def _write_courses(self, change):
+        """Rewrites course.csv with change applied to the rows last read or written here.
+
+        If another process wrote since, its changes to other courses are merged in, and the CSV
+        counts as changed so the table reads the merged rows back.
+        """
+        base = self._saved_rows or []
+        rows = change([dict(row) for row in base])
+        with self.lock.hold():
+            merged = self._file_stamp is not None and (self.lock.stamp() != self._synced or self._stat() != self._file_stamp)
+            if merged:
+                metrics.increment("course.conflicts")
+                rows = merge_records(base, rows, self._read_courses(), field='Course_id')
+            with atomic_open(self.csv_file, encoding=self.encodings["courses"]) as file:
+                writer = csv.DictWriter(file, fieldnames=CourseDB.fieldnames)
+                writer.writeheader()
+                writer.writerows(rows)
+            self._file_stamp = self._stat()
+            self._synced = self.lock.bump()
+        self._merged = merged
+        self._saved_rows = [dict(row) for row in rows]
+        return rows
+
+    def insert_course(self, course):
+        """Adds one course row by rewriting course.csv."""
+        self._write_courses(lambda rows: rows + [dict(course)])
+
+    def update_course(self, course):
+        """Updates the first course row with the course's ID by rewriting course.csv."""
+        def change(rows):
+            for row in rows:
+                if row['Course_id'] == course['Course_id']:
+                    row.update(course)
+                    break
+            return rows
+        self._write_courses(change)
+
+    def delete_course(self, course_id):
+        """Deletes every course row with an ID by rewriting course.csv."""
+        self._write_courses(lambda rows: [row for row in rows if row['Course_id'] != course_id])
+
+    def replace_courses(self, courses):
+        """Rewrites course.csv with the courses, merged with other processes' changes since the last read."""
+        return self._write_courses(lambda rows: [dict(course) for course in courses])
+
+
+class SqliteBackend(TableBackend):
+    """Keeps the student, professor, course and login tables in one SQLite database.
+
+    Lookups use indexes on email, course_id, professor_id and user_id, every statement is a
+    fixed parameterized query that sqlite3 prepares once and caches, and changes touch only
+    the rows of the affected key. One connection is shared by every thread, one statement
+    or transaction at a time.
+    """
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS students (
+            seq INTEGER PRIMARY KEY, email TEXT NOT NULL, first_name TEXT, last_name TEXT,
+            course_id TEXT, grade TEXT, marks INTEGER);
+        CREATE INDEX IF NOT EXISTS students_email ON students (email);
+        CREATE INDEX IF NOT EXISTS students_course ON students (course_id, marks);
+        CREATE TABLE IF NOT EXISTS professors (
+            seq INTEGER PRIMARY KEY, professor_id TEXT NOT NULL, professor_name TEXT, rank TEXT, course_id TEXT);
+        CREATE INDEX IF NOT EXISTS professors_id ON professors (professor_id);
+        CREATE INDEX IF NOT EXISTS professors_course ON professors (course_id);
+        CREATE TABLE IF NOT EXISTS courses (
+            seq INTEGER PRIMARY KEY, course_id TEXT NOT NULL, course_name TEXT, description TEXT, credits TEXT);
+        CREATE INDEX IF NOT EXISTS courses_id ON courses (course_id);
+        CREATE TABLE IF NOT EXISTS users (
+            seq INTEGER PRIMARY KEY, user_id TEXT NOT NULL UNIQUE, password TEXT, role TEXT);
+    """
+
+    def __init__(self, db_path='checkmygrade.db'):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)  # The service runs tables on worker threads
+        self.lock = threading.RLock()  # Serializes use of the shared connection
+        self._read_versions = {}  # Table -> data_version when it was last read
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.schema)
+
+    def close(self):
+        """Closes the database connection."""
+        with self.lock:
+            self.connection.close()
+
+    def data_version(self):
+        """Returns a number that changes whenever another connection commits."""
+        with self.lock:
+            return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    @contextmanager
+    def reading(self):
+        """Holds the connection while a table loads, so no other thread writes halfway through."""
+        with self.lock:
+            yield
+
+    @contextmanager
+    def writing(self):
+        """Holds the connection while a table saves its changes."""
+        with self.lock:
+            yield
+
+    def stale(self, table):
+        """Tells whether another connection committed since the table was last read here."""
+        return self._read_versions.get(table) != self.data_version()
+
+    def rows(self, table, key=None, course_id=None):
+        """Returns (key, *fields) rows of a table, optionally for one key or one course, in insert order."""
+        with self.lock:
+            key_column, fields = self.tables[table]
+            query = f"SELECT {key_column}, {', '.join(fields)} FROM {table}"
+            if key is not None:
+                return self.connection.execute(query + f" WHERE {key_column} = ? ORDER BY seq", (key,)).fetchall()
+            if course_id is not None:
+                return self.connection.execute(query + " WHERE course_id = ? ORDER BY seq", (course_id,)).fetchall()
+            return self.connection.execute(query + " ORDER BY seq").fetchall()
+
+    def apply(self, table, changes):
+        """Writes (op, key, records) changes, replacing only the rows of each key, in one transaction."""
+        with self.lock:
+            key_column, fields = self.tables[table]
+            delete = f"DELETE FROM {table} WHERE {key_column} = ?"
+            insert = f"INSERT INTO {table} ({key_column}, {', '.join(fields)}) VALUES ({', '.join('?' * (len(fields) + 1))})"
+            with self.connection:
+                for op, key, records in changes:
+                    self.connection.execute(delete, (key,))
+                    if op == "put":
+                        self.connection.executemany(insert, [(key, *[record[field] for field in fields]) for record in records])
+
+    def replace_all(self, table, rows):
+        """Replaces every row of a table with (key, *fields) rows."""
+        with self.lock:
+            key_column, fields = self.tables[table]
+            insert = f"INSERT INTO {table} ({key_column}, {', '.join(fields)}) VALUES ({', '.join('?' * (len(fields) + 1))})"
+            with self.connection:
+                self.connection.execute(f"DELETE FROM {table}")
+                self.connection.executemany(insert, rows)
+
+    def course_rows(self):
+        """Returns every course as a dict with the course.csv columns."""
+        with self.lock:
+            self._read_versions["courses"] = self.data_version()
+            query = "SELECT course_id, course_name, description, credits FROM courses ORDER BY seq"
+            return [dict(zip(CourseDB.fieldnames, row)) for row in self.connection.execute(query)]
+
+    def insert_course(self, course):
+        """Adds one course row."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO courses (course_id, course_name, description, credits) VALUES (?, ?, ?, ?)",
+                [course[field] for field in CourseDB.fieldnames])
+
+    def update_course(self, course):
+        """Updates the first course row with the course's ID."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE courses SET course_name = ?, description = ?, credits = ? WHERE seq = "
+                "(SELECT seq FROM courses WHERE course_id = ? ORDER BY seq LIMIT 1)",
+                (course['Course_name'], course['Description'], course['Credits'], course['Course_id']))
+
+    def delete_course(self, course_id):
+        """Deletes every course row with an ID."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM courses WHERE course_id = ?", (course_id,))
+
+    def replace_courses(self, courses):
+        """Replaces every course row and returns the rows saved."""
+        courses = list(courses)
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM courses")
+            self.connection.executemany(
+                "INSERT INTO courses (course_id, course_name, description, credits) VALUES (?, ?, ?, ?)",
+                [[course[field] for field in CourseDB.fieldnames] for course in courses])
+        return courses
+
+
+class JournaledTable(abc.ABC):
+    """Change tracking and batch handling shared by tables keyed on one ID column."""
+
+    def init_journal(self, backend):
+        """Sets up change tracking for a table the backend stores."""
+        self.backend = backend  # TableBackend every read and write of the table goes through
+        self._batch_originals = None  # Key -> records from before the open batch touched them
+        self._savepoints = []  # Key -> records from before each open nested batch touched them
+        self._change_originals = {}  # Same for changes made outside a batch, until they are persisted
+        self.views = []  # Materialized views fed every change to the records
+        self.integrity = None  # IntegrityChecker vetting the course IDs written, if any
+
+    @abc.abstractmethod
+    def table(self):
+        """Returns the dictionary of records keyed by ID."""
+
+    @abc.abstractmethod
+    def save_data(self):
+        """Saves every record, replacing the whole saved table."""
+
+    def register_view(self, view):
+        """Feeds the current records to a view, then every later change through notify_views."""
+        for key, records in self.table().items():
+            view.apply(self.backend_table, key, records, 1)
+        self.views.append(view)
+
+    def notify_views(self, key, records, sign):
+        """Tells the views that records of key were added (sign 1) or removed (sign -1)."""
+        for view in self.views:
+            view.apply(self.backend_table, key, records, sign)
+
+    def allows_courses(self, key, course_ids):
+        """Asks the integrity checker, if any, whether key may reference course_ids."""
+        return self.integrity is None or self.integrity.allow(self.backend_table, key, course_ids)
+
+    @metrics.timed("journal.merge")
+    def merge_saved(self, originals=None):
+        """Applies changes other writers saved since the backend last synced; call while writing.
+
+        Keys in originals were also changed here, so they are merged record by record against
+        their original records instead of being replaced.
+        """
+        saved = self.backend.saved_changes(self.backend_table)
+        if saved is None:
+            return
+        metrics.increment("journal.conflicts")
+        table = self.table()
+        originals = originals or {}
+        changes, complete = saved
+        if complete:
+            changes = {key: changes.get(key) for key in set(table).union(changes) if table.get(key) != changes.get(key)}
+        for key, records in changes.items():
+            current = table.get(key)
+            if key in originals:
+                records = merge_records(originals[key], current, records)
+            if records == current:
+                continue
+            if current is not None:
+                self._index_remove(key, current)
+                del table[key]
+            if records:
+                table[key] = records
+                self._index_add(key, records)
+
+    @contextmanager
+    def rewriting(self):
+        """Keeps other writers out while the whole table is saved, applying their changes first."""
+        with self.backend.writing():
+            self.merge_saved()
+            yield
+
+    def _index_add(self, key, records):
+        """Hook for tables that keep indexes over their records."""
+
+    def _index_remove(self, key, records):
+        """Hook for tables that keep indexes over their records."""
+
+    def remember(self, key):
+        """Keeps a copy of a key's records so the open batch can roll them back and saves can merge them."""
+        originals = self._batch_originals
+        if originals is None:
+            originals = self._change_originals
+        records = self.table().get(key)
+        for savepoint in self._savepoints:
+            if key not in savepoint:
+                savepoint[key] = None if records is None else [dict(record) for record in records]
+        if key in originals:
+            return
+        originals[key] = None if records is None else [dict(record) for record in records]
+
+    def log_change(self, key):
+        """Persists one changed key, or leaves it for the open batch to persist."""
+        if self._batch_originals is None:
+            originals, self._change_originals = self._change_originals, {}
+            self._persist([key], originals)
+
+    @metrics.timed("journal.persist")
+    def _persist(self, keys, originals=None):
+        """Saves the current records of keys, or the whole table once the backend asks to compact."""
+        table = self.table()
+        with self.backend.writing():
+            self.merge_saved(originals)
+            changes = [("put", key, table[key]) if key in table else ("delete", key, None) for key in keys]
+            if self.backend.needs_compaction(len(changes)):
+                self.save_data()
+            else:
+                self.backend.apply(self.backend_table, changes)
+
+    def _rollback(self, originals):
+        """Restores the records saved by remember."""
+        table = self.table()
+        for key, records in originals.items():
+            if key in table:
+                self._index_remove(key, table[key])
+            if records is None:
+                table.pop(key, None)
+            else:
+                table[key] = records
+                self._index_add(key, records)
+
+    @contextmanager
+    def batch(self):
+        """Applies changes in memory and persists them once when the block ends, rolling back on error.
+
+        A nested batch joins the outer one; on error it rolls back only the changes made inside it.
+        """
+        if self._batch_originals is not None:
+            savepoint = {}
+            self._savepoints.append(savepoint)
+            try:
+                yield
+            except BaseException:
+                self._rollback(savepoint)
+                raise
+            finally:
+                self._savepoints.pop()
+            return
+        self._batch_originals = {}
+        try:
+            yield
+            if self._batch_originals:
+                self._persist(list(self._batch_originals), self._batch_originals)
+        except BaseException:
+            self._rollback(self._batch_originals)
+            raise
+        finally:
+            self._batch_originals = None
+
+
+def relative_grade(marks, course_mean):
+    """Grades marks against the course mean: A above it, B at it and C below it."""
+    if marks > course_mean:
+        return "A"
+    if marks == course_mean:
+        return "B"
+    return "C"
+
+
+def overall_grade(grades):
+    """Returns the most common of a student's grades, the better one on a tie."""
+    return max(sorted(set(grades)), key=grades.count)  # Sorted so ties do not depend on string hashing
+
+
+class CourseStats:
+    """Keeps the count, sum and sorted marks of one course."""
+
+    def __init__(self, marks=()):
+        self.sorted_marks = sorted(marks)
+        self.count = len(self.sorted_marks)
+        self.total = sum(self.sorted_marks)
+
+    def add(self, marks):
+        """Adds one mark to the course."""
+        bisect.insort(self.sorted_marks, marks)
+        self.count += 1
+        self.total += marks
+
+    def remove(self, marks):
+        """Removes one mark from the course."""
+        index = bisect.bisect_left(self.sorted_marks, marks)
+        del self.sorted_marks[index]
+        self.count -= 1
+        self.total -= marks
+
+    def mean(self):
+        """Returns the course mean."""
+        return self.total / self.count
+
+    def median(self):
+        """Returns the course median, same as statistics.median."""
+        middle = self.count // 2
+        if self.count % 2 == 1:
+            return self.sorted_marks[middle]
+        return (self.sorted_marks[middle - 1] + self.sorted_marks[middle]) / 2
+
+
+class RankIndex:
+    """Keeps (score, key) pairs ordered from the highest score down for rank and range queries."""
+
+    def __init__(self, pairs=()):
+        pairs = sorted((-score, key) for score, key in pairs)
+        self.negated_scores = [score for score, _ in pairs]  # Negated so equal scores stay in key order
+        self.keys = [key for _, key in pairs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _position(self, score, key):
+        low = bisect.bisect_left(self.negated_scores, -score)
+        high = bisect.bisect_right(self.negated_scores, -score, low)
+        return bisect.bisect_left(self.keys, key, low, high)
+
+    def add(self, score, key):
+        """Inserts one pair in order."""
+        position = self._position(score, key)
+        self.negated_scores.insert(position, -score)
+        self.keys.insert(position, key)
+
+    def remove(self, score, key):
+        """Removes one pair."""
+        position = self._position(score, key)
+        del self.negated_scores[position]
+        del self.keys[position]
+
+    def top(self, n):
+        """Returns the n highest (key, score) pairs."""
+        n = max(n, 0)
+        return [(key, -score) for score, key in zip(self.negated_scores[:n], self.keys[:n])]
+
+    def count_above(self, score):
+        """Returns how many pairs score higher."""
+        return bisect.bisect_left(self.negated_scores, -score)
+
+    def count_below(self, score):
+        """Returns how many pairs score lower."""
+        return len(self.keys) - bisect.bisect_right(self.negated_scores, -score)
+
+    def between(self, low, high):
+        """Returns the (key, score) pairs with low <= score <= high, highest first."""
+        start = bisect.bisect_left(self.negated_scores, -high)
+        end = bisect.bisect_right(self.negated_scores, -low)
+        return [(key, -score) for score, key in zip(self.negated_scores[start:end], self.keys[start:end])]
+
+
+class MarksRanking:
+    """Per-course rank indexes of marks and an overall rank index of each student's mean marks."""
+
+    def __init__(self, enrollments=()):
+        course_pairs = defaultdict(list)
+        self.totals = {}  # Email -> [total marks, number of courses]
+        for email, course_id, marks in enrollments:
+            course_pairs[course_id].append((marks, email))
+            totals = self.totals.setdefault(email, [0, 0])
+            totals[0] += marks
+            totals[1] += 1
+        self.courses = {course_id: RankIndex(pairs) for course_id, pairs in course_pairs.items()}
+        self.overall = RankIndex((total / count, email) for email, (total, count) in self.totals.items())
+
+    def mean(self, email):
+        """Returns a student's mean marks over all their courses."""
+        total, count = self.totals[email]
+        return total / count
+
+    def add(self, email, records):
+        """Adds a student's records to the course and overall indexes."""
+        if not records:
+            return
+        if email in self.totals:
+            self.overall.remove(self.mean(email), email)
+        totals = self.totals.setdefault(email, [0, 0])
+        for record in records:
+            if record["course_id"] not in self.courses:
+                self.courses[record["course_id"]] = RankIndex()
+            self.courses[record["course_id"]].add(record["marks"], email)
+            totals[0] += record["marks"]
+            totals[1] += 1
+        self.overall.add(self.mean(email), email)
+
+    def remove(self, email, records):
+        """Removes a student's records from the course and overall indexes."""
+        if not records:
+            return
+        self.overall.remove(self.mean(email), email)
+        totals = self.totals[email]
+        for record in records:
+            index = self.courses[record["course_id"]]
+            index.remove(record["marks"], email)
+            if not index:
+                del self.courses[record["course_id"]]
+            totals[0] -= record["marks"]
+            totals[1] -= 1
+        if totals[1]:
+            self.overall.add(self.mean(email), email)
+        else:
+            del self.totals[email]
+
+
+class EnrollmentStore(MutableMapping):
+    """Array-backed student records: names once per student, enrollments as small integer codes.
+
+    Behaves like the email -> list of record dicts mapping Student normally uses, but each
+    lookup builds fresh dicts, so changed records must be assigned back to take effect.
+    """
+
+    def __init__(self):
+        self.index = {}  # Email -> student slot
+        self.first_names = []
+        self.last_names = []
+        self.starts = array('q')  # First row of each student slot
+        self.counts = array('l')  # Number of rows of each student slot
+        self.course_ids = []  # Course code -> course ID
+        self.course_codes = {}  # Course ID -> course code
+        self.grade_names = []
+        self.grade_codes = {}
+        self.row_courses = array('H')
+        self.row_grades = array('B')
+        self.row_marks = array('h')
+        self.dead_rows = 0  # Rows left behind by replaced or deleted students
+
+    def _code(self, value, codes, values):
+        """Interns a course ID or grade as a small integer."""
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def _new_slot(self, email, first_name, last_name):
+        """Registers a student with no rows yet."""
+        slot = self.index[email] = len(self.starts)
+        self.first_names.append(sys.intern(first_name))
+        self.last_names.append(sys.intern(last_name))
+        self.starts.append(len(self.row_marks))
+        self.counts.append(0)
+        return slot
+
+    def _append(self, course_id, grade, marks):
+        """Adds one enrollment row at the end of the arrays."""
+        self.row_courses.append(self._code(course_id, self.course_codes, self.course_ids))
+        self.row_grades.append(self._code(grade, self.grade_codes, self.grade_names))
+        self.row_marks.append(marks)
+
+    def _move_to_end(self, slot):
+        """Copies a student's rows to the end so more rows can follow them."""
+        start, end = self.starts[slot], self.starts[slot] + self.counts[slot]
+        self.starts[slot] = len(self.row_marks)
+        self.row_courses.extend(self.row_courses[start:end])
+        self.row_grades.extend(self.row_grades[start:end])
+        self.row_marks.extend(self.row_marks[start:end])
+        self.dead_rows += end - start
+
+    def append_row(self, email, first_name, last_name, course_id, grade, marks):
+        """Adds one CSV row, as load_data does."""
+        slot = self.index.get(email)
+        if slot is None:
+            slot = self._new_slot(email, first_name, last_name)
+        elif self.starts[slot] + self.counts[slot] != len(self.row_marks):
+            self._move_to_end(slot)
+        self._append(course_id, grade, marks)
+        self.counts[slot] += 1
+
+    def __getitem__(self, email):
+        slot = self.index[email]
+        first_name, last_name = self.first_names[slot], self.last_names[slot]
+        start = self.starts[slot]
+        return [{
+            "first_name": first_name,
+            "last_name": last_name,
+            "course_id": self.course_ids[self.row_courses[row]],
+            "grade": self.grade_names[self.row_grades[row]],
+            "marks": self.row_marks[row]
+        } for row in range(start, start + self.counts[slot])]
+
+    def __setitem__(self, email, records):
+        slot = self.index.get(email)
+        first_name = records[0]["first_name"] if records else ""
+        last_name = records[0]["last_name"] if records else ""
+        if slot is None:
+            slot = self._new_slot(email, first_name, last_name)
+        else:
+            self.dead_rows += self.counts[slot]
+            self.first_names[slot] = sys.intern(first_name)
+            self.last_names[slot] = sys.intern(last_name)
+            self.starts[slot] = len(self.row_marks)
+        for record in records:
+            self._append(record["course_id"], record["grade"], record["marks"])
+        self.counts[slot] = len(records)
+        self._maybe_pack()
+
+    def __delitem__(self, email):
+        slot = self.index.pop(email)
+        self.dead_rows += self.counts[slot]
+        self.counts[slot] = 0
+        self.first_names[slot] = self.last_names[slot] = None
+        self._maybe_pack()
+
+    def __contains__(self, email):
+        return email in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def _maybe_pack(self):
+        """Packs the arrays once dead rows outnumber live ones."""
+        if self.dead_rows > 1024 and self.dead_rows > len(self.row_marks) - self.dead_rows:
+            self.pack()
+
+    def pack(self):
+        """Rewrites the arrays without dead rows or deleted student slots."""
+        old_starts, old_counts = self.starts, self.counts
+        old_first_names, old_last_names = self.first_names, self.last_names
+        old_courses, old_grades, old_marks = self.row_courses, self.row_grades, self.row_marks
+        self.first_names, self.last_names = [], []
+        self.starts, self.counts = array('q'), array('l')
+        self.row_courses, self.row_grades, self.row_marks = array('H'), array('B'), array('h')
+        for email, slot in self.index.items():
+            start, end = old_starts[slot], old_starts[slot] + old_counts[slot]
+            self.index[email] = len(self.starts)
+            self.first_names.append(old_first_names[slot])
+            self.last_names.append(old_last_names[slot])
+            self.starts.append(len(self.row_marks))
+            self.counts.append(end - start)
+            self.row_courses.extend(old_courses[start:end])
+            self.row_grades.extend(old_grades[start:end])
+            self.row_marks.extend(old_marks[start:end])
+        self.dead_rows = 0
+
+
+class LazyStudentRecords(MutableMapping):
+    """Email -> records mapping that reads a student's rows from the CSV on first access.
+
+    Anything that needs every student (iterating, len, saving) loads the whole file once.
+    """
+
+    def __init__(self, student_db):
+        self.student_db = student_db
+        self.cache = {}  # Email -> records, or None for students not in the data
+        self.loaded = None  # Full mapping once every student was needed
+
+    def _records(self, email):
+        """Returns the current records of one student, or None."""
+        if self.loaded is not None:
+            return self.loaded.get(email)
+        if email not in self.cache:
+            self.cache[email] = self.student_db.read_student(email)
+        return self.cache[email]
+
+    def load_all(self):
+        """Loads every student, keeping the changes made since the mapping was created."""
+        if self.loaded is not None:
+            return self.loaded
+        loaded = EnrollmentStore() if self.student_db.columnar else defaultdict(list)
+        for email, first_name, last_name, course_id, grade, marks in self.student_db.iter_records():
+            if email in self.cache:
+                continue
+            if self.student_db.columnar:
+                loaded.append_row(email, first_name, last_name, course_id, grade, marks)
+            else:
+                loaded[email].append({"first_name": first_name, "last_name": last_name,
+                                      "course_id": course_id, "grade": grade, "marks": marks})
+        for email, records in self.cache.items():
+            if records is not None:
+                loaded[email] = records
+        self.loaded = loaded
+        self.cache = {}
+        return loaded
+
+    def iter_enrollments(self):
+        """Streams (email, course_id, marks) of the current data without loading every student."""
+        if self.loaded is not None:
+            for email, records in self.loaded.items():
+                for record in records:
+                    yield email, record["course_id"], record["marks"]
+            return
+        for email, _, _, course_id, _, marks in self.student_db.iter_records():
+            if email not in self.cache:
+                yield email, course_id, marks
+        for email, records in self.cache.items():
+            for record in records or []:
+                yield email, record["course_id"], record["marks"]
+
+    def iter_course_marks(self):
+        """Streams (course_id, marks) of the current data without loading every student."""
+        for _, course_id, marks in self.iter_enrollments():
+            yield course_id, marks
+
+    def __getitem__(self, email):
+        records = self._records(email)
+        if records is None:
+            raise KeyError(email)
+        return records
+
+    def __setitem__(self, email, records):
+        if self.loaded is not None:
+            self.loaded[email] = records
+        else:
+            self.cache[email] = records
+
+    def __delitem__(self, email):
+        if email not in self:
+            raise KeyError(email)
+        if self.loaded is not None:
+            del self.loaded[email]
+        else:
+            self.cache[email] = None
+
+    def __contains__(self, email):
+        return self._records(email) is not None
+
+    def __iter__(self):
+        return iter(self.load_all())
+
+    def __len__(self):
+        return len(self.load_all())
+
+
+def split_csv_ranges(csv_file, parts):
+    """Splits a CSV file into about `parts` byte ranges that each start at a row boundary.
+
+    A newline only ends a row when it is outside quotes, so each cut moves forward to the
+    first newline after which the number of quote characters seen so far is even.
+    """
+    size = os.path.getsize(csv_file)
+    if size == 0:
+        return []
+    ranges = []
+    start = 0
+    quotes = 0  # Quote characters before `start`
+    with open(csv_file, mode='rb') as file:
+        while start < size:
+            cut = min(size, start + max(1, size // parts))
+            file.seek(start)
+            for position in range(start, cut, 1 << 24):
+                quotes += file.read(min(1 << 24, cut - position)).count(b'"')
+            while cut < size:
+                file.seek(cut)
+                line = file.readline()
+                cut += len(line)
+                quotes += line.count(b'"')
+                if quotes % 2 == 0:
+                    break
+            ranges.append((start, cut))
+            start = cut
+    return ranges
+
+
+_worker_state = ()  # Inputs a process pool started this worker with
+
+
+def init_worker(*state):
+    """Keeps a pool's shared inputs in the worker; with fork they are inherited instead of pickled."""
+    global _worker_state
+    _worker_state = state
+
+
+def worker_state():
+    """Returns the inputs this worker was started with by init_worker."""
+    return _worker_state
+
+
+def parse_student_range(csv_file, start, end, columnar=False, normalized=False):
+    """Parses the Student.csv rows in one byte range, skipping the header in the first range.
+
+    Returns marshal data, which is far cheaper to send between processes than a pickle: a list
+    of (email, first_name, last_name, course_id, grade, marks) rows for the columnar store,
+    otherwise email -> records in order of first appearance. Normalized enrollment rows get
+    their names from the names the worker was started with.
+    """
+    with open(csv_file, mode='rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    text = data.decode('utf-8-sig' if start == 0 else 'utf-8')
+    reader = csv.reader(io.StringIO(text))
+    if start == 0:
+        next(reader, None)  # Skip header
+    if normalized:
+        names, = _worker_state  # Email -> (first_name, last_name)
+        reader = ((email, *names.get(email, ("", "")), course_id, grade, marks) for email, course_id, grade, marks in reader)
+    with paused_gc():
+        if columnar:
+            return marshal.dumps([(email, first_name, last_name, course_id, grade, int(marks))
+                                  for email, first_name, last_name, course_id, grade, marks in reader])
+        students = defaultdict(list)
+        for email, first_name, last_name, course_id, grade, marks in reader:
+            students[email].append({
+                "first_name": first_name,
+                "last_name": last_name,
+                "course_id": course_id,
+                "grade": grade,
+                "marks": int(marks)
+            })
+        return marshal.dumps(dict(students))
+
+
+class StudentSearchIndex:
+    """Secondary indexes for student search: sorted names for prefix queries and posting lists of
+    the students in each course, with each grade and with each grade in a course.
+
+    Posting lists count records per email, so a student stays listed until their last matching
+    record is removed.
+    """
+
+    def __init__(self, rows=()):
+        self.name_counts = {}  # (email, first_name, last_name) -> records carrying that name
+        self.courses = defaultdict(dict)  # Course ID -> {email: records}
+        self.grades = defaultdict(dict)  # Grade -> {email: records}
+        self.course_grades = defaultdict(dict)  # (course ID, grade) -> {email: records}
+        for email, first_name, last_name, course_id, grade, _ in rows:
+            name = (email, first_name, last_name)
+            self.name_counts[name] = self.name_counts.get(name, 0) + 1
+            self._post(email, course_id, grade, 1)
+        self.names = sorted(key for name in self.name_counts for key in self._name_keys(*name))  # (lowercase name, email)
+
+    @staticmethod
+    def _name_keys(email, first_name, last_name):
+        return [(name.lower(), email) for name in (first_name, last_name, f"{first_name} {last_name}")]
+
+    def _post(self, email, course_id, grade, change):
+        for postings in (self.courses[course_id], self.grades[grade], self.course_grades[(course_id, grade)]):
+            count = postings.get(email, 0) + change
+            if count:
+                postings[email] = count
+            else:
+                del postings[email]
+
+    def add(self, email, records):
+        """Adds a student's records to the indexes."""
+        for record in records:
+            name = (email, record["first_name"], record["last_name"])
+            self.name_counts[name] = self.name_counts.get(name, 0) + 1
+            if self.name_counts[name] == 1:
+                for key in self._name_keys(*name):
+                    bisect.insort(self.names, key)
+            self._post(email, record["course_id"], record["grade"], 1)
+
+    def remove(self, email, records):
+        """Removes a student's records from the indexes."""
+        for record in records:
+            name = (email, record["first_name"], record["last_name"])
+            self.name_counts[name] -= 1
+            if not self.name_counts[name]:
+                del self.name_counts[name]
+                for key in self._name_keys(*name):
+                    del self.names[bisect.bisect_left(self.names, key)]
+            self._post(email, record["course_id"], record["grade"], -1)
+
+    def name_range(self, prefix):
+        """Returns the slice of names starting with prefix, ignoring case."""
+        prefix = prefix.lower()
+        return bisect.bisect_left(self.names, (prefix,)), bisect.bisect_left(self.names, (prefix + "\U0010ffff",))
+
+
+class Student(JournaledTable):
+    backend_table = "students"
+    parallel_min_bytes = 4 << 20  # Smaller files parse faster than a process pool starts
+
+    def __init__(self, csv_file, compact_threshold=1000, columnar=False, lazy=False, backend=None, snapshot=False,
+                 workers=None, names_file=None):
+        self.csv_file = csv_file
+        self.names_file = names_file  # Normalized layout: csv_file holds only enrollments, names_file one row per student
+        self.workers = workers  # Processes parsing the CSV in parallel; None parses it in this process
+        self.columnar = columnar  # Keep records in an EnrollmentStore instead of dicts
+        self.lazy = lazy  # Read each student's rows only when they are first needed
+        self.catalog = None  # Shared Catalog this table keeps current, if any
+        self.ranking = None  # MarksRanking, built on the first rank query
+        self.search_index = None  # StudentSearchIndex, built on the first search
+        # A snapshot keeps a binary copy of the parsed records for fast startup; only the plain dict store is snapshotted
+        self.init_journal(backend or CsvBackend(csv_file, names_file, compact_threshold,
+                                                snapshot=snapshot and not (lazy or columnar)))
+        with self.backend.reading():
+            if lazy:
+                self.students = LazyStudentRecords(self)
+                self.course_stats = None  # Built on the first report that needs course statistics
+            else:
+                self.load_data()
+
+    def table(self):
+        """Returns the student records keyed by email."""
+        return self.students
+
+    def iter_records(self, course_id=None):
+        """Streams (email, first_name, last_name, course_id, grade, marks) rows of the saved data."""
+        return self.backend.rows("students", course_id=course_id)
+
+    def iter_chunks(self, size, course_id=None):
+        """Streams the saved rows in lists of at most size rows."""
+        chunk = []
+        for row in self.iter_records(course_id):
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @metrics.timed("student.read")
+    def read_student(self, email):
+        """Reads one student's records from the saved data, or None if they are not in it."""
+        records = [{
+            "first_name": first_name,
+            "last_name": last_name,
+            "course_id": course_id,
+            "grade": grade,
+            "marks": marks
+        } for _, first_name, last_name, course_id, grade, marks in self.backend.rows("students", key=email)]
+        return records or None
+
+    @metrics.timed("student.load")
+    def load_data(self):
+        """Loads the saved records and course statistics, from the backend's snapshot while it is current."""
+        data = self.backend.cached("students", self._read_students)
+        self.students = data["students"] if self.columnar else defaultdict(list, data["students"])  # Dictionary to store student data
+        self.course_stats = {course: CourseStats(marks) for course, marks in data["course_marks"].items()}  # Course ID -> CourseStats
+
+    def _read_students(self):
+        """Reads the saved records, in worker processes when the backend can, and the sorted marks of each course."""
+        students = EnrollmentStore() if self.columnar else defaultdict(list)
+        if not self.backend.load_parallel("students", students, self.workers, self.columnar, self.parallel_min_bytes):
+            for email, first_name, last_name, course_id, grade, marks in self.backend.rows("students"):
+                if self.columnar:
+                    students.append_row(email, first_name, last_name, course_id, grade, marks)
+                    continue
+                students[email].append({
                     "first_name": first_name,
                     "last_name": last_name,
                     "course_id": course_id,
                     "grade": grade,
-                    "marks": int(marks)
+                    "marks": marks
                 })
+        course_marks = self._marks_by_course(students)
+        return {"students": students if self.columnar else dict(students),
+                "course_marks": {course: sorted(marks) for course, marks in course_marks.items()}}
 
+    @staticmethod
+    def _marks_by_course(students):
+        """Returns course ID -> marks of every record in students."""
+        course_marks = defaultdict(list)
+        for records in students.values():
+            for record in records:
+                course_marks[record["course_id"]].append(record["marks"])
+        return course_marks
+
+    @metrics.timed("student.build_course_stats")
+    def build_course_stats(self):
+        """Builds the per-course statistics index from all student records."""
+        if self.lazy:
+            course_marks = defaultdict(list)
+            for course_id, marks in self.students.iter_course_marks():
+                course_marks[course_id].append(marks)
+        else:
+            course_marks = self._marks_by_course(self.students)
+        self.course_stats = {course: CourseStats(marks) for course, marks in course_marks.items()}
+
+    def ensure_course_stats(self):
+        """Builds the course statistics if a lazy Student has not needed them yet."""
+        if self.course_stats is None:
+            self.build_course_stats()
+
+    @metrics.timed("student.build_ranking")
+    def build_ranking(self):
+        """Builds the per-course and overall rank indexes from all student records."""
+        if self.lazy:
+            enrollments = self.students.iter_enrollments()
+        else:
+            enrollments = ((email, record["course_id"], record["marks"])
+                           for email, records in self.students.items() for record in records)
+        self.ranking = MarksRanking(enrollments)
+
+    def ensure_ranking(self):
+        """Builds the rank indexes if no rank query has needed them yet."""
+        if self.ranking is None:
+            self.build_ranking()
+        return self.ranking
+
+    @metrics.timed("student.build_search_index")
+    def build_search_index(self):
+        """Builds the name, course and grade indexes used by search from all student records."""
+        if self.lazy:
+            rows = self.iter_records()
+        else:
+            rows = ((email, record["first_name"], record["last_name"], record["course_id"], record["grade"], record["marks"])
+                    for email, records in self.students.items() for record in records)
+        self.search_index = StudentSearchIndex(rows)
+
+    def ensure_search_index(self):
+        """Builds the search indexes if no search has needed them yet."""
+        if self.search_index is None:
+            self.build_search_index()
+        return self.search_index
+
+    def _index_add(self, email, records):
+        """Adds records to the per-course statistics index, the rank and search indexes, the shared catalog and the views."""
+        if self.catalog is not None:
+            self.catalog.add_enrollments(email, records)
+        if self.ranking is not None:
+            self.ranking.add(email, records)
+        if self.search_index is not None:
+            self.search_index.add(email, records)
+        self.notify_views(email, records, 1)
+        if self.course_stats is None:
+            return
+        for record in records:
+            if record["course_id"] not in self.course_stats:
+                self.course_stats[record["course_id"]] = CourseStats()
+            self.course_stats[record["course_id"]].add(record["marks"])
+
+    def _index_remove(self, email, records):
+        """Removes records from the per-course statistics index, the rank and search indexes, the shared catalog and the views."""
+        if self.catalog is not None:
+            self.catalog.remove_enrollments(email, records)
+        if self.ranking is not None:
+            self.ranking.remove(email, records)
+        if self.search_index is not None:
+            self.search_index.remove(email, records)
+        self.notify_views(email, records, -1)
+        if self.course_stats is None:
+            return
+        for record in records:
+            stats = self.course_stats[record["course_id"]]
+            stats.remove(record["marks"])
+            if stats.count == 0:
+                del self.course_stats[record["course_id"]]
+
+    @metrics.timed("student.display_records")
     def display_records(self, email):
-        """Displays student records based on email and tracks search time."""
-        start_time = time.time()  # Start time tracking
-        
+        """Displays student records based on email."""
         if email in self.students:
             records = self.students[email]
             print(f"Email ID: {email}")
@@ -47,62 +1861,126 @@ class Student:
         else:
             print("Student not found.")
 
-        end_time = time.time()  # End time tracking
-        print(f"Search completed in {end_time - start_time:.4f} seconds")  # Print time taken
-
+    @metrics.timed("student.add")
     def add_new_student(self, email, first_name, last_name, courses):
         """Adds a new student with their course details."""
         if email in self.students:
             print("Student already exists.")
             return
+        if not self.allows_courses(email, [course_id for course_id, _, _ in courses]):
+            return
         
-        for course_id, grade, marks in courses:
-            self.students[email].append({
-                "first_name": first_name,
-                "last_name": last_name,
-                "course_id": course_id,
-                "grade": grade,
-                "marks": int(marks)
-            })
-        self.save_data()
+        new_records = [{
+            "first_name": first_name,
+            "last_name": last_name,
+            "course_id": course_id,
+            "grade": grade,
+            "marks": int(marks)
+        } for course_id, grade, marks in courses]
+        self.remember(email)
+        if new_records:
+            self.students[email] = new_records
+            self._index_add(email, new_records)
+        self.log_change(email)
         print("Student added successfully.")
 
+    @metrics.timed("student.delete")
     def delete_student(self, email):
         """Deletes a student completely."""
         if email in self.students:
+            self.remember(email)
+            self._index_remove(email, self.students[email])
             del self.students[email]
-            self.save_data()
+            self.log_change(email)
             print("Student deleted successfully.")
         else:
             print("Student not found.")
 
+    @metrics.timed("student.update")
     def update_student_record(self, email, course_id, new_grade, new_marks):
         """Updates a student's specific course details."""
         if email in self.students:
-            for record in self.students[email]:
+            records = self.students[email]
+            for record in records:
                 if record["course_id"] == course_id:
+                    new_marks = int(new_marks)
+                    self.remember(email)
+                    self._index_remove(email, [record])
                     record["grade"] = new_grade
-                    record["marks"] = int(new_marks)
-                    self.save_data()
+                    record["marks"] = new_marks
+                    self._index_add(email, [record])
+                    self.students[email] = records
+                    self.log_change(email)
                     print("Record updated successfully.")
                     return
             print("Course not found for the student.")
         else:
             print("Student not found.")
 
+    @metrics.timed("student.bulk_upsert")
+    def bulk_upsert(self, rows):
+        """Adds or updates many (email, first_name, last_name, course_id, grade, marks) rows and saves once."""
+        parsed_rows = []
+        bad_rows = []
+        for number, row in enumerate(rows, start=1):
+            try:
+                email, first_name, last_name, course_id, grade, marks = row
+                if not email or not course_id:
+                    raise ValueError("missing email or course ID")
+                parsed_rows.append((email, first_name, last_name, course_id, grade, int(marks)))
+            except (TypeError, ValueError):
+                bad_rows.append(number)
+        if bad_rows:
+            raise ValueError(f"Invalid student rows: {bad_rows[:10]}")
+        if not self.allows_courses("imported rows", {row[3] for row in parsed_rows}):
+            raise ValueError("Student rows reference courses that do not exist")
+
+        with self.batch():
+            for email, first_name, last_name, course_id, grade, marks in parsed_rows:
+                self.remember(email)
+                records = self.students.get(email, [])
+                if records:
+                    self._index_remove(email, records)  # A rename touches every record of the student
+                record = next((record for record in records if record["course_id"] == course_id), None)
+                if record is None:
+                    records.append({"first_name": first_name, "last_name": last_name, "course_id": course_id,
+                                    "grade": grade, "marks": marks})
+                else:
+                    record.update(grade=grade, marks=marks)
+                for record in records:
+                    record.update(first_name=first_name, last_name=last_name)  # Names belong to the student
+                self.students[email] = records
+                self._index_add(email, records)
+        print(f"{len(parsed_rows)} student records saved successfully.")
+
+    @metrics.timed("student.bulk_delete")
+    def bulk_delete(self, emails):
+        """Deletes many students and saves once."""
+        deleted = 0
+        with self.batch():
+            for email in emails:
+                if email in self.students:
+                    self.remember(email)
+                    self._index_remove(email, self.students[email])
+                    del self.students[email]
+                    deleted += 1
+        print(f"{deleted} students deleted successfully.")
+
+    @metrics.timed("student.import_csv")
+    def import_csv(self, csv_file):
+        """Adds or updates every row of a CSV file laid out like Student.csv."""
+        with open_table(csv_file, encoding='utf-8-sig', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Skip header
+            self.bulk_upsert(reader)
+
+    @metrics.timed("student.check_my_marks")
     def check_my_marks(self, email):
         """Displays marks and calculates mean & median scores for each course and overall."""
-        start_time = time.time()  # Start time tracking
-        
-        import statistics
         if email not in self.students:
             print("Student not found.")
             return
-        
-        course_marks = defaultdict(list)
-        for records in self.students.values():
-            for record in records:
-                course_marks[record["course_id"]].append(record["marks"])
+        self.ensure_course_stats()
         
         print(f"Marks for {email}:")
         student_marks = []
@@ -110,86 +1988,414 @@ class Student:
             course = record["course_id"]
             marks = record["marks"]
             student_marks.append(marks)
-            mean_course = sum(course_marks[course]) / len(course_marks[course])
-            median_course = statistics.median(course_marks[course])
+            mean_course = self.course_stats[course].mean()
+            median_course = self.course_stats[course].median()
             print(f"Course ID: {course}, Marks: {marks}, Mean: {mean_course:.2f}, Median: {median_course:.2f}")
         
         mean_student = sum(student_marks) / len(student_marks)
         print(f"Overall Student Mean: {mean_student:.2f}")
 
-        end_time = time.time()  # End time tracking
-        print(f"Operation completed in {end_time - start_time:.4f} seconds")  # Print time taken
-
+    @metrics.timed("student.check_my_grade")
     def check_my_grade(self, email):
         """Displays grades and determines overall student grade based on mean marks."""
-        start_time = time.time()  # Start time tracking
-        
         if email not in self.students:
             print("Student not found.")
             return
-        
-        course_marks = defaultdict(list)
-        for records in self.students.values():
-            for record in records:
-                course_marks[record["course_id"]].append(record["marks"])
+        self.ensure_course_stats()
         
         student_grades = []
         print(f"Grades for {email}:")
         for record in self.students[email]:
             course = record["course_id"]
             marks = record["marks"]
-            mean_course = sum(course_marks[course]) / len(course_marks[course])
-            
-            if marks > mean_course:
-                grade = "A"
-            elif marks == mean_course:
-                grade = "B"
-            else:
-                grade = "C"
-            
+            mean_course = self.course_stats[course].mean()
+            grade = relative_grade(marks, mean_course)
             student_grades.append(grade)
             print(f"Course ID: {course}, Marks: {marks}, Assigned Grade: {grade}")
         
-        overall_grade = max(set(student_grades), key=student_grades.count)
-        print(f"Overall Student Grade: {overall_grade}")
+        print(f"Overall Student Grade: {overall_grade(student_grades)}")
+
+    def _course_marks(self, email, course_id):
+        """Returns a student's marks in a course, or None if they do not take it."""
+        for record in self.students.get(email) or []:
+            if record["course_id"] == course_id:
+                return record["marks"]
+        return None
+
+    @metrics.timed("student.top_n")
+    def top_n(self, course_id, n):
+        """Returns the n best (email, marks) pairs of a course, highest marks first."""
+        index = self.ensure_ranking().courses.get(course_id)
+        return index.top(n) if index is not None else []
+
+    @metrics.timed("student.rank_of")
+    def rank_of(self, email, course_id=None):
+        """Returns a student's rank (1 is best, ties share a rank) in a course, or overall by mean marks."""
+        ranking = self.ensure_ranking()
+        if course_id is None:
+            if email not in ranking.totals:
+                return None
+            return ranking.overall.count_above(ranking.mean(email)) + 1
+        marks = self._course_marks(email, course_id)
+        if marks is None:
+            return None
+        return ranking.courses[course_id].count_above(marks) + 1
+
+    @metrics.timed("student.percentile_of")
+    def percentile_of(self, email, course_id=None):
+        """Returns the percentile rank (0-100, ties count half) of a student's mean marks, or their marks in a course."""
+        ranking = self.ensure_ranking()
+        if course_id is None:
+            if email not in ranking.totals:
+                return None
+            index, score = ranking.overall, ranking.mean(email)
+        else:
+            score = self._course_marks(email, course_id)
+            if score is None:
+                return None
+            index = ranking.courses[course_id]
+        below = index.count_below(score)
+        equal = len(index) - below - index.count_above(score)
+        return 100 * (below + equal / 2) / len(index)
+
+    @metrics.timed("student.students_in_marks_range")
+    def students_in_marks_range(self, course_id, low, high):
+        """Returns the (email, marks) pairs of a course with low <= marks <= high, highest first."""
+        index = self.ensure_ranking().courses.get(course_id)
+        return index.between(low, high) if index is not None else []
+
+    def _name_matches(self, email, prefix):
+        for record in self.students.get(email) or []:
+            for name in (record["first_name"], record["last_name"], f"{record['first_name']} {record['last_name']}"):
+                if name.lower().startswith(prefix):
+                    return True
+        return False
+
+    @metrics.timed("student.search")
+    def search(self, name=None, course_id=None, grade=None, low=None, high=None, offset=0, limit=20):
+        """Returns the number of students matching every given filter and one page of their emails, in order.
+
+        name matches the start of a first, last or full name, ignoring case. grade, low and high
+        apply to the marks in course_id, or to any course and the mean marks when it is not given.
+        Only the smallest filter's matches are listed; each is then checked against the others.
+        """
+        index = self.ensure_search_index()
+        filters = []  # (matches, list the matches, check one email) for each filter given
+        if name:
+            start, end = index.name_range(name)
+            prefix = name.lower()
+            filters.append((end - start, lambda: {email for _, email in index.names[start:end]},
+                            lambda email: self._name_matches(email, prefix)))
+        if grade is not None:
+            postings = index.course_grades.get((course_id, grade), {}) if course_id is not None else index.grades.get(grade, {})
+            filters.append((len(postings), lambda: postings, postings.__contains__))
+        elif course_id is not None:
+            postings = index.courses.get(course_id, {})
+            filters.append((len(postings), lambda: postings, postings.__contains__))
+        if low is not None or high is not None:
+            low = float('-inf') if low is None else low
+            high = float('inf') if high is None else high
+            ranking = self.ensure_ranking()
+            if course_id is not None:
+                marks_index = ranking.courses.get(course_id, RankIndex())
+
+                def in_range(email):
+                    marks = self._course_marks(email, course_id)
+                    return marks is not None and low <= marks <= high
+            else:
+                marks_index = ranking.overall
 
-        end_time = time.time()  # End time tracking
-        print(f"Operation completed in {end_time - start_time:.4f} seconds")  # Print time taken
+                def in_range(email):
+                    return email in ranking.totals and low <= ranking.mean(email) <= high
+            size = len(marks_index) - marks_index.count_above(high) - marks_index.count_below(low)
+            filters.append((size, lambda: [email for email, _ in marks_index.between(low, high)], in_range))
 
+        if not filters:
+            matches = sorted(self.students)
+        else:
+            filters.sort(key=lambda item: item[0])
+            checks = [check for _, _, check in filters[1:]]
+            matches = sorted(email for email in set(filters[0][1]()) if all(check(email) for check in checks))
+        offset = max(offset, 0)
+        return len(matches), matches[offset:offset + max(limit, 0)]
+
+    @metrics.timed("student.recompute_all_grades")
+    def recompute_all_grades(self, apply=False):
+        """Assigns relative grades to every student in one vectorized pass, optionally saving them."""
+        from grade_analytics import GradeAnalytics
+        results = GradeAnalytics(self).recompute_all_grades()
+        if apply:
+            with self.batch():
+                for email, result in results.items():
+                    records = self.students[email]
+                    if any(record["grade"] != grade for record, (_, _, grade) in zip(records, result["courses"])):
+                        self.remember(email)
+                        self._index_remove(email, records)
+                        for record, (_, _, grade) in zip(records, result["courses"]):
+                            record["grade"] = grade
+                        self.students[email] = records
+                        self._index_add(email, records)
+        return results
+
+    @metrics.timed("student.save")
     def save_data(self):
-        """Saves updated data back to CSV."""
-        with open(self.csv_file, mode='w', newline='') as file:
+        """Saves every record through the backend, which empties the CSV's journal."""
+        with self.rewriting():
+            self.backend.replace_all("students", ((email, record["first_name"], record["last_name"], record["course_id"],
+                                                   record["grade"], record["marks"])
+                                                  for email, records in self.students.items() for record in records))
+                    
+def write_student_csv(rows, csv_file, names_file=None):
+    """Writes (email, first_name, last_name, course_id, grade, marks) rows as Student.csv, or normalized
+    into an enrollments file and a names file with one row per student.
+
+    Returns how many rows named their student differently from the student's first row; the
+    normalized layout keeps the first name. Enrollments are written first, so a crash between the
+    two files leaves names the journal still covers.
+    """
+    if names_file is None:
+        with atomic_open(csv_file) as file:
             writer = csv.writer(file)
             writer.writerow(["Email_address", "First_name", "Last_name", "Course.id", "grades", "Marks"])
-            for email, records in self.students.items():
-                for record in records:
-                    writer.writerow([email, record["first_name"], record["last_name"], record["course_id"], record["grade"], record["marks"]])
-                    
+            writer.writerows(rows)
+        return 0
+    names = {}  # Email -> (first_name, last_name) of the student's first row
+    renamed = 0
+    with atomic_open(csv_file) as file:
+        writer = csv.writer(file)
+        writer.writerow(["Email_address", "Course.id", "grades", "Marks"])
+        for email, first_name, last_name, course_id, grade, marks in rows:
+            if names.setdefault(email, (first_name, last_name)) != (first_name, last_name):
+                renamed += 1
+            writer.writerow([email, course_id, grade, marks])
+    with atomic_open(names_file) as file:
+        writer = csv.writer(file)
+        writer.writerow(["Email_address", "First_name", "Last_name"])
+        writer.writerows((email, first_name, last_name) for email, (first_name, last_name) in names.items())
+    return renamed
+
+
+def write_professor_csv(rows, csv_file, names_file=None):
+    """Writes (professor_id, professor_name, rank, course_id) rows as professor.csv, or normalized into
+    a teaching file and a names file with one row per professor.
+
+    Returns how many rows named their professor or rank differently from the professor's first row.
+    """
+    if names_file is None:
+        with atomic_open(csv_file, encoding='utf-8-sig') as file:
+            writer = csv.writer(file)
+            writer.writerow(["Professor_id", "professor_Name", "Rank", "course_id"])
+            writer.writerows(rows)
+        return 0
+    names = {}  # Professor ID -> (professor_name, rank) of the professor's first row
+    renamed = 0
+    with atomic_open(csv_file, encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Professor_id", "course_id"])
+        for professor_id, professor_name, rank, course_id in rows:
+            if names.setdefault(professor_id, (professor_name, rank)) != (professor_name, rank):
+                renamed += 1
+            writer.writerow([professor_id, course_id])
+    with atomic_open(names_file, encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Professor_id", "professor_Name", "Rank"])
+        writer.writerows((professor_id, professor_name, rank) for professor_id, (professor_name, rank) in names.items())
+    return renamed
+
+
+def write_login_csv(rows, csv_file):
+    """Writes (user_id, password, role) rows as login.csv."""
+    with atomic_open(csv_file, encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(['user_id', 'password', 'role'])
+        writer.writerows(rows)
+
+
+@metrics.timed("convert.students")
+def convert_students(source, target, source_names=None, target_names=None):
+    """Copies the student table, journal included, between the flat and the normalized layout.
+
+    A names file given for the source or the target means that side is normalized.
+    """
+    rows = Student(source, lazy=True, names_file=source_names).iter_records()
+    renamed = CsvBackend(target, target_names).replace_all("students", rows)
+    if renamed:
+        print(f"{renamed} rows named their student differently; the student's first name was kept.")
+    return renamed
+
+
+@metrics.timed("convert.professors")
+def convert_professors(source, target, source_names=None, target_names=None):
+    """Copies the professor table, journal included, between the flat and the normalized layout."""
+    professor_db = Professor(source, names_file=source_names)
+    rows = ((professor_id, record["professor_name"], record["rank"], record["course_id"])
+            for professor_id, records in professor_db.professors.items() for record in records)
+    renamed = CsvBackend(target, target_names).replace_all("professors", rows)
+    if renamed:
+        print(f"{renamed} rows named their professor differently; the professor's first name and rank were kept.")
+    return renamed
+
+
 class CourseDB:
-    def __init__(self, filename):
+    fieldnames = ['Course_id', 'Course_name', 'Description', 'Credits']
+
+    def __init__(self, filename, backend=None, snapshot=False):
         self.filename = filename
+        self.backend = backend or CsvBackend(filename, snapshot=snapshot)  # TableBackend holding the courses
+        self.rows = []  # Course rows in file order, cached from the backend
+        self.courses = {}  # Course ID -> first row with that ID
+        self._batch_backup = None  # Copy of the courses from before the open batch
+        self.catalog = None  # Shared Catalog reading these courses, if any
+        self.views = []  # Materialized views fed every course change
+        self._published = {}  # Course ID -> copy of the row the views last saw
+        self.integrity = None  # IntegrityChecker refusing to orphan enrollments, if any
+
+    def _reindex(self):
+        """Rebuild the Course ID lookup from the rows."""
+        self.courses = {}
+        for row in self.rows:
+            self.courses.setdefault(row['Course_id'], row)
+        self._publish_courses()
+
+    def register_view(self, view):
+        """Feeds the current courses to a view, then every later course change."""
+        self.refresh()
+        for course_id, row in self._published.items():
+            view.apply("courses", course_id, [row], 1)
+        self.views.append(view)
+        self._publish_courses()
+
+    def _publish_courses(self):
+        """Sends the views the courses added, removed or edited since they were last told."""
+        if not self.views:
+            return
+        # Rows are edited in place, so changes are found by comparing with copies; a course
+        # file holds few rows, and every write already touches all of them
+        for course_id, row in list(self._published.items()):
+            if self.courses.get(course_id) != row:
+                del self._published[course_id]
+                for view in self.views:
+                    view.apply("courses", course_id, [row], -1)
+        for course_id, row in self.courses.items():
+            if course_id not in self._published:
+                self._published[course_id] = dict(row)
+                for view in self.views:
+                    view.apply("courses", course_id, [self._published[course_id]], 1)
+
+    @metrics.timed("course.load")
+    def refresh(self):
+        """Re-read the courses only if they changed since they were last read or written."""
+        if self._batch_backup is not None:
+            return self.courses  # An open batch works on the in-memory courses
+        if self.backend.stale("courses"):
+            self.rows = self.backend.course_rows()
+            self._reindex()
+        return self.courses
 
     def load_courses(self):
         """Load courses from a CSV file."""
-        courses = []
-        with open(self.filename, mode='r', newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                courses.append(row)
-        return courses
+        self.refresh()
+        return list(self.rows)
+
+    @metrics.timed("course.lookup")
+    def get_course(self, course_id):
+        """Return one course row by ID, or None."""
+        return self.refresh().get(course_id)
+
+    @metrics.timed("course.save")
+    def save_courses(self, courses=None):
+        """Write all courses back to the backend, or leave them for the open batch to write."""
+        if courses is not None:
+            self.rows = list(courses)
+            self._reindex()
+        self._publish_courses()
+        if self._batch_backup is not None:
+            return
+        rows = self.backend.replace_courses(self.rows)
+        if rows != self.rows:
+            # Another process wrote since the rows were read; its changes to other courses were kept
+            self.rows = rows
+            self._reindex()
+
+    @contextmanager
+    def batch(self):
+        """Apply course changes in memory and write the file once when the block ends.
+
+        A nested batch joins the outer one; on error it rolls back only the changes made inside it.
+        """
+        if self._batch_backup is not None:
+            savepoint = [dict(row) for row in self.rows]
+            try:
+                yield
+            except BaseException:
+                self.rows = savepoint
+                self._reindex()
+                raise
+            return
+        self.refresh()
+        backup = self._batch_backup = [dict(row) for row in self.rows]
+        try:
+            yield
+            self._batch_backup = None
+            self.save_courses()
+        except BaseException:
+            self.rows = backup
+            self._reindex()
+            raise
+        finally:
+            self._batch_backup = None
+
+    @metrics.timed("course.bulk_upsert")
+    def bulk_upsert(self, courses):
+        """Add or update many courses given as dicts with the course.csv columns."""
+        courses = list(courses)
+        bad_rows = [number for number, course in enumerate(courses, start=1)
+                    if not course.get('Course_id') or any(field not in course for field in self.fieldnames)]
+        if bad_rows:
+            raise ValueError(f"Invalid course rows: {bad_rows[:10]}")
+
+        with self.batch():
+            for course in courses:
+                new_course = {field: course[field] for field in self.fieldnames}
+                if new_course['Course_id'] in self.courses:
+                    self.courses[new_course['Course_id']].update(new_course)
+                else:
+                    self.rows.append(new_course)
+                    self.courses[new_course['Course_id']] = new_course
+        print(f"{len(courses)} courses saved successfully.")
+
+    @metrics.timed("course.bulk_delete")
+    def bulk_delete(self, course_ids):
+        """Delete many courses with a single write."""
+        course_ids = set(course_ids)
+        if self.integrity is not None and not self.integrity.allow_removal(course_ids):
+            raise ValueError("Courses are still referenced by enrollments or teaching assignments")
+        with self.batch():
+            remaining = [row for row in self.rows if row['Course_id'] not in course_ids]
+            deleted = len(self.rows) - len(remaining)
+            self.save_courses(remaining)
+        print(f"{deleted} courses deleted successfully.")
+
+    @metrics.timed("course.import_csv")
+    def import_csv(self, filename):
+        """Add or update every course of a CSV file laid out like course.csv."""
+        with open_table(filename, encoding='utf-8-sig', newline='') as file:
+            self.bulk_upsert(csv.DictReader(file))
 
     def display_courses(self):
         """Display available courses and details of a selected course."""
-        courses = self.load_courses()
-        course_ids = [course['Course_id'] for course in courses]
-
         print("\nAvailable courses:")
         print("-" * 32)
-        for cid in course_ids:
-            print(f"     {cid}")
+        for course in self.load_courses():
+            print(f"     {course['Course_id']}")
 
         selected_id = input("\nEnter Course ID to view details: ").strip()
-        selected_course = next((course for course in courses if course['Course_id'] == selected_id), None)
+        self.show_course(selected_id)
+
+    @metrics.timed("course.display")
+    def show_course(self, course_id):
+        """Print the details of one course."""
+        selected_course = self.get_course(course_id)
 
         if selected_course:
             print("\nCourse Details:")
@@ -201,120 +2407,434 @@ class CourseDB:
             print("Course ID not found.")
 
     def add_new_course(self):
-        """Add a new course to the CSV file."""
+        """Ask for a new course and add it to the CSV file."""
         course_id = input("Enter Course ID: ").strip()
         course_name = input("Enter Course Name: ").strip()
         description = input("Enter Description: ").strip()
         credits = input("Enter Credits: ").strip()
+        self.add_course(course_id, course_name, description, credits)
 
+    @metrics.timed("course.add")
+    def add_course(self, course_id, course_name, description, credits):
+        """Add a new course to the CSV file."""
         new_course = {'Course_id': course_id, 'Course_name': course_name, 'Description': description, 'Credits': credits}
+        self.refresh()
+        self.rows.append(new_course)
+        self.courses.setdefault(course_id, new_course)
 
-        with open(self.filename, mode='a', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=['Course_id', 'Course_name', 'Description', 'Credits'])
-            writer.writerow(new_course)
+        if self._batch_backup is None:
+            self.backend.insert_course(new_course)
+        self._publish_courses()
 
         print("New course added successfully!")
 
     def delete_course(self):
-        """Delete a course by Course ID and update the CSV file."""
-        courses = self.load_courses()
+        """Ask for a Course ID and delete that course."""
         course_id_to_delete = input("Enter Course ID to delete: ").strip()
+        self.remove_course(course_id_to_delete)
 
-        updated_courses = [course for course in courses if course['Course_id'] != course_id_to_delete]
+    @metrics.timed("course.delete")
+    def remove_course(self, course_id):
+        """Delete a course by Course ID and update the CSV file."""
+        courses = self.refresh()
 
-        if len(updated_courses) == len(courses):
+        if course_id not in courses:
             print("Course ID not found.")
             return
+        if self.integrity is not None and not self.integrity.allow_removal([course_id]):
+            return
 
-        with open(self.filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=['Course_id', 'Course_name', 'Description', 'Credits'])
-            writer.writeheader()
-            writer.writerows(updated_courses)
+        self.rows = [course for course in self.rows if course['Course_id'] != course_id]
+        self._reindex()
+        if self._batch_backup is None:
+            self.backend.delete_course(course_id)
 
         print("Course deleted successfully and updated in the file!")
 
     def modify_course_details(self):
-        """Modify an existing course's details."""
-        courses = self.load_courses()
+        """Ask for a course and new values for its details."""
         course_id_to_modify = input("Enter Course ID to modify: ").strip()
+        course = self.get_course(course_id_to_modify)
 
-        for course in courses:
-            if course['Course_id'] == course_id_to_modify:
-                print("\nEnter new details (leave blank to keep existing values):")
-                new_name = input(f"New Course Name ({course['Course_name']}): ").strip() or course['Course_name']
-                new_description = input(f"New Description ({course['Description']}): ").strip() or course['Description']
-                new_credits = input(f"New Credits ({course['Credits']}): ").strip() or course['Credits']
-
-                course['Course_name'] = new_name
-                course['Description'] = new_description
-                course['Credits'] = new_credits
-                break
-        else:
+        if course is None:
             print("Course ID not found.")
             return
 
-        with open(self.filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=['Course_id', 'Course_name', 'Description', 'Credits'])
-            writer.writeheader()
-            writer.writerows(courses)
+        print("\nEnter new details (leave blank to keep existing values):")
+        new_name = input(f"New Course Name ({course['Course_name']}): ").strip() or None
+        new_description = input(f"New Description ({course['Description']}): ").strip() or None
+        new_credits = input(f"New Credits ({course['Credits']}): ").strip() or None
+        self.update_course_details(course_id_to_modify, new_name, new_description, new_credits)
 
-        print("Course details updated successfully!")
+    @metrics.timed("course.modify")
+    def update_course_details(self, course_id, new_name=None, new_description=None, new_credits=None):
+        """Modify an existing course's details, keeping any value given as None."""
+        course = self.refresh().get(course_id)
+
+        if course is None:
+            print("Course ID not found.")
+            return
 
+        course['Course_name'] = new_name or course['Course_name']
+        course['Description'] = new_description or course['Description']
+        course['Credits'] = new_credits or course['Credits']
 
-def show_professor_details_by_course(course_id):
-    """Display professor details for a given course."""
-    professors = []
+        if self._batch_backup is None:
+            self.backend.update_course(course)
+        self._publish_courses()
 
-    try:
-        # Read professor data
-        with open('professor.csv', 'r', encoding='utf-8-sig') as prof_file:
-            prof_reader = csv.DictReader(prof_file)
-
-            # Get actual column names from CSV
-            headers = prof_reader.fieldnames
-            print(f"CSV Headers Found: {headers}")  # Debugging step
-
-            professor_id_col = 'Professor_id' if 'Professor_id' in headers else headers[0]
-            professor_name_col = 'professor_Name' if 'professor_Name' in headers else headers[1]
-            rank_col = 'Rank' if 'Rank' in headers else headers[2]
-            course_id_col = 'course_id' if 'course_id' in headers else headers[3]
-
-            for row in prof_reader:
-                if row[course_id_col] == course_id:
-                    professors.append({
-                        "Professor_id": row[professor_id_col],
-                        "Professor_Name": row[professor_name_col],
-                        "Rank": row[rank_col]
-                    })
-
-    except FileNotFoundError:
-        print("Professor data file not found.")
-        return
+        print("Course details updated successfully!")
 
-    # Read course data (for validation)
-    course_found = False
-    try:
-        with open('course.csv', 'r', encoding='utf-8-sig') as course_file:
-            course_reader = csv.DictReader(course_file)
-            for row in course_reader:
-                if row['Course_id'] == course_id:
-                    course_found = True
-                    break
-    except FileNotFoundError:
-        print("Course data file not found.")
+
+class Catalog:
+    """Hash indexes linking courses, professors and students, loaded once and kept current by the DBs."""
+
+    def __init__(self, student_db=None, professor_db=None, course_db=None):
+        self.student_db = student_db
+        self.professor_db = professor_db
+        self.course_db = course_db
+        self.course_professors = defaultdict(dict)  # Course ID -> professor ID -> record
+        self.course_students = defaultdict(dict)  # Course ID -> email -> enrollment count
+        for db in (student_db, professor_db, course_db):
+            if db is not None:
+                db.catalog = self
+        self.rebuild()
+
+    @metrics.timed("catalog.rebuild")
+    def rebuild(self):
+        """Builds every index from the attached DBs."""
+        self.course_professors.clear()
+        self.course_students.clear()
+        if self.course_db is not None:
+            self.course_db.refresh()
+        if self.professor_db is not None:
+            for professor_id, records in self.professor_db.professors.items():
+                self.add_teaching(professor_id, records)
+        if self.student_db is not None:
+            for email, records in self.student_db.students.items():
+                self.add_enrollments(email, records)
+
+    @property
+    def courses(self):
+        """Course ID -> course row, shared with the attached CourseDB."""
+        return self.course_db.courses if self.course_db is not None else {}
+
+    def add_teaching(self, professor_id, records):
+        """Indexes a professor's teaching assignments."""
+        for record in records:
+            self.course_professors[record["course_id"]][professor_id] = record
+
+    def remove_teaching(self, professor_id, records):
+        """Drops a professor's teaching assignments."""
+        for record in records:
+            professors = self.course_professors.get(record["course_id"])
+            if professors is not None:
+                professors.pop(professor_id, None)
+                if not professors:
+                    del self.course_professors[record["course_id"]]
+
+    def add_enrollments(self, email, records):
+        """Indexes a student's enrollments."""
+        for record in records:
+            students = self.course_students[record["course_id"]]
+            students[email] = students.get(email, 0) + 1
+
+    def remove_enrollments(self, email, records):
+        """Drops a student's enrollments."""
+        for record in records:
+            students = self.course_students.get(record["course_id"])
+            if students is None or email not in students:
+                continue
+            students[email] -= 1
+            if students[email] == 0:
+                del students[email]
+            if not students:
+                del self.course_students[record["course_id"]]
+
+    def course(self, course_id):
+        """Returns the course row, or None."""
+        return self.courses.get(course_id)
+
+    def professors_for_course(self, course_id):
+        """Returns (professor_id, record) pairs of everyone teaching a course."""
+        return list(self.course_professors.get(course_id, {}).items())
+
+    def courses_for_professor(self, professor_id):
+        """Returns the course IDs a professor teaches."""
+        if self.professor_db is None:
+            return []
+        return [record["course_id"] for record in self.professor_db.professors.get(professor_id, [])]
+
+    def students_in_course(self, course_id):
+        """Returns the emails enrolled in a course."""
+        return list(self.course_students.get(course_id, {}))
+
+
+class CourseRosterView:
+    """Materialized per-course enrollment counts, stored grade distribution and total marks.
+
+    Registered with the student and course tables; every change costs O(1) per record.
+    """
+
+    def __init__(self):
+        self.enrolled = defaultdict(int)  # Course ID -> enrollments
+        self.grades = defaultdict(dict)  # Course ID -> grade -> enrollments
+        self.marks = defaultdict(int)  # Course ID -> total marks
+        self.courses = {}  # Course ID -> course row
+
+    def apply(self, table, key, records, sign):
+        """Adds (sign 1) or removes (sign -1) the records of one student or course."""
+        if table == "courses":
+            if sign > 0:
+                self.courses[key] = records[0]
+            else:
+                self.courses.pop(key, None)
+            return
+        if table != "students":
+            return
+        for record in records:
+            course_id = record["course_id"]
+            grades = self.grades[course_id]
+            grades[record["grade"]] = grades.get(record["grade"], 0) + sign
+            if not grades[record["grade"]]:
+                del grades[record["grade"]]
+            self.marks[course_id] += sign * record["marks"]
+            self.enrolled[course_id] += sign
+            if not self.enrolled[course_id]:
+                del self.enrolled[course_id], self.grades[course_id], self.marks[course_id]
+
+    def course(self, course_id):
+        """Returns one course's enrollments, grade distribution and mean marks."""
+        enrolled = self.enrolled.get(course_id, 0)
+        course = self.courses.get(course_id)
+        return {
+            "course_id": course_id,
+            "course_name": course["Course_name"] if course else None,
+            "enrolled": enrolled,
+            "grades": dict(sorted(self.grades.get(course_id, {}).items())),
+            "mean_marks": self.marks[course_id] / enrolled if enrolled else None,
+        }
+
+    def summary(self):
+        """Returns every course in the catalog or with enrollments, by Course ID."""
+        return [self.course(course_id) for course_id in sorted(set(self.courses).union(self.enrolled))]
+
+
+class ProfessorLoadView:
+    """Materialized teaching load of each professor, read together with a CourseRosterView for their students' marks.
+
+    Registered with the professor table; every change costs O(1) per record.
+    """
+
+    def __init__(self, roster):
+        self.roster = roster
+        self.teaching = defaultdict(dict)  # Professor ID -> course ID -> assignments
+        self.names = {}  # Professor ID -> name
+
+    def apply(self, table, key, records, sign):
+        """Adds (sign 1) or removes (sign -1) the records of one professor."""
+        if table != "professors":
+            return
+        courses = self.teaching[key]
+        for record in records:
+            courses[record["course_id"]] = courses.get(record["course_id"], 0) + sign
+            if not courses[record["course_id"]]:
+                del courses[record["course_id"]]
+            if sign > 0:
+                self.names[key] = record["professor_name"]
+        if not courses:
+            del self.teaching[key]
+            self.names.pop(key, None)
+
+    def professor(self, professor_id):
+        """Returns one professor's courses, students taught and mean marks over those courses."""
+        course_ids = sorted(self.teaching.get(professor_id, {}))
+        enrolled = sum(self.roster.enrolled.get(course_id, 0) for course_id in course_ids)
+        marks = sum(self.roster.marks.get(course_id, 0) for course_id in course_ids)
+        return {
+            "professor_id": professor_id,
+            "professor_name": self.names.get(professor_id),
+            "courses": course_ids,
+            "enrolled": enrolled,
+            "mean_marks": marks / enrolled if enrolled else None,
+        }
+
+    def summary(self):
+        """Returns every professor with a course, by professor ID."""
+        return [self.professor(professor_id) for professor_id in sorted(self.teaching)]
+
+
+class Dashboard:
+    """Course and professor views kept live by the tables' change events, read instantly by the menu."""
+
+    def __init__(self, student_db=None, professor_db=None, course_db=None):
+        self.roster = CourseRosterView()
+        self.teaching = ProfessorLoadView(self.roster)
+        for db, view in ((course_db, self.roster), (student_db, self.roster), (professor_db, self.teaching)):
+            if db is not None:
+                db.register_view(view)
+
+    def course_summary(self):
+        return self.roster.summary()
+
+    def professor_summary(self):
+        return self.teaching.summary()
+
+    @metrics.timed("dashboard.show")
+    def show(self):
+        """Prints the course and professor views."""
+        print("\nCourses:")
+        for course in self.roster.summary():
+            mean = f"{course['mean_marks']:.2f}" if course['mean_marks'] is not None else "-"
+            grades = ', '.join(f"{grade}: {count}" for grade, count in course['grades'].items()) or "-"
+            print(f"{course['course_id']}, Name: {course['course_name'] or '-'}, Enrolled: {course['enrolled']}, "
+                  f"Mean: {mean}, Grades: {grades}")
+        print("\nProfessors:")
+        for professor in self.teaching.summary():
+            mean = f"{professor['mean_marks']:.2f}" if professor['mean_marks'] is not None else "-"
+            print(f"{professor['professor_id']}, Name: {professor['professor_name']}, Courses: {len(professor['courses'])} "
+                  f"({', '.join(professor['courses'])}), Students: {professor['enrolled']}, Mean: {mean}")
+
+
+@metrics.timed("integrity.check")
+def find_orphans(course_ids, student_db=None, professor_db=None):
+    """Returns (table, key, course_id) for every enrollment and teaching assignment whose course is not in course_ids.
+
+    One hash join: course_ids is a set and every row is probed against it once. A lazy
+    student table is streamed from its saved data instead of being loaded.
+    """
+    orphans = []
+    if student_db is not None:
+        if isinstance(student_db.students, LazyStudentRecords):
+            rows = ((row[0], row[3]) for row in student_db.iter_records())
+        else:
+            rows = ((email, record["course_id"]) for email, records in student_db.students.items() for record in records)
+        orphans.extend(("students", email, course_id) for email, course_id in rows if course_id not in course_ids)
+    if professor_db is not None:
+        orphans.extend(("professors", professor_id, record["course_id"])
+                       for professor_id, records in professor_db.professors.items()
+                       for record in records if record["course_id"] not in course_ids)
+    metrics.increment("integrity.orphans", len(orphans))
+    return orphans
+
+
+def report_orphans(orphans):
+    """Prints how many enrollments and teaching assignments reference each missing course."""
+    if not orphans:
+        print("Every course ID enrolled in or taught exists in the course table.")
         return
+    counts = defaultdict(lambda: [0, 0])  # Missing course ID -> [enrollments, teaching assignments]
+    for table, _, course_id in orphans:
+        counts[course_id][table == "professors"] += 1
+    print(f"{len(orphans)} rows reference {len(counts)} courses that do not exist:")
+    for course_id, (enrolled, taught) in sorted(counts.items()):
+        print(f"Course ID: {course_id}, Enrollments: {enrolled}, Teaching assignments: {taught}")
+
+
+class IntegrityChecker:
+    """Keeps the course IDs in Student and professor data pointing at courses that exist.
+
+    check() finds every violation with one hash join. Unless attach is False the checker is
+    also registered as a view with the tables, keeping the course IDs and per-course
+    reference counts current, so each mutation is vetted in O(1) per course ID before it is
+    applied: violations are reported, or refused as well when block is set.
+    """
+
+    def __init__(self, student_db=None, professor_db=None, course_db=None, block=False, attach=True):
+        self.student_db = student_db
+        self.professor_db = professor_db
+        self.course_db = course_db
+        self.block = block
+        self.course_ids = set()
+        self.references = {"students": defaultdict(int), "professors": defaultdict(int)}  # Table -> course ID -> rows
+        for db in (course_db, student_db, professor_db) if attach else ():
+            if db is not None:
+                db.register_view(self)
+                db.integrity = self
+
+    def apply(self, table, key, records, sign):
+        """Adds (sign 1) or removes (sign -1) a course, or the course references of one student or professor."""
+        if table == "courses":
+            if sign > 0:
+                self.course_ids.add(key)
+            else:
+                self.course_ids.discard(key)
+            return
+        references = self.references.get(table)
+        if references is None:
+            return
+        for record in records:
+            references[record["course_id"]] += sign
+            if not references[record["course_id"]]:
+                del references[record["course_id"]]
+
+    def allow(self, table, key, course_ids):
+        """Reports the course IDs of key's rows in table that do not exist; returns False when blocking and there were any."""
+        missing = sorted(set(course_ids).difference(self.course_ids))
+        if not missing:
+            return True
+        metrics.increment("integrity.violations")
+        action = "Refused" if self.block else "Warning"
+        print(f"{action}: unknown Course ID(s) {', '.join(missing)} for {key}.")
+        return not self.block
+
+    def allow_removal(self, course_ids):
+        """Reports courses that enrollments or teaching assignments still reference; returns False when blocking and there were any."""
+        referenced = False
+        for course_id in sorted(course_ids):
+            enrolled = self.references["students"].get(course_id, 0)
+            taught = self.references["professors"].get(course_id, 0)
+            if enrolled or taught:
+                referenced = True
+                metrics.increment("integrity.violations")
+                action = "Refused" if self.block else "Warning"
+                print(f"{action}: Course ID {course_id} still has {enrolled} enrollments and {taught} teaching assignments.")
+        return not (referenced and self.block)
+
+    def check(self):
+        """Returns (table, key, course_id) for every row referencing a course that does not exist."""
+        course_ids = set(self.course_db.refresh()) if self.course_db is not None else set()
+        return find_orphans(course_ids, self.student_db, self.professor_db)
+
+
+def check_tables(directory='.', suffix=''):
+    """Checks the saved tables in directory, journals included, for course IDs missing from the course table; returns the orphaned rows."""
+    course_ids = set(CourseDB(os.path.join(directory, 'course.csv' + suffix)).refresh())
+    student_csv, student_names = table_layout('Student.csv', directory, suffix)
+    professor_csv, professor_names = table_layout('professor.csv', directory, suffix)
+    orphans = find_orphans(course_ids, Student(student_csv, lazy=True, names_file=student_names),
+                           Professor(professor_csv, names_file=professor_names))
+    report_orphans(orphans)
+    return orphans
+
+
+@metrics.timed("professor.details_by_course")
+def show_professor_details_by_course(course_id, catalog=None):
+    """Display professor details for a given course."""
+    if catalog is None:
+        try:
+            professor_db = Professor('professor.csv')
+        except FileNotFoundError:
+            print("Professor data file not found.")
+            return
+        try:
+            catalog = Catalog(professor_db=professor_db, course_db=CourseDB('course.csv'))
+        except FileNotFoundError:
+            print("Course data file not found.")
+            return
 
-    if not course_found:
+    if catalog.course(course_id) is None:
         print(f"Course ID '{course_id}' not found.")
         return
 
     # Display professor details
+    professors = catalog.professors_for_course(course_id)
     if professors:
         print(f"Professor details for course ID '{course_id}':\n")
-        for prof in professors:
-            print(f"Professor ID: {prof['Professor_id']}")
-            print(f"Professor Name: {prof['Professor_Name']}")
-            print(f"Rank: {prof['Rank']}\n")
+        for professor_id, record in professors:
+            print(f"Professor ID: {professor_id}")
+            print(f"Professor Name: {record['professor_name']}")
+            print(f"Rank: {record['rank']}\n")
     else:
         print(f"No professor found for course ID '{course_id}'.")                    
 
@@ -326,25 +2846,40 @@ def show_professor_details_by_course(course_id):
         
         
         
-class Professor:
-    def __init__(self, csv_file):
+class Professor(JournaledTable):
+    backend_table = "professors"
+
+    def __init__(self, csv_file, compact_threshold=1000, backend=None, snapshot=False, names_file=None):
         self.csv_file = csv_file
+        self.names_file = names_file  # Normalized layout: csv_file holds only teaching assignments, names_file one row per professor
         self.professors = defaultdict(list)
-        self.load_data()
-
+        self.catalog = None  # Shared Catalog this table keeps current, if any
+        self.init_journal(backend or CsvBackend(csv_file, names_file, compact_threshold, snapshot=snapshot))
+        with self.backend.reading():
+            self.load_data()
+
+    def table(self):
+        """Returns the professor records keyed by professor ID."""
+        return self.professors
+
+    def _index_add(self, professor_id, records):
+        """Adds teaching assignments to the shared catalog and the views."""
+        if self.catalog is not None:
+            self.catalog.add_teaching(professor_id, records)
+        self.notify_views(professor_id, records, 1)
+
+    def _index_remove(self, professor_id, records):
+        """Removes teaching assignments from the shared catalog and the views."""
+        if self.catalog is not None:
+            self.catalog.remove_teaching(professor_id, records)
+        self.notify_views(professor_id, records, -1)
+
+    @metrics.timed("professor.load")
     def load_data(self):
-        """Loads data from CSV into a dictionary."""
-        with open(self.csv_file, mode='r', encoding='utf-8-sig') as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            for row in reader:
-                professor_id, professor_name, rank, course_id = row
-                self.professors[professor_id].append({
-                    "professor_name": professor_name,
-                    "rank": rank,
-                    "course_id": course_id
-                })
+        """Loads data from the backend into a dictionary, from its snapshot while it is current."""
+        self.professors = defaultdict(list, self.backend.cached("professors", lambda: dict(self.backend.records("professors"))))
 
+    @metrics.timed("professor.details")
     def display_professors_details(self, professor_id):
         """Displays professor details based on ID."""
         if professor_id in self.professors:
@@ -355,40 +2890,43 @@ class Professor:
             print("Courses:", ', '.join([rec['course_id'] for rec in records]))
         else:
             print("Professor not found.")
-            
-    def add_user(self, user_id, password, role):
-        """Adds a new user with a hashed password."""
-        if user_id in self.users:
-            print("User ID already exists! Choose another.")
-            return
-        hashed_password = self.hash_password(password)
-        self.users[user_id] = {'password': hashed_password, 'role': role}
-        self.save_users()
-        print(f"User '{user_id}' added successfully!")
 
+    @metrics.timed("professor.add")
     def add_new_professor(self, professor_id, professor_name, rank, courses):
         """Adds a new professor with their course details."""
-        for course_id in courses:
-            self.professors[professor_id].append({
-                "professor_name": professor_name,
-                "rank": rank,
-                "course_id": course_id.strip()
-            })
-        self.save_data()
+        if not self.allows_courses(professor_id, [course_id.strip() for course_id in courses]):
+            return
+        self.remember(professor_id)
+        new_records = [{
+            "professor_name": professor_name,
+            "rank": rank,
+            "course_id": course_id.strip()
+        } for course_id in courses]
+        self.professors[professor_id].extend(new_records)
+        self._index_add(professor_id, new_records)
+        self.log_change(professor_id)
         print("Professor added successfully.")
 
+    @metrics.timed("professor.delete")
     def delete_professor(self, professor_id):
         """Deletes a professor completely."""
         if professor_id in self.professors:
+            self.remember(professor_id)
+            self._index_remove(professor_id, self.professors[professor_id])
             del self.professors[professor_id]
-            self.save_data()
+            self.log_change(professor_id)
             print("Professor deleted successfully.")
         else:
             print("Professor not found.")
 
+    @metrics.timed("professor.modify")
     def modify_professor_details(self, professor_id, new_name=None, new_rank=None, new_courses=None):
         """Modifies a professor's details."""
         if professor_id in self.professors:
+            if new_courses and not self.allows_courses(professor_id, [course.strip() for course in new_courses]):
+                return
+            self.remember(professor_id)
+            self._index_remove(professor_id, self.professors[professor_id])
             for record in self.professors[professor_id]:
                 record["professor_name"] = new_name if new_name else record["professor_name"]
                 record["rank"] = new_rank if new_rank else record["rank"]
@@ -398,11 +2936,65 @@ class Professor:
                     "rank": new_rank or record["rank"],
                     "course_id": course.strip()
                 } for course in new_courses]
-            self.save_data()
+            self._index_add(professor_id, self.professors[professor_id])
+            self.log_change(professor_id)
             print("Professor details modified successfully.")
         else:
             print("Professor not found.")
 
+    @metrics.timed("professor.bulk_upsert")
+    def bulk_upsert(self, rows):
+        """Adds or updates many (professor_id, professor_name, rank, course_id) rows and saves once."""
+        parsed_rows = []
+        bad_rows = []
+        for number, row in enumerate(rows, start=1):
+            try:
+                professor_id, professor_name, rank, course_id = row
+                if not professor_id or not course_id:
+                    raise ValueError("missing professor ID or course ID")
+                parsed_rows.append((professor_id, professor_name, rank, course_id.strip()))
+            except (TypeError, ValueError):
+                bad_rows.append(number)
+        if bad_rows:
+            raise ValueError(f"Invalid professor rows: {bad_rows[:10]}")
+        if not self.allows_courses("imported rows", {row[3] for row in parsed_rows}):
+            raise ValueError("Professor rows reference courses that do not exist")
+
+        with self.batch():
+            for professor_id, professor_name, rank, course_id in parsed_rows:
+                self.remember(professor_id)
+                records = self.professors[professor_id]
+                self._index_remove(professor_id, records)
+                if not any(record["course_id"] == course_id for record in records):
+                    records.append({"professor_name": professor_name, "rank": rank, "course_id": course_id})
+                for record in records:
+                    record["professor_name"] = professor_name
+                    record["rank"] = rank
+                self._index_add(professor_id, records)
+        print(f"{len(parsed_rows)} professor records saved successfully.")
+
+    @metrics.timed("professor.bulk_delete")
+    def bulk_delete(self, professor_ids):
+        """Deletes many professors and saves once."""
+        deleted = 0
+        with self.batch():
+            for professor_id in professor_ids:
+                if professor_id in self.professors:
+                    self.remember(professor_id)
+                    self._index_remove(professor_id, self.professors[professor_id])
+                    del self.professors[professor_id]
+                    deleted += 1
+        print(f"{deleted} professors deleted successfully.")
+
+    @metrics.timed("professor.import_csv")
+    def import_csv(self, csv_file):
+        """Adds or updates every row of a CSV file laid out like professor.csv."""
+        with open_table(csv_file, encoding='utf-8-sig', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)  # Skip header
+            self.bulk_upsert(reader)
+
+    @metrics.timed("professor.courses")
     def show_course_details_by_professor(self, professor_id, course_csv):
         """Displays course details for a professor."""
         professor_courses = [rec['course_id'] for rec in self.professors.get(professor_id, [])]
@@ -413,90 +3005,406 @@ class Professor:
         print(f"Professor {professor_id} teaches: {', '.join(professor_courses)}\n")
         print("Course Details:")
         
-        with open(course_csv, mode='r', encoding='utf-8-sig') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                if row['Course_id'] in professor_courses:
-                    print(f"Course ID: {row['Course_id']}, Name: {row['Course_name']}, Description: {row['Description']}, Credits: {row['Credits']}")
+        if self.catalog is not None:
+            rows = [self.catalog.courses[course_id] for course_id in professor_courses if course_id in self.catalog.courses]
+        else:
+            wanted = set(professor_courses)
+            with open_table(course_csv, encoding='utf-8-sig') as file:
+                rows = [row for row in csv.DictReader(file) if row['Course_id'] in wanted]
+        for row in rows:
+            print(f"Course ID: {row['Course_id']}, Name: {row['Course_name']}, Description: {row['Description']}, Credits: {row['Credits']}")
 
+    @metrics.timed("professor.save")
     def save_data(self):
-        """Saves updated data back to CSV."""
-        with open(self.csv_file, mode='w', newline='', encoding='utf-8-sig') as file:
-            writer = csv.writer(file)
-            writer.writerow(["Professor_id", "professor_Name", "Rank", "course_id"])
-            for professor_id, records in self.professors.items():
-                for record in records:
-                    writer.writerow([professor_id, record["professor_name"], record["rank"], record["course_id"]])
+        """Saves every record through the backend, which empties the CSV's journal."""
+        with self.rewriting():
+            self.backend.replace_all("professors", ((professor_id, record["professor_name"], record["rank"], record["course_id"])
+                                                    for professor_id, records in self.professors.items() for record in records))
+
+
+PASSWORD_COSTS = {"scrypt": 1 << 14, "pbkdf2_sha256": 600_000}  # Default work factor of each scheme
+
+
+def _derive_key(password, scheme, cost, salt):
+    if scheme == "scrypt":
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=cost, r=8, p=1, maxmem=256 * 8 * cost, dklen=32)
+    if scheme == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode('utf-8'), salt, cost)
+    raise ValueError(f"Unknown password scheme: {scheme}")
+
+
+def hash_password(password, scheme="scrypt", cost=None):
+    """Hashes a password with a random salt, returning scheme$cost$salt$hash."""
+    cost = cost or PASSWORD_COSTS[scheme]
+    salt = os.urandom(16)
+    return f"{scheme}${cost}${salt.hex()}${_derive_key(password, scheme, cost, salt).hex()}"
+
+
+def verify_password(password, stored):
+    """Checks a password against a stored hash, or against a plaintext password saved before hashing."""
+    scheme, _, rest = stored.partition("$")
+    if scheme not in PASSWORD_COSTS:
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    try:
+        cost, salt, digest = rest.split("$")
+        key = _derive_key(password, scheme, int(cost), bytes.fromhex(salt))
+    except (ValueError, OverflowError):
+        return False  # A damaged hash, such as a truncated field or a cost the scheme refuses, matches no password
+    return hmac.compare_digest(key.hex(), digest)
+
+
+def needs_rehash(stored, scheme="scrypt", cost=None):
+    """Tells whether a stored password is plaintext or was hashed with other settings."""
+    return not stored.startswith(f"{scheme}${cost or PASSWORD_COSTS[scheme]}$")
+
+
+class SessionStore:
+    """In-memory session tokens that expire after ttl idle seconds, least recently used evicted first."""
+
+    def __init__(self, ttl=1800, max_sessions=10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()  # Token -> [user_id, role, expiry], least recently used first
+        self._lock = threading.Lock()  # The service checks sessions from several threads
+
+    def create(self, user_id, role):
+        """Starts a session and returns its token."""
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self.sessions[token] = [user_id, role, time.monotonic() + self.ttl]
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                metrics.increment("login.sessions_evicted")
+        return token
+
+    def get(self, token):
+        """Returns (user_id, role) of a live session and extends it, or None."""
+        with self._lock:
+            session = self.sessions.get(token)
+            if session is None:
+                return None
+            now = time.monotonic()
+            if session[2] <= now:
+                del self.sessions[token]
+                return None
+            session[2] = now + self.ttl
+            self.sessions.move_to_end(token)
+            return session[0], session[1]
+
+    def revoke(self, token):
+        """Ends one session."""
+        with self._lock:
+            self.sessions.pop(token, None)
+
+    def revoke_user(self, user_id):
+        """Ends every session of a user."""
+        with self._lock:
+            for token in [token for token, session in self.sessions.items() if session[0] == user_id]:
+                del self.sessions[token]
 
 
 class LoginSystem:
-    """Handles user authentication without encryption or decryption."""
-    
-    def __init__(self, csv_file='login.csv'):
+    """Handles user authentication with salted password hashes and session tokens."""
+
+    password_scheme = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"  # Some OpenSSL builds lack scrypt
+    password_cost = None  # Work factor of new hashes; None uses the scheme's default
+
+    def __init__(self, csv_file='login.csv', backend=None, snapshot=False, compact_threshold=1000,
+                 session_ttl=1800, max_sessions=10000):
         self.csv_file = csv_file
+        # TableBackend holding the users; a CSV journals credential changes until the file is rewritten
+        self.backend = backend or CsvBackend(csv_file, compact_threshold=compact_threshold, snapshot=snapshot)
+        self.sessions = SessionStore(session_ttl, max_sessions)
+        self._batch_users = None  # User IDs changed inside the open batch, None meaning all users
         self.users = self.load_users()
     
+    @metrics.timed("login.load")
     def load_users(self):
-        """Load users from the CSV file."""
-        users = {}
-        try:
-            with open(self.csv_file, mode='r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    users[row['user_id']] = {
-                        'password': row['password'],
-                        'role': row['role']
-                    }
-        except FileNotFoundError:
-            print("User data file not found!")
-        return users
+        """Load users from the backend, or from its snapshot while it is current."""
+        with self.backend.reading():
+            try:
+                return self.backend.cached("users", self.saved_users)
+            except FileNotFoundError:
+                print("User data file not found!")
+                return {}
+
+    def saved_users(self):
+        """Read user ID -> password and role from the backend."""
+        return {user_id: records[-1] for user_id, records in self.backend.records("users").items()}
     
-    def save_users(self):
-        """Save users to the CSV file."""
-        with open(self.csv_file, mode='w', newline='', encoding='utf-8-sig') as file:
-            writer = csv.writer(file)
-            writer.writerow(['user_id', 'password', 'role'])
-            for user_id, data in self.users.items():
-                writer.writerow([user_id, data['password'], data['role']])
-                
+    @metrics.timed("login.save")
+    def save_users(self, user_id=None):
+        """Save every user, or only the given user, through the backend."""
+        if self._batch_users is not None:
+            self._batch_users.add(user_id)  # Saved when the batch ends
+            return
+        self._write_users(None if user_id is None else [user_id])
+
+    def _write_users(self, user_ids=None):
+        """Save users while other writers are kept out, keeping users they saved since they were read.
+
+        Changed user_ids are saved as single records; the whole table is only rewritten when
+        every user is saved or the backend asks to compact.
+        """
+        with self.backend.writing():
+            saved = self.backend.saved_changes("users")
+            if saved is not None:
+                metrics.increment("login.conflicts")
+                mine = self.users if user_ids is None else set(user_ids)
+                for user_id, records in saved[0].items():
+                    if user_id in mine:
+                        continue
+                    if records is None:
+                        self.users.pop(user_id, None)
+                    else:
+                        self.users[user_id] = records[-1]
+            if user_ids is None or self.backend.needs_compaction(len(user_ids)):
+                self.backend.replace_all("users", ((user_id, data['password'], data['role']) for user_id, data in self.users.items()))
+            else:
+                self.backend.apply("users", [("put", user_id, [self.users[user_id]]) for user_id in user_ids])
+
+    @contextmanager
+    def batch(self):
+        """Collects user changes and saves them once when the block ends, restoring the users on error.
+
+        A nested batch joins the outer one; on error it rolls back only the changes made inside it.
+        """
+        if self._batch_users is not None:
+            savepoint = dict(self.users)
+            try:
+                yield
+            except BaseException:
+                self.users.clear()
+                self.users.update(savepoint)
+                raise
+            return
+        self._batch_users = set()
+        backup = dict(self.users)  # Changes replace a user's record instead of editing it, so a shallow copy is enough
+        try:
+            yield
+            changed, self._batch_users = self._batch_users, None
+            if changed:
+                self._write_users(None if None in changed else changed)
+        except BaseException:
+            self.users.clear()
+            self.users.update(backup)
+            raise
+        finally:
+            self._batch_users = None
+
+    @metrics.timed("login.add_user")
     def add_user(self, user_id, password, role):
-            """Adds a new user without hashing the password."""
+            """Adds a new user with a salted password hash."""
             if user_id in self.users:
                 print("User ID already exists! Choose another.")
                 return
-            self.users[user_id] = {'password': password, 'role': role}
-            self.save_users()
+            self.users[user_id] = {'password': hash_password(password, self.password_scheme, self.password_cost), 'role': role}
+            self.save_users(user_id)
             print(f"User '{user_id}' added successfully!")
 
     
+    @metrics.timed("login.login")
     def login(self, user_id, password):
-        """Authenticate the user."""
-        if user_id in self.users:
-            stored_password = self.users[user_id]['password']
-            if stored_password == password:
-                return self.users[user_id]['role']
+        """Authenticate the user, upgrading a plaintext or outdated password hash."""
+        user = self.users.get(user_id)
+        if user is not None and verify_password(password, user['password']):
+            if needs_rehash(user['password'], self.password_scheme, self.password_cost):
+                self.users[user_id] = dict(user, password=hash_password(password, self.password_scheme, self.password_cost))
+                self.save_users(user_id)
+            return user['role']
+        metrics.increment("login.failures")
         return None
+
+    def start_session(self, user_id, password):
+        """Log in and return a session token, or None; later checks use the token instead of the password."""
+        role = self.login(user_id, password)
+        return None if role is None else self.sessions.create(user_id, role)
+
+    @metrics.timed("login.session")
+    def session(self, token):
+        """Return (user_id, role) for a live session token, or None once it expired or ended."""
+        return self.sessions.get(token)
     
+    @metrics.timed("login.change_password")
     def change_password(self, user_id, new_password):
-        """Change the password for a user."""
+        """Change the password for a user and end their sessions."""
         if user_id in self.users:
-            self.users[user_id]['password'] = new_password
-            self.save_users()
+            self.users[user_id] = dict(self.users[user_id], password=hash_password(new_password, self.password_scheme, self.password_cost))
+            self.save_users(user_id)
+            self.sessions.revoke_user(user_id)
             print("Password updated successfully!")
         else:
             print("User not found!")
 
-    def logout(self):
-        """Logs out the user."""
+    def logout(self, token=None):
+        """Logs out the user, ending their session."""
+        if token is not None:
+            self.sessions.revoke(token)
         print("Logged out successfully!")
 
     
+@metrics.timed("sqlite.migrate")
+def migrate_to_sqlite(db_path='checkmygrade.db', directory='.', suffix=''):
+    """Copies the four CSV tables in directory, including journaled changes, into a SQLite database."""
+    backend = SqliteBackend(db_path)
+    student_csv, student_names = table_layout('Student.csv', directory, suffix)
+    backend.replace_all("students", Student(student_csv, lazy=True, names_file=student_names).iter_records())
+    professor_csv, professor_names = table_layout('professor.csv', directory, suffix)
+    professor_db = Professor(professor_csv, names_file=professor_names)
+    backend.replace_all("professors", ((professor_id, record["professor_name"], record["rank"], record["course_id"])
+                                       for professor_id, records in professor_db.professors.items() for record in records))
+    backend.replace_courses(CourseDB(os.path.join(directory, 'course.csv' + suffix)).load_courses())
+    login_db = LoginSystem(os.path.join(directory, 'login.csv' + suffix))
+    backend.replace_all("users", ((user_id, data['password'], data['role']) for user_id, data in login_db.users.items()))
+    counts = {table: backend.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("students", "professors", "courses", "users")}
+    backend.close()
+    print(f"Migrated into {db_path}: " + ", ".join(f"{count} {table} rows" for table, count in counts.items()))
+
+
+NORMALIZED_FILES = {  # Flat CSV -> (rows file, names file) of the normalized layout
+    "Student.csv": ("enrollments.csv", "students.csv"),
+    "professor.csv": ("teaching.csv", "professors.csv"),
+}
+
+
+def table_layout(flat, directory='.', suffix=''):
+    """Returns (csv_file, names_file) holding the table of a flat file such as 'Student.csv' in directory.
+
+    The normalized files are used when they exist, otherwise the flat file with names_file None.
+    Every command goes through this, so they all read the same copy of the table.
+    """
+    rows_file, names_file = (os.path.join(directory, name + suffix) for name in NORMALIZED_FILES[flat])
+    if os.path.exists(rows_file):
+        return rows_file, names_file
+    return os.path.join(directory, flat + suffix), None
+
+
+def _retire_table(*paths):
+    """Removes table files with their journal, index and snapshot once another layout holds their rows."""
+    for path in paths:
+        for name in (path, path + '.journal', path + '.idx', path + '.snapshot'):
+            if os.path.exists(name):
+                os.remove(name)
+
+
+def normalize_tables(directory='.', flatten=False):
+    """Converts Student.csv and professor.csv to the normalized layout, or back to them with flatten.
+
+    The files converted from are removed, so no stale copy of a table is left behind.
+    """
+    for (flat, (rows_file, names_file)), convert in zip(NORMALIZED_FILES.items(), (convert_students, convert_professors)):
+        flat, rows_file, names_file = (os.path.join(directory, name) for name in (flat, rows_file, names_file))
+        if flatten:
+            convert(rows_file, flat, source_names=names_file)
+        else:
+            convert(flat, rows_file, target_names=names_file)
+        normalized_size = os.path.getsize(rows_file) + os.path.getsize(names_file)
+        print(f"{os.path.basename(flat)}: {os.path.getsize(flat)} bytes flat, {normalized_size} bytes normalized")
+        if flatten:
+            _retire_table(rows_file, names_file)
+        else:
+            _retire_table(flat)
+
+
+def compress_tables(directory='.', compression='gz', decompress=False):
+    """Copies the CSV tables, journals included, to compressed files next to them, or back with decompress.
+
+    The normalized student and professor files are copied too when they exist.
+    """
+    suffix = "." + compression
+
+    def paths(name):
+        plain = os.path.join(directory, name)
+        return (plain + suffix, plain) if decompress else (plain, plain + suffix)
+
+    tables = [("Student.csv", None, convert_students), ("professor.csv", None, convert_professors),
+              ("course.csv", None, lambda source, target: CourseDB(target).save_courses(CourseDB(source).load_courses())),
+              ("login.csv", None, lambda source, target: CsvBackend(target).replace_all(
+                  "users", ((user_id, data['password'], data['role']) for user_id, data in LoginSystem(source).users.items())))]
+    for (rows_file, names_file), convert in zip(NORMALIZED_FILES.values(), (convert_students, convert_professors)):
+        tables.append((rows_file, names_file, convert))
+    for name, names_file, copy in tables:
+        source, target = paths(name)
+        if not os.path.exists(source):
+            continue
+        if names_file is None:
+            copy(source, target)
+        else:
+            source_names, target_names = paths(names_file)
+            copy(source, target, source_names, target_names)
+        plain, compressed = sorted((source, target), key=len)
+        print(f"{name}: {os.path.getsize(plain)} bytes plain, {os.path.getsize(compressed)} bytes {compression}")
+
+
 # Main Menu with options for login, change password, and logout
-def main_menu():
-    login_db = LoginSystem('login.csv')
-    student_db = Student("student.csv")
-    course_db = CourseDB('course.csv')
-    professor_db = Professor("professor.csv")
+class SessionTables:
+    """Opens each table of a menu session on first use, from its snapshot when that is current.
+
+    With compression ('gz', 'bz2' or 'xz') every table file name gets that extension. With
+    integrity 'report' or 'block' the integrity checker vets every change from the start.
+    """
+
+    def __init__(self, db_path=None, snapshot=True, compression=None, integrity=None):
+        self.backend = SqliteBackend(db_path) if db_path else None
+        self.snapshot = snapshot
+        self.suffix = "." + compression if compression else ""
+        self.integrity_mode = integrity
+        self.opened = {}  # Table name -> DB object
+
+    def _open(self, name, factory):
+        if name not in self.opened:
+            self.opened[name] = factory()
+        return self.opened[name]
+
+    @property
+    def login_db(self):
+        return self._open("login", lambda: LoginSystem('login.csv' + self.suffix, backend=self.backend, snapshot=self.snapshot))
+
+    @property
+    def student_db(self):
+        csv_file, names_file = table_layout("Student.csv", suffix=self.suffix)
+        if self.backend is not None:
+            csv_file, names_file = "Student.csv", None  # The database holds the rows
+        return self._open("student", lambda: Student(csv_file, backend=self.backend, snapshot=self.snapshot, names_file=names_file))
+
+    @property
+    def course_db(self):
+        return self._open("course", lambda: CourseDB('course.csv' + self.suffix, backend=self.backend, snapshot=self.snapshot))
+
+    @property
+    def professor_db(self):
+        csv_file, names_file = table_layout("professor.csv", suffix=self.suffix)
+        if self.backend is not None:
+            csv_file, names_file = "professor.csv", None  # The database holds the rows
+        return self._open("professor", lambda: Professor(csv_file, backend=self.backend, snapshot=self.snapshot,
+                                                         names_file=names_file))
+
+    @property
+    def catalog(self):
+        """Catalog of courses and professors; the menu never asks it about students."""
+        return self._open("catalog", lambda: Catalog(professor_db=self.professor_db, course_db=self.course_db))
+
+    @property
+    def dashboard(self):
+        return self._open("dashboard", lambda: Dashboard(self.student_db, self.professor_db, self.course_db))
+
+    @property
+    def integrity(self):
+        """Integrity checker; it only vets changes when the session was opened with an integrity mode."""
+        return self._open("integrity", lambda: IntegrityChecker(self.student_db, self.professor_db, self.course_db,
+                                                                block=self.integrity_mode == "block",
+                                                                attach=bool(self.integrity_mode)))
+
+
+def main_menu(db_path=None, connect=None, compression=None, integrity=None):
+    if connect:
+        from server import RemoteTables  # The menu only talks to the service
+        tables = RemoteTables(connect)
+    else:
+        tables = SessionTables(db_path, compression=compression, integrity=integrity)
+        if integrity:
+            tables.integrity  # Attached before the first change so every change is vetted
     while True:
         columns = shutil.get_terminal_size().columns
         print("=================================".center(columns))
@@ -513,7 +3421,9 @@ def main_menu():
         if choice == '1':
             email = input("Enter your email: ")
             password = getpass.getpass("Enter your password: ")
-            role = login_db.login(email.strip(), password.strip())
+            token = tables.login_db.start_session(email.strip(), password.strip())
+            identity = tables.login_db.session(token) if token else None
+            role = identity[1] if identity else None
             if role:
                 if role == 'student':
                     
@@ -530,21 +3440,25 @@ def main_menu():
                         print("5. Check My Grade")
                         print("6. Logout")
                         choice = input("Enter your choice: ")
+                        if tables.login_db.session(token) is None:
+                            print("Session expired. Please log in again.")
+                            break
                         if choice == '1':
                             email = input("Enter student email: ")
-                            student_db.display_records(email)
+                            tables.student_db.display_records(email)
                         elif choice == '2':
-                            course_db.display_courses()
+                            tables.course_db.display_courses()
                         elif choice == '3':
                             course_id_input = input("Enter Course ID: ")
-                            show_professor_details_by_course(course_id_input)
+                            show_professor_details_by_course(course_id_input, tables.catalog)
                         elif choice == '4':
                             email = input("Enter student email: ")
-                            student_db.check_my_marks(email)
+                            tables.student_db.check_my_marks(email)
                         elif choice == '5':
                             email = input("Enter student email: ")
-                            student_db.check_my_grade(email)
+                            tables.student_db.check_my_grade(email)
                         elif choice == '6':
+                                 tables.login_db.logout(token)
                                  break
                         else:
                             print("Invalid choice!")
@@ -568,60 +3482,67 @@ def main_menu():
                         print("11.Modify Professor Details")
                         print("12.Show Course Details by Professor")
                         print("13.Add new user")
-                        print("14.Logout")
+                        print("14.Course Dashboard")
+                        print("15.Logout")
                         choice = input("Enter your choice: ")
+                        if tables.login_db.session(token) is None:
+                            print("Session expired. Please log in again.")
+                            break
                         if choice == '1':
                             professor_id = input("Enter Professor ID: ")
-                            professor_db.display_professors_details(professor_id)
+                            tables.professor_db.display_professors_details(professor_id)
                         elif choice == '2':
                             email = input("Enter student email: ")
-                            student_db.display_records(email)
+                            tables.student_db.display_records(email)
                         elif choice == '3':
                             email = input("Enter email: ")
                             first_name = input("Enter first name: ")
                             last_name = input("Enter last name: ")
                             courses = [tuple(input("Enter Course ID, Grade, Marks: ").split(",")) for _ in range(4)]
-                            student_db.add_new_student(email, first_name, last_name, courses)
+                            tables.student_db.add_new_student(email, first_name, last_name, courses)
                         elif choice == '4':
                             email = input("Enter student email to delete: ")
-                            student_db.delete_student(email)
+                            tables.student_db.delete_student(email)
                         elif choice == '5':
                             email = input("Enter student email: ")
                             course_id =input("Enter course ID to update:")
                             grade =input("Enter new grade:")
                             marks =input("Enter new marks:")
-                            student_db.update_student_record(email, course_id, grade, marks)
+                            tables.student_db.update_student_record(email, course_id, grade, marks)
                         elif choice == '6':
-                            course_db.add_new_course()
+                            tables.course_db.add_new_course()
                         elif choice == '7':
-                            course_db.delete_course()
+                            tables.course_db.delete_course()
                         elif choice == '8':
-                            course_db.modify_course_details()
+                            tables.course_db.modify_course_details()
                         elif choice == '9':
                             professor_id = input("Enter Professor ID: ")
                             professor_name = input("Enter Professor Name: ")
                             rank = input("Enter Rank: ")
                             courses = input("Enter Course IDs (comma separated): ").split(',')
-                            professor_db.add_new_professor(professor_id, professor_name, rank, courses)
+                            tables.professor_db.add_new_professor(professor_id, professor_name, rank, courses)
                         elif choice == '10':
                                 professor_id = input("Enter Professor ID to delete: ")
-                                professor_db.delete_professor(professor_id)
+                                tables.professor_db.delete_professor(professor_id)
                         elif choice == '11':
                                 professor_id = input("Enter Professor ID to modify: ")
                                 new_name = input("Enter new name (leave blank to keep unchanged): ") or None
                                 new_rank = input("Enter new rank (leave blank to keep unchanged): ") or None
                                 new_courses = input("Enter new Course IDs (comma separated, leave blank to keep unchanged): ")
                                 new_courses = new_courses.split(',') if new_courses else None
-                                professor_db.modify_professor_details(professor_id, new_name, new_rank, new_courses)
+                                tables.professor_db.modify_professor_details(professor_id, new_name, new_rank, new_courses)
                         elif choice == '12':
                                 professor_id = input("Enter Professor ID: ")
-                                professor_db.show_course_details_by_professor(professor_id,"course.csv")
+                                tables.professor_db.show_course_details_by_professor(professor_id,"course.csv")
                         elif choice == '13':
                                 email = input("Enter new user email: ")
                                 password = getpass.getpass("Enter password for new user: ")
                                 role = input("Enter role (student/professor): ")
-                                login_db.add_user(email, password, role)
+                                tables.login_db.add_user(email, password, role)
                         elif choice == '14':
+                            tables.dashboard.show()
+                        elif choice == '15':
+                            tables.login_db.logout(token)
                             break
                         else:
                             print("Invalid choice!")
@@ -629,15 +3550,50 @@ def main_menu():
         elif choice == '2':
             email = input("Enter your email: ")
             new_password = getpass.getpass("Enter new password: ")
-            login_db.change_password(email, new_password)
+            tables.login_db.change_password(email, new_password)
         elif choice == '3':
-            login_db.logout()
+            tables.login_db.logout()
             break
         else:
             print("Invalid choice!")
 
 if __name__ == "__main__":
-    main_menu()
+    parser = argparse.ArgumentParser(description="Check My Grade App")
+    parser.add_argument("command", nargs="?",
+                        choices=["menu", "migrate", "normalize", "flatten", "compress", "decompress", "check"],
+                        default="menu",
+                        help="run the interactive menu, copy the CSV files into a SQLite database, convert "
+                             "Student.csv and professor.csv to and from the normalized layout, copy the CSV "
+                             "files to and from compressed ones, or check that every course ID exists")
+    parser.add_argument("--db", help="SQLite database to use instead of the CSV files")
+    parser.add_argument("--compression", choices=["gz", "bz2", "xz"],
+                        help="use table files with this extension, compressed with gzip, bzip2 or xz")
+    parser.add_argument("--integrity", choices=["report", "block"],
+                        help="check the course IDs of every change and report, or also refuse, unknown or still-used ones")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="use a running server.py instead of loading the data")
+    parser.add_argument("--metrics", action="store_true", help="record operation timings and counters")
+    parser.add_argument("--metrics-output", help="write metrics here on exit and on SIGUSR1 (.prom/.txt for Prometheus text, else JSON)")
+    parser.add_argument("--profile", help="comma-separated operations to run under cProfile, or 'all'")
+    args = parser.parse_args()
+    if args.metrics or args.metrics_output or args.profile:
+        metrics.enable(args.profile.split(",") if args.profile else None)
+    if args.metrics_output:
+        atexit.register(metrics.export, args.metrics_output)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: metrics.export(args.metrics_output))
+    elif metrics.enabled:
+        atexit.register(lambda: print(metrics.to_json(), file=sys.stderr))
+    suffix = "." + args.compression if args.compression else ""
+    if args.command == "migrate":
+        migrate_to_sqlite(args.db or 'checkmygrade.db', suffix=suffix)
+    elif args.command in ("normalize", "flatten"):
+        normalize_tables(flatten=args.command == "flatten")
+    elif args.command in ("compress", "decompress"):
+        compress_tables(compression=args.compression or "gz", decompress=args.command == "decompress")
+    elif args.command == "check":
+        sys.exit(1 if check_tables(suffix=suffix) else 0)
+    else:
+        main_menu(args.db, args.connect, args.compression, args.integrity)
 
 
 # 
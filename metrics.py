@@ -0,0 +1,226 @@
+"""Opt-in operation timing, counters and latency histograms for the Check My Grade App.
+
+Recording is off unless CHECKMYGRADE_METRICS=1 is set or metrics.enable() is called, so the
+decorated hot paths only pay for one attribute check. CHECKMYGRADE_PROFILE=name[,name...]
+(or "all") additionally runs those operations under cProfile.
+"""
+
+import bisect
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in nanoseconds: 1us, 2.5us, 5us, 10us ... 5s
+BUCKETS_NS = tuple(int(step * 10 ** exponent) for exponent in range(3, 10) for step in (1, 2.5, 5))
+
+
+class Histogram:
+    """Latency histogram with fixed buckets plus exact count, sum, min and max.
+
+    Not thread-safe on its own; Metrics updates and reads it under its lock.
+    """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_NS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, duration_ns):
+        self.buckets[bisect.bisect_left(BUCKETS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total += duration_ns
+        self.min = duration_ns if self.min is None else min(self.min, duration_ns)
+        self.max = duration_ns if self.max is None else max(self.max, duration_ns)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, capped at the largest sample."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for position, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if position < len(BUCKETS_NS):
+                    return min(BUCKETS_NS[position], self.max)
+                break
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total / 1e6,
+            "mean_ms": self.total / self.count / 1e6 if self.count else None,
+            "min_ms": self.min / 1e6 if self.min is not None else None,
+            "max_ms": self.max / 1e6 if self.max is not None else None,
+            "p50_ms": self._ms(self.quantile(0.5)),
+            "p90_ms": self._ms(self.quantile(0.9)),
+            "p99_ms": self._ms(self.quantile(0.99)),
+        }
+
+    @staticmethod
+    def _ms(duration_ns):
+        return duration_ns / 1e6 if duration_ns is not None else None
+
+
+class Metrics:
+    """Registry of per-operation latency histograms, counters and optional cProfile stats."""
+
+    def __init__(self, enabled=False, profile=()):
+        self.enabled = enabled
+        self.profile_operations = set(profile)  # Operation names to profile, or {"all"}
+        self.histograms = {}
+        self.counters = {}
+        self.profiles = {}  # Operation name -> accumulated pstats.Stats
+        self._lock = threading.Lock()  # The service records from several threads at once
+        self._local = threading.local()  # .profiling: cProfile cannot nest, so only a thread's outermost operation is profiled
+
+    def enable(self, profile=None):
+        self.enabled = True
+        if profile is not None:
+            self.profile_operations = set(profile)
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+            self.profiles = {}
+
+    def increment(self, name, value=1):
+        """Adds value to a counter when recording is on."""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, duration_ns):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(duration_ns)
+
+    def _should_profile(self, name):
+        profiling = getattr(self._local, "profiling", False)
+        return not profiling and ("all" in self.profile_operations or name in self.profile_operations)
+
+    @contextmanager
+    def timer(self, name):
+        """Times the enclosed block as one call of the named operation."""
+        if not self.enabled:
+            yield
+            return
+        profiler = None
+        if self._should_profile(name):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._local.profiling = True
+            except ValueError:
+                profiler = None  # Python 3.12+ runs one profiler per process; another thread holds it
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException:
+            self.increment(name + ".errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter_ns() - start)
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiling = False
+                with self._lock:
+                    if name in self.profiles:
+                        self.profiles[name].add(profiler)
+                    else:
+                        self.profiles[name] = pstats.Stats(profiler, stream=io.StringIO())
+
+    def timed(self, name):
+        """Decorator recording every call of the function as the named operation."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Returns all counters and per-operation latency summaries as plain data."""
+        with self._lock:
+            counters = dict(sorted(self.counters.items()))
+            operations = {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+            profiles = sorted(self.profiles)
+        return {
+            "counters": counters,
+            "operations": operations,
+            "profiles": {name: self.profile_report(name) for name in profiles},
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP checkmygrade_operation_seconds Latency of Check My Grade App operations.",
+            "# TYPE checkmygrade_operation_seconds histogram",
+        ]
+        with self._lock:
+            histograms = [(name, list(histogram.buckets), histogram.total, histogram.count)
+                          for name, histogram in sorted(self.histograms.items())]
+            counters = sorted(self.counters.items())
+        for name, buckets, total, count in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS_NS + (None,), buckets):
+                cumulative += bucket_count
+                le = "+Inf" if bound is None else repr(bound / 1e9)
+                lines.append(f'checkmygrade_operation_seconds_bucket{{operation="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'checkmygrade_operation_seconds_sum{{operation="{name}"}} {total / 1e9!r}')
+            lines.append(f'checkmygrade_operation_seconds_count{{operation="{name}"}} {count}')
+        lines.append("# HELP checkmygrade_events_total Check My Grade App event counters.")
+        lines.append("# TYPE checkmygrade_events_total counter")
+        for name, value in counters:
+            lines.append(f'checkmygrade_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def profile_report(self, name, limit=20):
+        """Returns the cumulative-time cProfile table recorded for an operation."""
+        with self._lock:
+            if name not in self.profiles:
+                return ""
+            stream = io.StringIO()
+            stats = self.profiles[name]
+            stats.stream = stream
+            stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def export(self, path):
+        """Writes the metrics to path, as Prometheus text for .prom/.txt files and JSON otherwise."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json() + "\n"
+        with open(path, mode='w', encoding='utf-8') as file:
+            file.write(text)
+
+
+def _env_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+metrics = Metrics(enabled=os.environ.get("CHECKMYGRADE_METRICS", "").lower() in ("1", "true", "yes", "on"),
+                  profile=_env_list(os.environ.get("CHECKMYGRADE_PROFILE", "")))
+if metrics.profile_operations:
+    metrics.enabled = True  # Profiling an operation implies timing it
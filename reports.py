@@ -0,0 +1,195 @@
+"""Bulk transcripts for every student, or a filtered subset, as CSV, JSON lines or text.
+
+Example:
+    python reports.py transcripts.csv --course DATA236 --workers 4
+
+Course means and medians are computed once for the whole run. Students are rendered in
+chunks, optionally by a pool of worker processes, and the chunks are written in order with
+one large write each, so the output matches a serial run byte for byte.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from lab1complete import (LazyStudentRecords, SqliteBackend, Student, atomic_open, compression_of, init_worker,
+                          overall_grade, relative_grade, table_layout, worker_state)
+from metrics import metrics
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".txt": "text"}
+CSV_HEADER = ["Email_address", "First_name", "Last_name", "Course.id", "grades", "Marks",
+              "Course_mean", "Course_median", "Assigned_grade", "Student_mean", "Overall_grade"]
+NEEDS_QUOTES = re.compile(r'[",\r\n]')
+
+_worker_state = None  # (students, emails, aggregates, fmt) in each worker process
+
+
+def course_aggregates(student_db):
+    """Returns course ID -> (mean, median) from the student table's course statistics."""
+    student_db.ensure_course_stats()
+    return {course_id: (stats.mean(), float(stats.median())) for course_id, stats in student_db.course_stats.items()}
+
+
+def transcript(email, records, aggregates):
+    """Builds one student's transcript: their records with course mean, median and assigned grade."""
+    grades, mean, overall = grade_student(records, aggregates)
+    return {
+        "email": email,
+        "first_name": records[0]["first_name"],
+        "last_name": records[0]["last_name"],
+        "courses": [{
+            "course_id": record["course_id"],
+            "grade": record["grade"],
+            "marks": record["marks"],
+            "course_mean": aggregates[record["course_id"]][0],
+            "course_median": aggregates[record["course_id"]][1],
+            "assigned_grade": grade,
+        } for record, grade in zip(records, grades)],
+        "mean": mean,
+        "overall_grade": overall,
+    }
+
+
+def grade_student(records, aggregates):
+    """Returns the assigned grade of each record, the student's mean marks and overall grade."""
+    grades = [relative_grade(record["marks"], aggregates[record["course_id"]][0]) for record in records]
+    return grades, sum(record["marks"] for record in records) / len(records), overall_grade(grades)
+
+
+def csv_field(value):
+    """Quotes a CSV field only when csv.writer would."""
+    text = str(value)
+    if NEEDS_QUOTES.search(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def render_csv(students, emails, aggregates):
+    # Rows are joined by hand with the per-course cells formatted once; csv.writer spends most of
+    # its time turning the same floats into strings again for every row
+    course_cells = {course_id: (csv_field(course_id) + ",", f",{mean},{median},")
+                    for course_id, (mean, median) in aggregates.items()}
+    grade_cells = {}
+    lines = []
+    for email in emails:
+        records = students[email]
+        grades, mean, overall = grade_student(records, aggregates)
+        first = records[0]
+        prefix = f"{csv_field(email)},{csv_field(first['first_name'])},{csv_field(first['last_name'])},"
+        suffix = f",{mean},{overall}\r\n"
+        for record, grade in zip(records, grades):
+            if record is not first and (record["first_name"], record["last_name"]) != (first["first_name"], first["last_name"]):
+                prefix = f"{csv_field(email)},{csv_field(record['first_name'])},{csv_field(record['last_name'])},"
+            stored_grade = grade_cells.get(record["grade"])
+            if stored_grade is None:
+                stored_grade = grade_cells[record["grade"]] = csv_field(record["grade"])
+            course_id, course_stats = course_cells[record["course_id"]]
+            lines.append(f"{prefix}{course_id}{stored_grade},{record['marks']}{course_stats}{grade}{suffix}")
+    return "".join(lines)
+
+
+def render_text(students, emails, aggregates):
+    course_text = {course_id: f"Mean: {mean:.2f}, Median: {median:.2f}" for course_id, (mean, median) in aggregates.items()}
+    lines = []
+    for email in emails:
+        records = students[email]
+        grades, mean, overall = grade_student(records, aggregates)
+        lines.append(f"Transcript for {email}")
+        lines.append(f"Name: {records[0]['first_name']} {records[0]['last_name']}")
+        for record, grade in zip(records, grades):
+            lines.append(f"Course ID: {record['course_id']}, Grade: {record['grade']}, Marks: {record['marks']}, "
+                         f"{course_text[record['course_id']]}, Assigned Grade: {grade}")
+        lines.append(f"Overall Student Mean: {mean:.2f}")
+        lines.append(f"Overall Student Grade: {overall}")
+        lines.append("")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def render_chunk(students, emails, aggregates, fmt):
+    """Renders the transcripts of emails in one of the report formats."""
+    if fmt == "csv":
+        return render_csv(students, emails, aggregates)
+    if fmt == "text":
+        return render_text(students, emails, aggregates)
+    return "".join(json.dumps(transcript(email, students[email], aggregates)) + "\n" for email in emails)
+
+
+def _render_range(start, stop):
+    students, emails, aggregates, fmt = worker_state()
+    return render_chunk(students, emails[start:stop], aggregates, fmt)
+
+
+def select_students(students, emails=None, course_id=None):
+    """Returns the emails to report on, in table order."""
+    wanted = None if emails is None else set(emails)
+    return [email for email, records in students.items()
+            if (wanted is None or email in wanted)
+            and (course_id is None or any(record["course_id"] == course_id for record in records))]
+
+
+@metrics.timed("report.transcripts")
+def write_transcripts(student_db, path, fmt=None, emails=None, course_id=None, workers=None, chunk_size=2000):
+    """Writes transcripts of the selected students to path and returns how many were written.
+
+    fmt defaults to the format matching the file extension, ignoring a trailing .gz, .bz2 or
+    .xz, which compresses the report. With workers > 1 the chunks are rendered by that many
+    processes while this process writes finished chunks in order.
+    """
+    name = os.path.splitext(path)[0] if compression_of(path) else path
+    fmt = fmt or FORMATS.get(os.path.splitext(name)[1].lower(), "text")
+    if fmt not in FORMATS.values():
+        raise ValueError(f"Unknown report format: {fmt}")
+    students = student_db.students
+    if isinstance(students, LazyStudentRecords):
+        students = students.load_all()
+    aggregates = course_aggregates(student_db)
+    selected = select_students(students, emails, course_id)
+    ranges = [(start, min(start + chunk_size, len(selected))) for start in range(0, len(selected), chunk_size)]
+
+    with atomic_open(path, encoding='utf-8') as file:
+        if fmt == "csv":
+            csv.writer(file).writerow(CSV_HEADER)
+        if (workers or 0) > 1 and len(ranges) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                     initargs=(students, selected, aggregates, fmt)) as pool:
+                pending = deque()
+                for start, stop in ranges:
+                    pending.append(pool.submit(_render_range, start, stop))
+                    if len(pending) >= workers * 2:  # Bounds the rendered chunks held in memory
+                        file.write(pending.popleft().result())
+                while pending:
+                    file.write(pending.popleft().result())
+        else:
+            for start, stop in ranges:
+                file.write(render_chunk(students, selected[start:stop], aggregates, fmt))
+    metrics.increment("report.students", len(selected))
+    return len(selected)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write transcripts for many students at once")
+    parser.add_argument("output", help="report file; .csv, .jsonl and .txt pick the format, "
+                                                   "and .gz, .bz2 or .xz after it compresses it")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="override the format chosen by the extension")
+    parser.add_argument("--students", help="student CSV file to report on; defaults to the table the menu uses")
+    parser.add_argument("--db", help="SQLite database to use instead of the CSV file")
+    parser.add_argument("--email", action="append", help="only this student; repeat for several")
+    parser.add_argument("--course", help="only students enrolled in this course")
+    parser.add_argument("--workers", type=int, help="render with this many processes")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="students per rendered chunk")
+    args = parser.parse_args(argv)
+
+    backend = SqliteBackend(args.db) if args.db else None
+    csv_file, names_file = (args.students, None) if args.students else table_layout("Student.csv")
+    student_db = Student(csv_file, backend=backend, workers=args.workers, names_file=names_file)
+    count = write_transcripts(student_db, args.output, args.format, args.email, args.course,
+                              args.workers, args.chunk_size)
+    print(f"Wrote {count} transcripts to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Multi-client service that serves one shared, warm copy of the Check My Grade App data.
+
+Start it with:
+    python server.py --port 8765
+and point menus at it with:
+    python lab1complete.py --connect 127.0.0.1:8765
+
+The protocol is one JSON object per line. A request is {"id": 1, "op": "student.check_my_marks",
+"args": ["student1@mycsu.edu"]}. The reply is {"id": 1, "ok": true, "result": ..., "output": "..."},
+where output is whatever the operation printed. Reads run concurrently under a shared lock.
+Writes are queued and applied in groups under the exclusive lock, inside one batch per table,
+so a group costs one journal append or file write per table instead of one per change.
+"""
+
+import argparse
+import asyncio
+import functools
+import io
+import json
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, asynccontextmanager, contextmanager, nullcontext
+
+from lab1complete import CourseDB, SessionTables
+
+PUBLIC, USER, SELF, PROFESSOR = "public", "user", "self", "professor"  # Who may call an operation
+READ, WRITE = "read", "write"
+
+# Operation -> (table attribute, method, read or write, who may call it)
+OPERATIONS = {
+    "login.login": ("login_db", "login", WRITE, PUBLIC),  # Logging in may save an upgraded password hash
+    "login.start_session": ("login_db", "start_session", WRITE, PUBLIC),
+    "login.session": ("login_db", "session", READ, PUBLIC),
+    "login.logout": ("login_db", "logout", READ, PUBLIC),
+    "login.change_password": ("login_db", "change_password", WRITE, SELF),
+    "login.add_user": ("login_db", "add_user", WRITE, PROFESSOR),
+    "student.display_records": ("student_db", "display_records", READ, USER),
+    "student.check_my_marks": ("student_db", "check_my_marks", READ, USER),
+    "student.check_my_grade": ("student_db", "check_my_grade", READ, USER),
+    "student.top_n": ("student_db", "top_n", READ, USER),
+    "student.rank_of": ("student_db", "rank_of", READ, USER),
+    "student.percentile_of": ("student_db", "percentile_of", READ, USER),
+    "student.students_in_marks_range": ("student_db", "students_in_marks_range", READ, USER),
+    "student.search": ("student_db", "search", READ, USER),
+    "student.add_new_student": ("student_db", "add_new_student", WRITE, PROFESSOR),
+    "student.delete_student": ("student_db", "delete_student", WRITE, PROFESSOR),
+    "student.update_student_record": ("student_db", "update_student_record", WRITE, PROFESSOR),
+    "student.bulk_upsert": ("student_db", "bulk_upsert", WRITE, PROFESSOR),
+    "student.bulk_delete": ("student_db", "bulk_delete", WRITE, PROFESSOR),
+    "course.load_courses": ("course_db", "load_courses", READ, USER),
+    "course.get_course": ("course_db", "get_course", READ, USER),
+    "course.show_course": ("course_db", "show_course", READ, USER),
+    "course.add_course": ("course_db", "add_course", WRITE, PROFESSOR),
+    "course.remove_course": ("course_db", "remove_course", WRITE, PROFESSOR),
+    "course.update_course_details": ("course_db", "update_course_details", WRITE, PROFESSOR),
+    "course.bulk_upsert": ("course_db", "bulk_upsert", WRITE, PROFESSOR),
+    "course.bulk_delete": ("course_db", "bulk_delete", WRITE, PROFESSOR),
+    "professor.display_professors_details": ("professor_db", "display_professors_details", READ, USER),
+    "professor.show_course_details_by_professor": ("professor_db", "show_course_details_by_professor", READ, USER),
+    "professor.add_new_professor": ("professor_db", "add_new_professor", WRITE, PROFESSOR),
+    "professor.delete_professor": ("professor_db", "delete_professor", WRITE, PROFESSOR),
+    "professor.modify_professor_details": ("professor_db", "modify_professor_details", WRITE, PROFESSOR),
+    "professor.bulk_upsert": ("professor_db", "bulk_upsert", WRITE, PROFESSOR),
+    "professor.bulk_delete": ("professor_db", "bulk_delete", WRITE, PROFESSOR),
+    "dashboard.show": ("dashboard", "show", READ, PROFESSOR),
+    "dashboard.course_summary": ("dashboard", "course_summary", READ, PROFESSOR),
+    "dashboard.professor_summary": ("dashboard", "professor_summary", READ, PROFESSOR),
+    "integrity.check": ("integrity", "check", READ, PROFESSOR),
+    "catalog.course": ("catalog", "course", READ, USER),
+    "catalog.professors_for_course": ("catalog", "professors_for_course", READ, USER),
+}
+
+
+class ThreadOutput(io.TextIOBase):
+    """sys.stdout replacement that sends a worker thread's prints to that thread's buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class ReadWriteLock:
+    """Many readers or one writer; a waiting writer keeps new readers out so writes are not starved."""
+
+    def __init__(self):
+        self.readers = 0
+        self.writing = False
+        self.waiting_writers = 0
+        self.condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def read(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: not self.writing and not self.waiting_writers)
+            self.readers += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.readers -= 1
+                self.condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        async with self.condition:
+            self.waiting_writers += 1
+            await self.condition.wait_for(lambda: not self.writing and not self.readers)
+            self.waiting_writers -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+
+class GradeService:
+    """Serves the operations in OPERATIONS from one set of tables shared by every client."""
+
+    def __init__(self, tables, workers=8, max_group=256):
+        self.tables = tables
+        self.max_group = max_group  # Most writes applied under one lock and one batch
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = None
+        self.writes = None
+        self.output = None
+
+    def open_tables(self):
+        """Loads every table up front so clients never wait for a cold load."""
+        for name in ("login_db", "student_db", "course_db", "professor_db", "catalog", "dashboard"):
+            getattr(self.tables, name)
+        if self.tables.integrity_mode:
+            self.tables.integrity
+
+    def run(self, operation, args, savepoint=False):
+        """Runs one operation in the calling thread and returns its reply, capturing what it prints.
+
+        With savepoint, the operation runs in a nested batch of its table, so a write that fails
+        partway is rolled back without undoing the rest of its group.
+        """
+        table, method, _, _ = OPERATIONS[operation]
+        buffer = io.StringIO()
+        self.output.local.buffer = buffer
+        try:
+            if operation == "professor.show_course_details_by_professor":
+                args = [args[0], self.tables.course_db.filename]  # Never open a path chosen by the client
+            target = getattr(self.tables, table)
+            with target.batch() if savepoint else nullcontext():
+                result = getattr(target, method)(*args)
+            return {"ok": True, "result": result, "output": buffer.getvalue()}
+        except Exception as error:
+            return {"ok": False, "error": f"{type(error).__name__}: {error}", "output": buffer.getvalue()}
+        finally:
+            self.output.local.buffer = None
+
+    @contextmanager
+    def saving(self, name, saved):
+        """Batches one table's writes, adding its name to saved once they are written."""
+        with getattr(self.tables, name + "_db").batch():
+            yield
+        saved.append(name)
+
+    def apply_group(self, group):
+        """Applies queued writes inside one batch per table, so each table is written once.
+
+        Each operation runs in its own savepoint: one that fails leaves no partial changes, and
+        the others in the group are still saved.
+        The tables are written one after another. If one fails, the others that were already
+        written stay saved and the error names them; the failed and unwritten ones are rolled back.
+        """
+        replies = []
+        saved = []  # Tables whose batch was written
+        try:
+            with ExitStack() as stack:
+                for name in ("student", "professor", "course", "login"):
+                    stack.enter_context(self.saving(name, saved))
+                for operation, args in group:
+                    replies.append(self.run(operation, args, savepoint=True))
+        except Exception as error:
+            touched = {operation.split(".")[0] for operation, _ in group}
+            saved = [name for name in saved if name in touched]
+            if saved:
+                error = f"Changes to the {', '.join(saved)} table(s) were saved, the others were not: {error}"
+            else:
+                error = f"Changes were not saved: {error}"
+            return [{"ok": False, "error": error, "output": ""}] * len(group)
+        return replies
+
+    async def write_loop(self):
+        """Takes every queued write, up to max_group, and applies them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self.writes.get()]
+            while not self.writes.empty() and len(group) < self.max_group:
+                group.append(self.writes.get_nowait())
+            async with self.lock.write():
+                try:
+                    replies = await loop.run_in_executor(
+                        self.executor, self.apply_group, [(operation, args) for operation, args, _ in group])
+                except Exception as error:
+                    replies = [{"ok": False, "error": str(error), "output": ""}] * len(group)
+            for (_, _, future), reply in zip(group, replies):
+                if not future.done():
+                    future.set_result(reply)
+
+    def allowed(self, session, permission, args):
+        if permission == PUBLIC:
+            return True
+        identity = self.tables.login_db.session(session["token"]) if session["token"] else None
+        if identity is None:
+            return False  # Not logged in, or the session expired
+        user, role = identity
+        if permission == PROFESSOR:
+            return role == "professor"
+        if permission == SELF:
+            return role == "professor" or args[:1] == [user]
+        return True
+
+    async def dispatch(self, session, request):
+        """Checks and runs one request, returning its reply."""
+        operation = request.get("op")
+        args = request.get("args", [])
+        if operation not in OPERATIONS or not isinstance(args, list):
+            return {"ok": False, "error": f"Unknown operation: {operation}"}
+        _, _, kind, permission = OPERATIONS[operation]
+        if not self.allowed(session, permission, args):
+            return {"ok": False, "error": "Please log in with an account allowed to do this."}
+
+        if kind == WRITE:
+            future = asyncio.get_running_loop().create_future()
+            await self.writes.put((operation, args, future))
+            reply = await future
+        else:
+            async with self.lock.read():
+                reply = await asyncio.get_running_loop().run_in_executor(self.executor, self.run, operation, args)
+
+        if operation == "login.login":
+            session["token"] = self.tables.login_db.sessions.create(args[0], reply["result"]) if reply.get("result") else None
+        elif operation == "login.start_session":
+            session["token"] = reply.get("result")
+        elif operation == "login.logout" and session["token"]:
+            self.tables.login_db.sessions.revoke(session["token"])
+            session["token"] = None
+        return reply
+
+    async def handle_client(self, reader, writer):
+        """Answers one connection's requests in order until it disconnects."""
+        session = {"token": None}  # Session token of the logged in user
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    reply = await self.dispatch(session, request)
+                except (ValueError, AttributeError, TypeError) as error:
+                    request, reply = {}, {"ok": False, "error": f"Bad request: {error}"}
+                except Exception as error:
+                    reply = {"ok": False, "error": f"{type(error).__name__}: {error}"}  # Keep serving the connection
+                reply["id"] = request.get("id") if isinstance(request, dict) else None
+                writer.write(json.dumps(reply, default=str).encode('utf-8') + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, ready=None):
+        """Loads the tables and serves clients until cancelled."""
+        self.output = ThreadOutput(sys.stdout)
+        sys.stdout = self.output
+        self.lock = ReadWriteLock()
+        self.writes = asyncio.Queue()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.open_tables)
+            server = await asyncio.start_server(self.handle_client, host, port, limit=1 << 24)
+            writer_task = asyncio.create_task(self.write_loop())
+            if ready is not None:
+                ready(server.sockets[0].getsockname())
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                writer_task.cancel()
+        finally:
+            sys.stdout = self.output.stream
+
+
+class ServiceClient:
+    """Blocking connection to a GradeService that prints each operation's output locally."""
+
+    def __init__(self, address):
+        host, _, port = address.rpartition(':')
+        self.connection = socket.create_connection((host or '127.0.0.1', int(port)))
+        self.file = self.connection.makefile('rwb')
+        self.next_id = 0
+
+    def call(self, operation, *args):
+        """Runs one operation on the service and returns its result."""
+        self.next_id += 1
+        self.file.write(json.dumps({"id": self.next_id, "op": operation, "args": list(args)}).encode('utf-8') + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The service closed the connection.")
+        reply = json.loads(line)
+        print(reply.get("output", ""), end="")
+        if not reply["ok"]:
+            print(reply["error"])
+            return None
+        return reply["result"]
+
+    def close(self):
+        self.file.close()
+        self.connection.close()
+
+
+class RemoteTable:
+    """Stands in for one table, forwarding every method call to the service."""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return functools.partial(self.client.call, f"{self.name}.{method}")
+
+
+class RemoteCourseDB(RemoteTable):
+    """Remote CourseDB that asks its questions locally and sends only the answers."""
+
+    display_courses = CourseDB.display_courses
+    add_new_course = CourseDB.add_new_course
+    delete_course = CourseDB.delete_course
+    modify_course_details = CourseDB.modify_course_details
+
+
+class RemoteTables:
+    """The tables of a menu session, served by a GradeService instead of local files."""
+
+    def __init__(self, address):
+        self.client = ServiceClient(address)
+        self.login_db = RemoteTable(self.client, "login")
+        self.student_db = RemoteTable(self.client, "student")
+        self.course_db = RemoteCourseDB(self.client, "course")
+        self.professor_db = RemoteTable(self.client, "professor")
+        self.catalog = RemoteTable(self.client, "catalog")
+        self.dashboard = RemoteTable(self.client, "dashboard")
+        self.integrity = RemoteTable(self.client, "integrity")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Check My Grade App to many clients")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", help="SQLite database to use instead of the CSV files")
+    parser.add_argument("--workers", type=int, default=8, help="threads running operations")
+    parser.add_argument("--compression", choices=["gz", "bz2", "xz"], help="serve table files compressed with this extension")
+    parser.add_argument("--integrity", choices=["report", "block"], help="report, or also refuse, changes to unknown or still-used course IDs")
+    args = parser.parse_args(argv)
+
+    service = GradeService(SessionTables(args.db, compression=args.compression, integrity=args.integrity),
+                           workers=args.workers)
+    ready = lambda address: print(f"Serving Check My Grade App on {address[0]}:{address[1]}", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready=ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()